@@ -0,0 +1,72 @@
+"""
+Benchmark of the code generation and assembly of [BlobLib](../blob_types/interface.html) based libs.
+
+It generates a few hundred blob types and a diamond shaped lib dependency graph.
+
+    python benchmarks/lib_assembly.py [type_count]
+"""
+
+import os
+import sys
+import time
+
+import numpy
+
+sys.path.insert(1, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from blob_types import Blob, BlobArray, BlobLib, Lib
+
+
+def create_blob_types(type_count):
+    """Creates plain types, arrays of them and complex types, which share the plain types."""
+
+    blob_types = []
+    for index in range(type_count):
+        plain_type = type('Plain%d' % index, (Blob,), {})
+        plain_type.dtype, plain_type.subtypes = Blob.create_plain_dtype(
+            ('global_index', numpy.int32),
+            ('value', numpy.float32),
+            ('flag', numpy.int32)
+        )
+
+        array_type = type('PlainArray%d' % index, (BlobArray,), {'child_type': plain_type})
+
+        complex_type = type('Complex%d' % index, (Blob,), {'subtypes': [
+            ('first', plain_type),
+            ('items', array_type),
+            ('shared', blob_types[index // 2][0] if blob_types else plain_type),
+        ]})
+
+        blob_types.append((plain_type, complex_type))
+
+    return [complex_type for plain_type, complex_type in blob_types]
+
+
+def measure(label, function, *args, **kwargs):
+    start = time.time()
+    result = function(*args, **kwargs)
+    print '%-40s %8.3fs' % (label, time.time() - start)
+    return result
+
+
+def main(type_count=300):
+    blob_types = create_blob_types(type_count)
+
+    half = len(blob_types) // 2
+    base_lib = measure('generate base lib (%d types)' % half, BlobLib, required_global_blob_types=blob_types[:half])
+    measure('add %d types incrementally' % (len(blob_types) - half), base_lib.add_blob_types,
+            required_global_blob_types=blob_types[half:])
+
+    # diamond: top -> (left, right) -> base
+    left_lib = Lib(dependencies=[base_lib])
+    right_lib = Lib(dependencies=[base_lib])
+    top_lib = Lib(dependencies=[left_lib, right_lib])
+
+    header_code = measure('assemble header code', top_lib.get_header_code)
+    source_code = measure('assemble source code', top_lib.get_source_code)
+
+    print 'header: %d bytes, source: %d bytes' % (len(header_code), len(source_code))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
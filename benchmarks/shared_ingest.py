@@ -0,0 +1,63 @@
+"""
+Benchmark of [ingest_structs](../blob_types/shared.html), which fills a shared array by a process pool.
+
+It ingests the same structs with an increasing number of processes and prints the throughput per process count.
+
+    python benchmarks/shared_ingest.py [row_count]
+"""
+
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy
+
+sys.path.insert(1, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from blob_types import Blob, BlobArray, SharedBlobHandle, ingest_structs
+
+
+class Particle(Blob):
+    dtype, subtypes = Blob.create_plain_dtype(
+        ('global_index', numpy.int32),
+        ('pos_x', numpy.float32),
+        ('pos_y', numpy.float32),
+        ('pos_z', numpy.float32),
+        ('mass', numpy.float32)
+    )
+
+
+class Particles(BlobArray):
+    child_type = Particle
+    layout = BlobArray.SOA_LAYOUT
+
+
+def create_structs(row_count):
+    return [{'global_index': -1, 'pos': {'x': index, 'y': 0, 'z': 0}, 'mass': 1} for index in xrange(row_count)]
+
+
+def main(row_count=1000000):
+    structs = create_structs(row_count)
+
+    processes = 1
+    while processes <= multiprocessing.cpu_count():
+        pool = multiprocessing.Pool(processes)
+        try:
+            with SharedBlobHandle.create(Particles, {'capacity': row_count}) as handle:
+                start = time.time()
+                particles = ingest_structs(handle, structs, processes=processes, pool=pool)
+                duration = time.time() - start
+
+        finally:
+            pool.close()
+            pool.join()
+
+        assert particles.count == row_count
+        print '%2d processes %8.3fs %12.0f rows/s' % (processes, duration, row_count / duration)
+
+        processes *= 2
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
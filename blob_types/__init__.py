@@ -1,8 +1,19 @@
 """
-The [blob_types](https://github.com/abbgrade/blob_types) package is structured into three modules.
+The [blob_types](https://github.com/abbgrade/blob_types) package is structured into these modules.
 
 - [Types](./types.html) contains abstract classes which help to build serializable data structures.
 - [Interface](./interface.html) contains classes which generate c structs and functions for access to blob_types based data structures.
+- [Layout](./layout.html) computes the aligned memory layout of plain types and their OpenCL vector members.
+- [Generate](./generate.html) contains a command line interface, which writes the generated code as build artifacts.
+- [Program](./program.html) contains helpers which build OpenCL programs and cache their binaries.
+- [Changes](./changes.html) tracks the modified byte ranges of blobs for partial uploads and writes and batches field writes.
+- [Hashing](./hashing.html) computes content hashes of blobs and vectorized hashes of array items.
+- [Storage](./storage.html) saves BlobArrays column-wise with transforms and compressed chunks.
+- [Transfer](./transfer.html) uploads blobs to OpenCL devices with non-blocking, double buffered copies.
+- [Patch](./patch.html) creates and applies binary patches between two versions of an object.
+- [Snapshots](./snapshots.html) retains versions of a blob, which share their unchanged pages.
+- [Validation](./validation.html) checks whole blobs and stores of blobs vectorized and reports the invalid values.
+- [Shared](./shared.html) allocates blobs in shared memory, which the workers of a process pool attach without copies.
 - [Utils](./utils.html) contains helper functions.
 """
 
@@ -16,5 +27,13 @@ import types
 
 from utils import flat_struct, get_blob_index
 from types import Blob, BlobArray, BlobLinkedListHost, BlobLinkedList, BlobEnum, \
-    process_dtype_params, validate_dtype_params
+    process_dtype_params, validate_dtype_params, float2, float3, float4, int2, int4
 from interface import BlobLib, FileLib, Lib as Lib
+from program import ProgramBinaryCache, build_program
+from changes import DirtyRanges, BlobBatch, write_dirty
+from transfer import BlobTransfer
+from storage import save_columns, load_columns, read_columns, save_blob, load_blob
+from shared import SharedBlobHandle, ingest_structs
+from validation import validate_blobs, from_validated_blob, trusted
+from patch import create_patch, apply_patch
+from snapshots import BlobSnapshots
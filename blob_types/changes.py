@@ -0,0 +1,162 @@
+"""
+... is a submodule of [blob_types](__init__.html).
+It contains the tracking of modified byte ranges of blobs, so only the changed regions are uploaded or written.
+
+The tracking is opt-in by *Blob.track_changes*, the nested objects share the DirtyRanges of the root object.
+Field assignments, array items and column views are marked automatically,
+other writes into the blob (e.g. views of vector fields) can be marked by *Blob.mark_dirty* or *Blob.mark_view_dirty*.
+
+    world.track_changes()
+    world.particles[3].mass = 2.0
+    write_dirty(file_handle, world)  # writes only the changed bytes into a raw dump of the blob
+
+A BlobBatch collects the field writes of a Blob or BlobArray and applies them, when its context exits.
+The writes of an array are applied as one assignment per column and each field is marked once per batch.
+
+    with particles.batch() as batch:
+        for index in moving:
+            batch[index].mass = 2.0
+        batch.set('pos_x', indices, values)  # vectorized writes
+"""
+
+import bisect
+
+import numpy
+
+from utils import get_blob_bytes
+
+
+class DirtyRanges(object):
+    """A sorted list of disjoint [start, end) byte ranges.
+
+    Ranges, which are closer than gap bytes, are coalesced, because a few large copies are faster than many small ones.
+    """
+
+    DEFAULT_GAP = 64
+
+    def __init__(self, gap=DEFAULT_GAP):
+        self.gap = gap
+        self.starts = []
+        self.ends = []
+
+    def add(self, start, end):
+        """Marks the bytes from start to end (exclusive) as modified."""
+
+        if end <= start:
+            return
+
+        # the ranges, which overlap or are closer than gap, are replaced by one range
+        first = bisect.bisect_left(self.ends, start - self.gap)
+        last = bisect.bisect_right(self.starts, end + self.gap)
+
+        if first < last:
+            start = min(start, self.starts[first])
+            end = max(end, self.ends[last - 1])
+
+        self.starts[first:last] = [start]
+        self.ends[first:last] = [end]
+
+    def ranges(self):
+        """Returns a list of the (start, end) ranges."""
+
+        return zip(self.starts, self.ends)
+
+    def get_nbytes(self):
+        """Returns the number of bytes in all ranges."""
+
+        return sum([end - start for start, end in self.ranges()])
+
+    def clear(self):
+        self.starts = []
+        self.ends = []
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __iter__(self):
+        return iter(self.ranges())
+
+
+def get_view_range(base_bytes, view):
+    """Returns the (start, end) range of a numpy.ndarray view relative to the bytes of a blob."""
+
+    base_low, base_high = numpy.byte_bounds(base_bytes)
+    low, high = numpy.byte_bounds(view)
+
+    assert base_low <= low and high <= base_high, 'the view is not part of the blob'
+    return low - base_low, high - base_low
+
+
+def write_dirty(file_handle, blob_object, offset=0, clear=True):
+    """Writes the modified ranges of a tracked object into a file, which contains the blob at offset.
+
+    Returns the number of written bytes.
+    """
+
+    blob_bytes = get_blob_bytes(blob_object.blob)
+
+    nbytes = 0
+    for start, end in blob_object.dirty_ranges():
+        file_handle.seek(offset + start)
+        file_handle.write(blob_bytes[start:end].tostring())
+        nbytes += end - start
+
+    if clear:
+        blob_object.clear_dirty()
+
+    return nbytes
+
+
+class BlobBatch(object):
+    """Collects field writes of an object, which are applied at once when the context exits without an error.
+
+    The fields of a Blob are set as attributes of the batch, the fields of the items of a BlobArray
+    as attributes of batch[index].
+    The last write to a field (of an item) wins.
+    """
+
+    def __init__(self, blob_object, fields):
+        object.__setattr__(self, '_object', blob_object)
+        object.__setattr__(self, '_fields', fields)
+        object.__setattr__(self, '_writes', {})  # map of the field names to the lists of indices and values
+
+    def set(self, name, indices, values):
+        """Collects the write of values into the field name of the items at indices (None for the fields of a Blob)."""
+
+        if name not in self._fields:
+            raise AttributeError('%s has no field %s' % (type(self._object).__name__, name))
+
+        index_list, value_list = self._writes.setdefault(name, ([], []))
+        index_list.append(indices)
+        value_list.append(values)
+
+    def apply(self):
+        """Writes the collected values into the blob and clears the batch."""
+
+        writes = self._writes
+        object.__setattr__(self, '_writes', {})
+        self._object.apply_batch(writes)
+
+    def __getitem__(self, index):
+        return BlobBatchItem(self, index)
+
+    def __setattr__(self, name, value):
+        self.set(name, None, value)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.apply()
+
+
+class BlobBatchItem(object):
+    """Collects the field writes of an item of a BlobArray into a BlobBatch."""
+
+    def __init__(self, batch, index):
+        object.__setattr__(self, '_batch', batch)
+        object.__setattr__(self, '_index', index)
+
+    def __setattr__(self, name, value):
+        self._batch.set(name, self._index, value)
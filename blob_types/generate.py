@@ -0,0 +1,198 @@
+"""
+... is a submodule of [blob_types](__init__.html).
+It contains a command line interface, which writes the generated c99 code of blob types as build artifacts.
+
+    python -m blob_types.generate --root opencl --path blobs/world my_package.schema:World
+
+writes *opencl/include/blobs/world.h* and *opencl/src/blobs/world.cl* like a [FileLib](./interface.html) expects them.
+A file is regenerated only, if the schema fingerprint of the blob types or the generator changed.
+With *--check* nothing is written and the exit code is 1, if a file is outdated.
+"""
+
+import argparse
+import hashlib
+import importlib
+import os
+import sys
+
+from types import Blob
+from interface import BlobLib, FileLib
+import utils
+
+FINGERPRINT_PREFIX = '/* blob_types schema fingerprint: '
+FINGERPRINT_SUFFIX = ' */'
+
+GENERATOR_SOURCES = ('interface.py', 'layout.py', 'types.py', 'utils.py')  # the modules, which shape the code
+
+ADDRESS_SPACE_QUALIFIERS = {
+    'private': '__private',
+    'constant': '__constant',
+    'global': '__global',
+}
+
+
+def load_blob_types(specs):
+    """Imports blob types by specs like *package.module:TypeName* or *package.module* for all types of a module."""
+
+    blob_types = []
+    for spec in specs:
+        module_name, _, type_names = spec.partition(':')
+        module = importlib.import_module(module_name)
+
+        if type_names:
+            for type_name in type_names.split(','):
+                blob_type = getattr(module, type_name)
+                if not (isinstance(blob_type, type) and issubclass(blob_type, Blob)):
+                    raise TypeError('%s.%s is no subclass of Blob' % (module_name, type_name))
+
+                blob_types.append(blob_type)
+
+        else:
+            for name in sorted(dir(module)):
+                blob_type = getattr(module, name)
+                if isinstance(blob_type, type) and issubclass(blob_type, Blob) and \
+                        blob_type.__module__ == module.__name__:
+                    blob_types.append(blob_type)
+
+    return blob_types
+
+
+def get_generator_fingerprint():
+    """Returns a hash of the sources of the generator, so a changed generator outdates the generated files."""
+
+    fingerprint = hashlib.sha1()
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for name in GENERATOR_SOURCES:
+        with open(os.path.join(directory, name), 'rb') as file_handle:
+            fingerprint.update(file_handle.read())
+
+    return fingerprint.hexdigest()
+
+
+def get_fingerprint(blob_types, address_space_qualifiers):
+    """Returns a hash of the schemas, the generator and of all options, which change the generated code."""
+
+    fingerprint = hashlib.sha1()
+    fingerprint.update(repr((
+        [blob_type.get_schema_fingerprint() for blob_type in blob_types],
+        sorted(address_space_qualifiers),
+        utils.implode_float_n,
+        get_generator_fingerprint()
+    )))
+    return fingerprint.hexdigest()
+
+
+def read_fingerprint(path):
+    """Returns the fingerprint of a generated file or None."""
+
+    if not os.path.exists(path):
+        return None
+
+    with open(path) as file_handle:
+        line = file_handle.readline().rstrip('\n')
+
+    if line.startswith(FINGERPRINT_PREFIX) and line.endswith(FINGERPRINT_SUFFIX):
+        return line[len(FINGERPRINT_PREFIX):-len(FINGERPRINT_SUFFIX)]
+
+
+def write_code(path, fingerprint, code):
+    directory = os.path.dirname(path)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    with open(path, 'w') as file_handle:
+        file_handle.write(FINGERPRINT_PREFIX + fingerprint + FINGERPRINT_SUFFIX + '\n')
+        file_handle.write(code)
+        file_handle.write('\n')
+
+
+def generate(blob_types, root, path, address_space_qualifiers=('__global',), check=False, force=False):
+    """Writes the header and source file of the blob types, if their fingerprint changed.
+
+    Returns a list of (file path, state), whereby state is 'unchanged', 'outdated' or 'generated'.
+    """
+
+    file_lib = FileLib(root=root, path=path)
+    fingerprint = get_fingerprint(blob_types, address_space_qualifiers)
+
+    outdated_paths = []
+    results = []
+    for file_path in [file_lib.header_code_path, file_lib.source_code_path]:
+        if force or read_fingerprint(file_path) != fingerprint:
+            outdated_paths.append(file_path)
+
+        else:
+            results.append((file_path, 'unchanged'))
+
+    if check or not outdated_paths:
+        results.extend([(file_path, 'outdated') for file_path in outdated_paths])
+        return results
+
+    # generate the code only if it is required
+    required_blob_types = dict([(qualifier, blob_types) for qualifier in address_space_qualifiers])
+    lib = BlobLib(
+        required_private_blob_types=required_blob_types.get('__private'),
+        required_constant_blob_types=required_blob_types.get('__constant'),
+        required_global_blob_types=required_blob_types.get('__global'),
+    )
+
+    for file_path in outdated_paths:
+        if file_path == file_lib.header_code_path:
+            code = lib.get_header_code()
+
+        else:
+            code = lib.get_source_code()
+
+        write_code(file_path, fingerprint, code)
+        results.append((file_path, 'generated'))
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m blob_types.generate', description='Generates the c99 code of blob types.')
+    parser.add_argument('types', nargs='+', help='blob types as package.module:TypeName or package.module')
+    parser.add_argument('--root', required=True, help='root directory, which contains include and src')
+    parser.add_argument('--path', required=True, help='path of the lib below include and src, like blobs/world')
+    parser.add_argument('--address-space', dest='address_spaces', action='append',
+                        choices=sorted(ADDRESS_SPACE_QUALIFIERS.keys()),
+                        help='address space of the generated types (default: global)')
+    parser.add_argument('--check', action='store_true', help='fail if a file is outdated instead of writing it')
+    parser.add_argument('--force', action='store_true', help='regenerate all files')
+    arguments = parser.parse_args(argv)
+
+    # import modules relative to the working directory like python -m does
+    if os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+
+    try:
+        blob_types = load_blob_types(arguments.types)
+
+    except (ImportError, AttributeError, TypeError) as ex:
+        sys.stderr.write('failed to load blob types: %s\n' % ex)
+        return 2
+
+    address_space_qualifiers = [
+        ADDRESS_SPACE_QUALIFIERS[address_space] for address_space in (arguments.address_spaces or ['global'])
+    ]
+
+    results = generate(
+        blob_types,
+        root=arguments.root,
+        path=arguments.path.split('/'),
+        address_space_qualifiers=address_space_qualifiers,
+        check=arguments.check,
+        force=arguments.force
+    )
+
+    for file_path, state in results:
+        sys.stdout.write('%s: %s\n' % (file_path, state))
+
+    if arguments.check and filter(lambda result: result[1] == 'outdated', results):
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
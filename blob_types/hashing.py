@@ -0,0 +1,86 @@
+"""
+... is a submodule of [blob_types](__init__.html).
+It contains content hashes of blobs, which detect changes and key content-addressed caches without full comparisons.
+
+The hash of a blob is computed over its buffer without a copy.
+The bytes of padding fields (see Blob.PADDING_FIELD_SUFFIX) and the gaps of aligned types can be ignored,
+which requires a copy of the remaining bytes.
+The items of a BlobArray are hashed vectorized to one 64 bit hash per row.
+"""
+
+import hashlib
+
+import numpy
+
+from utils import get_blob_bytes
+
+ROW_HASH_SEED = numpy.uint64(14695981039346656037)  # the offset basis of the 64 bit FNV hash
+ROW_HASH_PRIME = numpy.uint64(1099511628211)
+ROW_HASH_SHIFT = numpy.uint64(29)
+
+_byte_masks = {}  # map of known byte masks of dtypes
+
+
+def get_byte_mask(dtype, padding_suffix=None):
+    """Returns a numpy.bool_ array, which is True for each byte of a dtype that belongs to a (not padding) field."""
+
+    key = (dtype, padding_suffix)
+    if key not in _byte_masks:
+        mask = numpy.zeros(dtype.itemsize, numpy.bool_)
+
+        for name in dtype.names:
+            if padding_suffix and name.endswith(padding_suffix):
+                continue
+
+            field_dtype, field_offset = dtype.fields[name][:2]
+            mask[field_offset:field_offset + field_dtype.itemsize] = True
+
+        _byte_masks[key] = mask
+
+    return _byte_masks[key]
+
+
+def hash_blob(blob, padding_suffix=None, salt=None):
+    """Returns the sha1 hex digest of the bytes of a blob, the padding is ignored if a padding_suffix is given."""
+
+    blob_bytes = get_blob_bytes(blob)
+
+    if padding_suffix:
+        mask = get_byte_mask(blob.dtype, padding_suffix)
+        if not mask.all():
+            blob_bytes = blob_bytes[mask]
+
+    content_hash = hashlib.sha1()
+    if salt is not None:
+        content_hash.update(salt)
+
+    # the buffer of the contiguous numpy.ndarray is hashed without a copy
+    content_hash.update(blob_bytes)
+    return content_hash.hexdigest()
+
+
+def hash_rows(rows):
+    """Returns one numpy.uint64 hash per row of a 2-dimensional numpy.uint8 array.
+
+    The rows are hashed as 64 bit words by a FNV like function, so there is one vectorized operation per word.
+    """
+
+    row_count, row_size = rows.shape
+    word_count = (row_size + 7) // 8
+
+    if row_size % 8 or not rows.flags.c_contiguous:
+        padded_rows = numpy.zeros((row_count, word_count * 8), numpy.uint8)
+        padded_rows[:, :row_size] = rows
+        rows = padded_rows
+
+    words = rows.view(numpy.uint64)
+
+    hashes = numpy.empty(row_count, numpy.uint64)
+    hashes.fill(ROW_HASH_SEED)
+
+    for index in xrange(word_count):
+        hashes ^= words[:, index]
+        hashes *= ROW_HASH_PRIME
+        hashes ^= hashes >> ROW_HASH_SHIFT
+
+    return hashes
@@ -4,17 +4,18 @@ It contains classes which generate c structs and functions for access to blob_ty
 """
 
 import numpy
-import pyopencl
-from pyopencl.compyte.dtypes import dtype_to_ctype, NAME_TO_DTYPE, DTYPE_TO_NAME
 import os
 
 from types import Blob, BlobArray, BlobEnum
-from utils import camel_case_to_underscore, implode_floatn, implode_float_n
+from utils import camel_case_to_underscore, memoize_method, dtype_to_ctype
+import layout
 
 class BlobInterface(object):
     def __init__(self, blob_type):
         assert issubclass(blob_type, Blob)
         self.blob_type = blob_type
+        self.cname = camel_case_to_underscore(blob_type.__name__)
+        self._memo = {}
 
     def get_functions(self, address_space_qualifier):
         raise NotImplementedError('abstract get_cfunctions %s' % type(self))
@@ -22,10 +23,11 @@ class BlobInterface(object):
     def get_address_space_suffix(self, address_space_qualifier, force_address_space=True):
         return address_space_qualifier[2]
 
+    @memoize_method
     def get_name(self, address_space_qualifier, clean=False, force_address_space=False):
         """Returns the type name in c99-style including a address space qualifier (local, constant, global, private)."""
 
-        cname = camel_case_to_underscore(self.blob_type.__name__)
+        cname = self.cname
 
         if clean:
             return cname
@@ -34,20 +36,24 @@ class BlobInterface(object):
             cname = '%s_%st' % (cname, self.get_address_space_suffix(address_space_qualifier, force_address_space))
             return cname
 
+    @memoize_method
     def get_spaced_name(self, address_space_qualifier):
 
         return '%s %s' % (address_space_qualifier, self.get_name(address_space_qualifier))
 
+    @memoize_method
     def get_sizeof_name(self, address_space_qualifier, force_address_space=False):
         """Returns the c99 function name of the sizeof function."""
 
         return 'sizeof_%s' % self.get_name(address_space_qualifier, force_address_space=force_address_space)
 
+    @memoize_method
     def get_deserialize_name(self, address_space_qualifier):
         """Returns the function name of the c99 deserializer function."""
 
         return 'deserialize_%s' % self.get_name(address_space_qualifier)
 
+    @memoize_method
     def get_init_name(self, address_space_qualifier):
         """Returns the c99 init function name."""
 
@@ -141,6 +147,8 @@ typedef struct _%(name)s
                 # determine the size of the scalar type
                 cname = dtype_to_ctype(subtype)
                 sizeof_call = 'sizeof(%s)' % cname
+                if numpy.dtype(subtype).shape:
+                    sizeof_call = '%s * %d' % (sizeof_call, numpy.dtype(subtype).shape[0])
             else:
                 # determine the size of the complex type
                 assert issubclass(subtype, Blob), 'unexpected type %s %s' % (type(subtype), subtype)
@@ -150,6 +158,9 @@ typedef struct _%(name)s
                 )
 
             # save which arguments and lines are required to determine the total size
+            alignment = Blob.get_subtype_alignment(subtype)
+            if alignment > 1:
+                lines.append('size = %s;' % layout.get_c_round_up('size', alignment))
             lines.append('size += %s;' % sizeof_call)
 
         lines.insert(0, '%s(%s);' % (self.get_deserialize_name(address_space_qualifier), ', '.join(arguments)))
@@ -165,12 +176,13 @@ typedef struct _%(name)s
 {
     unsigned long size = 0;
 %(lines)s
-    return size;
+    return %(size)s;
 }
 ''' % {
     'definition': definition.strip(),
     'cname': self.get_name(address_space_qualifier),
-    'lines': '\n'.join(['\t' + line for line in lines])
+    'lines': '\n'.join(['\t' + line for line in lines]),
+    'size': layout.get_c_round_up('size', self.blob_type.get_alignment())
 }
         return definition.strip() + ';', declaration.strip()
 
@@ -210,6 +222,8 @@ typedef struct _%(name)s
             if numpy.issctype(subtype):
                 cname = "%s %s" % (address_space_qualifier, dtype_to_ctype(subtype))
                 sizeof_call = 'sizeof(%s)' % cname
+                if numpy.dtype(subtype).shape:
+                    sizeof_call = '%s * %d' % (sizeof_call, numpy.dtype(subtype).shape[0])
 
             else:
                 assert issubclass(subtype, Blob), 'unexpected type %s %s' % (type(subtype), subtype)
@@ -223,8 +237,9 @@ typedef struct _%(name)s
                     field_reference
                 )
 
-            # determine offset of component
-            lines.append('%s = %s + %s;' % (field_offset, previous_field_offset, previous_field_space))
+            # determine offset of component, aligned subtypes are preceded by padding
+            lines.append('%s = %s;' % (field_offset, layout.get_c_round_up(
+                '%s + %s' % (previous_field_offset, previous_field_space), Blob.get_subtype_alignment(subtype))))
 
             # set and cast component reference
             if not numpy.issctype(subtype) and not subtype.is_plain():
@@ -259,6 +274,96 @@ typedef struct _%(name)s
 
         return definition.strip() + ';', declaration
 
+    def get_fixed_suffix(self, dtype_params):
+        """Returns a name suffix, which identifies concrete dtype_params."""
+
+        return 'fixed_%s' % '_'.join([str(int(dtype_params[key])) for key in sorted(dtype_params.keys())])
+
+    def get_fixed_deserialize_name(self, address_space_qualifier, dtype_params):
+        """Returns the function name of the c99 deserializer function for concrete dtype_params."""
+
+        return '%s_%s' % (self.get_deserialize_name(address_space_qualifier), self.get_fixed_suffix(dtype_params))
+
+    def get_fixed_deserialize(self, address_space_qualifier, dtype_params):
+        """Returns the c99 offset constants and the deserializer function for concrete dtype_params.
+
+        The offsets are computed during the code generation, so the deserializer requires no sizeof calls.
+        If a blob has other dtype params, it falls back to the generic deserializer.
+        Returns the constants, the function definition and declaration and the nested (type, dtype_params),
+        which require a specialized deserializer too.
+        """
+
+        dtype = self.blob_type.create_dtype(dtype_params=dtype_params)
+        prefix = ('%s_%s' % (self.get_name(address_space_qualifier), self.get_fixed_suffix(dtype_params))).upper()
+        function_name = self.get_fixed_deserialize_name(address_space_qualifier, dtype_params)
+
+        constants = ['/* offsets of %s */' % function_name]
+        lines = []
+        nested = []
+
+        # check the dtype params
+        for key, field in sorted(self.blob_type.get_dtype_param_fields().items()):
+            constant = '%s_%s_PARAM_OFFSET' % (prefix, key.upper())
+            constants.append('#define %s %d' % (constant, dtype.fields[field][1]))
+            lines.append('if(*((%s int*)(blob + %s)) != %d)' % (address_space_qualifier, constant, dtype_params[key]))
+            lines.append('{')
+            lines.append('\t%s(blob, self);' % self.get_deserialize_name(address_space_qualifier))
+            lines.append('\treturn;')
+            lines.append('}')
+
+        # iterate over all subtypes/components
+        offset = 0
+        for field, subtype in self.blob_type.subtypes:
+            subtype_params = self.blob_type.explode_dtype_params(field=field, dtype_params=dtype_params)
+            offset = layout.round_up(offset, Blob.get_subtype_alignment(subtype))
+
+            if numpy.issctype(subtype):
+                size = numpy.dtype(subtype).itemsize
+
+            elif subtype.is_plain():
+                size = numpy.dtype(subtype.dtype).itemsize
+
+            else:
+                size = subtype.sizeof_dtype(dtype_params=subtype_params)
+
+            if not field.endswith(Blob.PADDING_FIELD_SUFFIX):
+                constant = '%s_%s_OFFSET' % (prefix, field.upper())
+                constants.append('#define %s %d' % (constant, offset))
+                field_reference = 'blob + %s' % constant
+
+                if numpy.issctype(subtype):
+                    lines.append('self->%s = (%s %s*)(%s);' % (
+                        field, address_space_qualifier, dtype_to_ctype(subtype), field_reference))
+
+                elif subtype.is_plain():
+                    lines.append('self->%s = (%s %s*)(%s);' % (
+                        field, address_space_qualifier, BlobLib.get_interface(subtype).get_name(address_space_qualifier),
+                        field_reference))
+
+                elif issubclass(subtype, BlobArray):
+                    # the offsets of an array are constant already
+                    lines.append('%s(%s, &self->%s);' % (
+                        BlobLib.get_interface(subtype).get_deserialize_name(address_space_qualifier),
+                        field_reference, field))
+
+                else:
+                    lines.append('%s(%s, &self->%s);' % (
+                        BlobLib.get_interface(subtype).get_fixed_deserialize_name(
+                            address_space_qualifier, subtype_params),
+                        field_reference, field))
+                    nested.append((subtype, subtype_params))
+
+            offset += size
+
+        constants.append('#define %s_SIZE %d' % (prefix, layout.round_up(offset, self.blob_type.get_alignment())))
+
+        definition = 'void %s(%s char* blob, %s* self)' % (
+            function_name, address_space_qualifier, self.get_name(address_space_qualifier))
+
+        declaration = '\n'.join([definition, '{'] + ['\t' + line for line in lines] + ['}'])
+
+        return '\n'.join(constants), (definition + ';', declaration), nested
+
 
 class BlobPlainInterface(BlobInterface):
 
@@ -288,18 +393,20 @@ class BlobPlainInterface(BlobInterface):
     def get_type(self, address_space_qualifier):
         """Returns the c99 declaration of the type."""
 
-        field_definitions = []
-        for field in self.blob_type.dtype.names:
-            if field.endswith(Blob.PADDING_FIELD_SUFFIX):
-                continue
-            field_definitions.append('\t%s %s;' % (dtype_to_ctype(self.blob_type.dtype.fields[field][0]), field))
-        field_definitions = '\n'.join(field_definitions)
+        field_definitions = '\n'.join(['\t%s %s;' % member for member in self.get_c_members()])
+
+        # the members of aligned types are aligned by the layout engine like the c compiler does
+        if self.blob_type.dtype.isalignedstruct:
+            attributes = ''
+
+        else:
+            attributes = '__attribute__((__packed__)) '
 
         definition = \
 '''
 /* plain type %(cname)s */
 
-typedef struct __attribute__((__packed__)) %(cname)s
+typedef struct %(attributes)s%(cname)s
 {
 %(fields)s
 } %(cname)s;
@@ -307,11 +414,48 @@ typedef struct __attribute__((__packed__)) %(cname)s
 #define %(define)s
 ''' % {
     'fields': field_definitions,
+    'attributes': attributes,
     'cname': self.get_name(address_space_qualifier),
     'define': self.get_name(address_space_qualifier).upper()
 }
         return definition.strip()
 
+    @memoize_method
+    def get_c_members(self):
+        """Returns the c99 (type, name) of the struct members, vector fields are arrays in packed types."""
+
+        dtype = self.blob_type.dtype
+        if dtype.isalignedstruct:
+            return layout.get_c_members(dtype)
+
+        members = []
+        for field in dtype.names:
+            if field.endswith(Blob.PADDING_FIELD_SUFFIX):
+                continue
+
+            field_dtype = dtype.fields[field][0]
+            if field_dtype.shape:
+                members.append((dtype_to_ctype(field_dtype), '%s[%d]' % (field, numpy.prod(field_dtype.shape))))
+
+            else:
+                members.append((dtype_to_ctype(field_dtype), field))
+
+        return members
+
+    def get_member_components(self, field):
+        """Returns the c99 expressions of the components of a field, e.g. pos[0], pos[1] and pos[2] for a float3."""
+
+        dtype = self.blob_type.dtype
+        if dtype.isalignedstruct:
+            return layout.get_c_member_components(dtype, field)
+
+        field_dtype = dtype.fields[field][0]
+        if field_dtype.shape:
+            return ['%s[%d]' % (field, index) for index in xrange(numpy.prod(field_dtype.shape))]
+
+        return [field]
+
+    @memoize_method
     def get_sizeof_name(self, address_space_qualifier):
         """Returns the c99 function name of the accessor function."""
 
@@ -337,6 +481,7 @@ typedef struct __attribute__((__packed__)) %(cname)s
 }
         return definition.strip() + ';', declaration.strip()
 
+    @memoize_method
     def get_copy_name(self, address_space_qualifier):
         """Returns the c99 function name of the accessor function."""
 
@@ -353,8 +498,18 @@ typedef struct __attribute__((__packed__)) %(cname)s
         lines = [
             '\tif(destination == 0 || source == 0) return;'
         ]
-        for field in self.blob_type.dtype.names:
-            lines.append('\tdestination->%(field)s = source->%(field)s;' % {'field': field})
+        for ctype, name in self.get_c_members():
+            field, _, length = name.partition('[')
+
+            # arrays are copied per element
+            if length:
+                fields = ['%s[%d]' % (field, index) for index in xrange(int(length[:-1]))]
+
+            else:
+                fields = [field]
+
+            for field in fields:
+                lines.append('\tdestination->%(field)s = source->%(field)s;' % {'field': field})
 
         declaration = \
 '''
@@ -367,6 +522,15 @@ typedef struct __attribute__((__packed__)) %(cname)s
 }
         return definition + ';', declaration
 
+    def get_member_address(self, field, address_space_qualifier):
+        """Returns the c99 address of a field, which may be a vector component in aligned types."""
+
+        if self.blob_type.dtype.isalignedstruct:
+            return layout.get_c_member_address(self.blob_type.dtype, field, 'self', address_space_qualifier)
+
+        return '&self->%s' % field
+
+    @memoize_method
     def get_accessor_name(self, field, address_space_qualifier):
         """Returns the c99 function name of the accessor function."""
 
@@ -397,11 +561,11 @@ typedef struct __attribute__((__packed__)) %(cname)s
 '''
 %(definition)s
 {
-    return (%(child_name)s *)&self->%(field)s;
+    return (%(child_name)s *)%(field_address)s;
 };''' % {
     'definition': definition,
     'child_name': child_name,
-    'field': '_'.join(field_chain)
+    'field_address': self.get_member_address('_'.join(field_chain), address_space_qualifier)
 }
         return definition + ';', declaration
 
@@ -445,16 +609,43 @@ class BlobArrayInterface(BlobComplexInterface):
     FIRST_ITEM_FIELD = 'first'
 
     def get_functions(self, address_space_qualifier):
-        functions = [
-            self.get_sizeof(address_space_qualifier),
-            self.get_deserialize(address_space_qualifier),
-            self.get_item(address_space_qualifier)
-        ]
+        if self.blob_type.is_soa():
+            functions = [
+                self.get_sizeof(address_space_qualifier),
+                self.get_soa_deserialize(address_space_qualifier),
+                self.get_soa_item(address_space_qualifier),
+                self.get_soa_set_item(address_space_qualifier),
+                self.get_range(address_space_qualifier)
+            ]
+
+        else:
+            functions = [
+                self.get_sizeof(address_space_qualifier),
+                self.get_deserialize(address_space_qualifier),
+                self.get_item(address_space_qualifier),
+                self.get_item(address_space_qualifier, unchecked=True),
+                self.get_range(address_space_qualifier)
+            ]
         return zip(*functions)
 
+    def get_soa_columns(self):
+        """Returns the field, dtype and offset per item of all columns of an array with structure of arrays layout."""
+
+        child_dtype = self.blob_type.child_type.dtype
+
+        columns = []
+        for field in child_dtype.names:
+            field_dtype, field_offset = child_dtype.fields[field][:2]
+            columns.append((field, field_dtype, field_offset))
+
+        return columns
+
     def get_type(self, address_space_qualifier):
         """Returns the c99 struct declaration."""
 
+        if self.blob_type.is_soa():
+            return self.get_soa_type(address_space_qualifier)
+
         field_definitions = []
         for field, subdtype in self.blob_type.dtype_static_components:
             field_definitions.append('\t%s %s* %s;' % (address_space_qualifier, dtype_to_ctype(subdtype), field))
@@ -489,17 +680,16 @@ typedef struct __attribute__((__packed__)) _%(name)s
 {
     int capacity = *((%(address_space_qualifier)s int*) blob);
     unsigned long static_fields_space = %(static_fields_space)s;
-    unsigned long sizeof_child = %(child_sizeof_cname)s(blob + static_fields_space);
+    unsigned long sizeof_child = %(child_sizeof)s;
     unsigned long items_space = capacity * sizeof_child;
     return static_fields_space + items_space;
 };
 ''' % {
     'definition': definition.strip(),
-    'static_fields_space': BlobArray.STATIC_FIELDS_BYTES,
+    'static_fields_space': self.blob_type.get_items_offset(),
     'capacity_field': BlobArray.CAPACITY_FIELD,
     'first_item_field': self.FIRST_ITEM_FIELD,
-    'child_sizeof_cname': BlobLib.get_interface(self.blob_type.child_type).get_sizeof_name(
-        address_space_qualifier),
+    'child_sizeof': self.get_child_sizeof(address_space_qualifier, 'blob + static_fields_space'),
     'child_cname': BlobLib.get_interface(self.blob_type.child_type).get_name(address_space_qualifier),
     'address_space_qualifier': address_space_qualifier,
 }
@@ -519,10 +709,11 @@ typedef struct __attribute__((__packed__)) _%(name)s
 {
     self->%(capacity_field)s = (%(address_space_qualifier)s int*)(blob);
     self->%(count_field)s = (%(address_space_qualifier)s int*)(blob + %(static_fields_space)s / 2);
-    self->%(first_item_field)s = blob + %(static_fields_space)s;
+    self->%(first_item_field)s = blob + %(items_offset)s;
 };''' % {
     'definition': definition,
     'static_fields_space': BlobArray.STATIC_FIELDS_BYTES,
+    'items_offset': self.blob_type.get_items_offset(),
     'capacity_field': BlobArray.CAPACITY_FIELD,
     'count_field': BlobArray.COUNT_FIELD_NAME,
     'first_item_field': self.FIRST_ITEM_FIELD,
@@ -530,101 +721,384 @@ typedef struct __attribute__((__packed__)) _%(name)s
 }
         return definition + ';', declaration
 
+    def get_soa_type(self, address_space_qualifier):
+        """Returns the c99 struct declaration, which contains a pointer per column."""
+
+        field_definitions = []
+        for field, subdtype in self.blob_type.dtype_static_components:
+            field_definitions.append('\t%s %s* %s;' % (address_space_qualifier, dtype_to_ctype(subdtype), field))
+
+        for field, field_dtype, field_offset in self.get_soa_columns():
+            if field.endswith(Blob.PADDING_FIELD_SUFFIX):
+                continue
+
+            field_definitions.append('\t%s %s* %s;' % (address_space_qualifier, dtype_to_ctype(field_dtype), field))
+
+        return \
+'''
+/* array type %(name)s (structure of arrays) */
+
+typedef struct _%(name)s
+{
+%(fields)s
+} %(name)s;''' % {
+    'fields': '\n'.join(field_definitions),
+    'name': self.get_name(address_space_qualifier)
+}
+
+    def get_soa_deserialize(self, address_space_qualifier):
+        """Returns the c99 deserializer function, which sets the column pointers."""
+
+        definition = 'void %(function_name)s(%(address_space_qualifier)s char* blob, %(cname)s* self)' % {
+            'function_name': self.get_deserialize_name(address_space_qualifier),
+            'cname': self.get_name(address_space_qualifier),
+            'address_space_qualifier': address_space_qualifier
+        }
+
+        lines = []
+        for field, field_dtype, field_offset in self.get_soa_columns():
+            if field.endswith(Blob.PADDING_FIELD_SUFFIX):
+                continue
+
+            lines.append('\tself->%(field)s = (%(address_space_qualifier)s %(ctype)s*)(items + capacity * %(offset)d);' % {
+                'field': field,
+                'ctype': dtype_to_ctype(field_dtype),
+                'offset': field_offset,
+                'address_space_qualifier': address_space_qualifier,
+            })
+
+        declaration = \
+'''
+%(definition)s
+{
+    self->%(capacity_field)s = (%(address_space_qualifier)s int*)(blob);
+    self->%(count_field)s = (%(address_space_qualifier)s int*)(blob + %(static_fields_space)s / 2);
+
+    unsigned long capacity = *self->%(capacity_field)s;
+    %(address_space_qualifier)s char* items = blob + %(items_offset)s;
+%(lines)s
+};''' % {
+    'definition': definition,
+    'static_fields_space': BlobArray.STATIC_FIELDS_BYTES,
+    'items_offset': self.blob_type.get_items_offset(),
+    'capacity_field': BlobArray.CAPACITY_FIELD,
+    'count_field': BlobArray.COUNT_FIELD_NAME,
+    'address_space_qualifier': address_space_qualifier,
+    'lines': '\n'.join(lines)
+}
+        return definition + ';', declaration
+
+    @memoize_method
+    def get_set_item_name(self, address_space_qualifier):
+        """Returns the function name of the c99 function, which stores an item."""
+
+        return 'set_%s_item' % self.get_name(address_space_qualifier)
+
+    def get_soa_item(self, address_space_qualifier):
+        """Returns the c99 function, which gathers the fields of an item from the columns."""
+
+        return self._get_soa_item_copy(
+            address_space_qualifier,
+            self.get_item_name(address_space_qualifier),
+            '\titem->%(member)s = array.%(field)s[%(index)s];'
+        )
+
+    def get_soa_set_item(self, address_space_qualifier):
+        """Returns the c99 function, which scatters the fields of an item into the columns."""
+
+        return self._get_soa_item_copy(
+            address_space_qualifier,
+            self.get_set_item_name(address_space_qualifier),
+            '\tarray.%(field)s[%(index)s] = item->%(member)s;'
+        )
+
+    def _get_soa_item_copy(self, address_space_qualifier, function_name, line_template):
+
+        definition = 'void %(function_name)s(%(cname)s array, int index, %(child_name)s * item)' % {
+            'function_name': function_name,
+            'cname': self.get_name(address_space_qualifier),
+            'child_name': BlobLib.get_interface(self.blob_type.child_type).get_name(address_space_qualifier)
+        }
+
+        child_interface = BlobLib.get_interface(self.blob_type.child_type)
+
+        lines = []
+        for field, field_dtype, field_offset in self.get_soa_columns():
+            if field.endswith(Blob.PADDING_FIELD_SUFFIX):
+                continue
+
+            # the components of a vector field are stored consecutively in the column
+            members = child_interface.get_member_components(field)
+            if field_dtype.shape:
+                indices = ['index * %d + %d' % (len(members), component) for component in xrange(len(members))]
+
+            else:
+                indices = ['index']
+
+            for member, index in zip(members, indices):
+                lines.append(line_template % {'field': field, 'member': member, 'index': index})
+
+        declaration = \
+'''
+%(definition)s
+{
+    if(index < 0 || index >= *array.capacity)
+        return;
+
+%(lines)s
+};''' % {
+    'definition': definition,
+    'lines': '\n'.join(lines)
+}
+        return definition + ';', declaration
+
+    @memoize_method
     def get_item_name(self, address_space_qualifier):
         """Returns the function name of the c99 item function."""
 
         return 'get_%s_item' % self.get_name(address_space_qualifier)
 
-    def get_item(self, address_space_qualifier):
-        """Returns the c99 deserializer function."""
+    @memoize_method
+    def get_unchecked_item_name(self, address_space_qualifier):
+        """Returns the function name of the c99 item function without bounds check."""
+
+        return 'get_%s_item_unchecked' % self.get_name(address_space_qualifier)
+
+    @memoize_method
+    def get_range_name(self, address_space_qualifier):
+        """Returns the function name of the c99 function, which splits the items across work-items."""
+
+        return 'get_%s_range' % self.get_name(address_space_qualifier)
+
+    def get_child_sizeof(self, address_space_qualifier, child_blob):
+        """Returns the c99 expression of the item size, which is a compile-time constant for plain child types."""
+
+        child_interface = BlobLib.get_interface(self.blob_type.child_type)
+
         if self.blob_type.child_type.is_plain():
-            return self.get_plain_item(address_space_qualifier)
+            return 'sizeof(%s)' % child_interface.get_name(address_space_qualifier)
 
         else:
-            return self.get_complex_item(address_space_qualifier)
+            return '%s(%s)' % (child_interface.get_sizeof_name(address_space_qualifier), child_blob)
 
-    def get_plain_item(self, address_space_qualifier):
+    def get_item(self, address_space_qualifier, unchecked=False):
+        """Returns the c99 item function, optionally without bounds check."""
+        if self.blob_type.child_type.is_plain():
+            return self.get_plain_item(address_space_qualifier, unchecked=unchecked)
+
+        else:
+            return self.get_complex_item(address_space_qualifier, unchecked=unchecked)
+
+    def get_plain_item(self, address_space_qualifier, unchecked=False):
 
         child_name = BlobLib.get_interface(self.blob_type.child_type).get_spaced_name(address_space_qualifier)
 
+        if unchecked:
+            function_name = self.get_unchecked_item_name(address_space_qualifier)
+            bounds_check = ''
+
+        else:
+            function_name = self.get_item_name(address_space_qualifier)
+            bounds_check = \
+'''
+    if(index < 0)
+        return 0;
+    if(index >= *array.capacity)
+        return 0;
+'''
+
         definition = '%(child_name)s * %(function_name)s(%(cname)s array, int index)' % {
-            'function_name': self.get_item_name(address_space_qualifier),
+            'function_name': function_name,
             'cname': self.get_name(address_space_qualifier),
             'child_name': child_name
         }
 
-        child_sizeof_name = BlobLib.get_interface(self.blob_type.child_type).get_sizeof_name(address_space_qualifier)
-
         declaration = \
 '''
 %(definition)s
-{
-    if(index < 0)
-        return 0;
-    if(index >= *array.capacity)
-        return 0;
-
-    unsigned long offset = index * %(sizeof_function)s(array.%(first_item_field)s);
+{%(bounds_check)s
+    unsigned long offset = index * %(child_sizeof)s;
     %(address_space_qualifier)s char* item_blob = array.%(first_item_field)s + offset;
     return (%(child_name)s *)item_blob;
 };''' % {
     'definition': definition,
-    'sizeof_function': child_sizeof_name,
+    'bounds_check': bounds_check,
+    'child_sizeof': self.get_child_sizeof(address_space_qualifier, 'array.%s' % self.FIRST_ITEM_FIELD),
     'first_item_field': self.FIRST_ITEM_FIELD,
     'address_space_qualifier': address_space_qualifier,
     'child_name': child_name
 }
         return definition + ';', declaration
 
-    def get_complex_item(self, address_space_qualifier):
+    def get_complex_item(self, address_space_qualifier, unchecked=False):
 
         child_name = BlobLib.get_interface(self.blob_type.child_type).get_name(address_space_qualifier)
 
+        if unchecked:
+            function_name = self.get_unchecked_item_name(address_space_qualifier)
+            bounds_check = ''
+
+        else:
+            function_name = self.get_item_name(address_space_qualifier)
+            bounds_check = \
+'''
+    if(index < 0 || index >= *array.capacity)
+        return;
+'''
+
         definition = 'void %(function_name)s(%(cname)s array, int index, %(child_name)s * item)' % {
-            'function_name': self.get_item_name(address_space_qualifier),
+            'function_name': function_name,
             'cname': self.get_name(address_space_qualifier),
             'child_name': child_name
         }
 
-        child_sizeof_name = BlobLib.get_interface(self.blob_type.child_type).get_sizeof_name(address_space_qualifier)
         child_deserialize_name = BlobLib.get_interface(self.blob_type.child_type).get_deserialize_name(
             address_space_qualifier)
 
         declaration = \
 '''
 %(definition)s
-{
-    unsigned long offset = index * %(sizeof_function)s(array.%(first_item_field)s);
+{%(bounds_check)s
+    unsigned long offset = index * %(child_sizeof)s;
     %(address_space_qualifier)s char* item_blob = array.%(first_item_field)s + offset;
     %(child_deserialize_name)s(item_blob, item);
 };''' % {
     'definition': definition,
-    'sizeof_function': child_sizeof_name,
+    'bounds_check': bounds_check,
+    'child_sizeof': self.get_child_sizeof(address_space_qualifier, 'array.%s' % self.FIRST_ITEM_FIELD),
     'first_item_field': self.FIRST_ITEM_FIELD,
     'address_space_qualifier': address_space_qualifier,
     'child_deserialize_name': child_deserialize_name
 }
         return definition + ';', declaration
 
+    def get_range(self, address_space_qualifier):
+        """Returns the c99 function, which splits the item indices in contiguous ranges per work-item.
+
+        The caller passes e.g. get_global_id(0) and get_global_size(0) and iterates from begin to end (exclusive).
+        """
+
+        definition = 'void %(function_name)s(%(cname)s array, unsigned long worker, unsigned long worker_count, ' \
+                     'int* begin, int* end)' % {
+            'function_name': self.get_range_name(address_space_qualifier),
+            'cname': self.get_name(address_space_qualifier),
+        }
+
+        declaration = \
+'''
+%(definition)s
+{
+    unsigned long capacity = *array.capacity;
+    unsigned long chunk = (capacity + worker_count - 1) / worker_count;
+    unsigned long first = worker * chunk;
+    unsigned long last = first + chunk;
+
+    if(first > capacity)
+        first = capacity;
+    if(last > capacity)
+        last = capacity;
+
+    *begin = (int)first;
+    *end = (int)last;
+};''' % {
+    'definition': definition,
+}
+        return definition + ';', declaration
+
+
+class ListBlacklist(set):
+    """A set view of a blacklist list, whose added snippets are appended to the list too."""
+
+    def __init__(self, snippets):
+        set.__init__(self, snippets)
+        self.snippets = snippets
+
+    def add(self, snippet):
+        set.add(self, snippet)
+        self.snippets.append(snippet)
+
 
 class Lib(object):
+    """A node of the code dependency graph.
+
+    A lib contributes header and source code, which is assembled together with the code of all its dependencies.
+    Shared dependencies are visited exactly once, even if they are reachable on multiple paths (diamonds).
+    """
+
+    def __init__(self, dependencies=None, type_definitions=None, function_definitions=None, function_declarations=None):
+        self.dependecies = list(dependencies) if dependencies else []
+        self.type_definitions = list(type_definitions) if type_definitions else []
+        self.function_definitions = list(function_definitions) if function_definitions else []
+        self.function_declarations = list(function_declarations) if function_declarations else []
+
+    def get_dependency_order(self, visited=None, order=None):
+        """Returns all libs of the dependency graph, dependencies first and each lib exactly once."""
+
+        if visited is None:
+            visited = set()
+
+        if order is None:
+            order = []
+
+        if self in visited:
+            return order
+
+        visited.add(self)
+
+        for dependency in self.dependecies:
+            dependency.get_dependency_order(visited=visited, order=order)
 
-    def __init__(self, dependencies=[], type_definitions=[], function_definitions=[], function_declarations=[]):
-        self.dependecies = dependencies
-        self.type_definitions = type_definitions
-        self.function_definitions = function_definitions
-        self.function_declarations = function_declarations
+        order.append(self)
+        return order
 
-    def get_header_code(self, blacklist):
-        return '\n\n'.join([dependency.get_header_code(blacklist) for dependency in self.dependecies])
+    def get_own_header_code(self, blacklist):
+        """Returns the header code of this lib without the code of its dependencies."""
 
-    def get_source_code(self, blacklist):
-        return '\n\n'.join([dependency.get_source_code(blacklist) for dependency in self.dependecies])
+        return ''
+
+    def get_own_source_code(self, blacklist):
+        """Returns the source code of this lib without the code of its dependencies."""
+
+        return ''
+
+    def get_header_code(self, blacklist=None):
+        """Returns the header code of the lib and all dependencies.
+
+        The blacklist is a set (or list) of already emitted code snippets, which are skipped.
+        The emitted snippets are added to it, so calls with the same blacklist emit each snippet once.
+        """
+
+        if blacklist is None:
+            blacklist = set()
+
+        elif not isinstance(blacklist, set):
+            blacklist = ListBlacklist(blacklist)
+
+        return '\n\n'.join(filter(None, [
+            lib.get_own_header_code(blacklist) for lib in self.get_dependency_order()
+        ]))
+
+    def get_source_code(self, blacklist=None):
+        """Returns the source code of the lib and all dependencies.
+
+        The blacklist is a set (or list) of already emitted code snippets, which are skipped.
+        The emitted snippets are added to it, so calls with the same blacklist emit each snippet once.
+        """
+
+        if blacklist is None:
+            blacklist = set()
+
+        elif not isinstance(blacklist, set):
+            blacklist = ListBlacklist(blacklist)
+
+        return '\n\n'.join(filter(None, [
+            lib.get_own_source_code(blacklist) for lib in self.get_dependency_order()
+        ]))
 
 
 class FileLib(Lib):
 
-    def __init__(self, dependencies=[], root=None, path=None):
+    def __init__(self, dependencies=None, root=None, path=None):
         Lib.__init__(
             self,
             dependencies=dependencies,
@@ -643,95 +1117,103 @@ class FileLib(Lib):
             self.header_code_path = None
             self.source_code_path = None
 
-    def get_header_code(self, blacklist):
-        header_code = Lib.get_header_code(self, blacklist)
-
+    def get_own_header_code(self, blacklist):
         if self.header_code_path:
             with open(self.header_code_path) as file_handle:
-                header_code += '\n\n// ' + self.header_code_path + '\n' + file_handle.read()
-
-        return header_code
+                return '// ' + self.header_code_path + '\n' + file_handle.read()
 
-    def get_source_code(self, blacklist):
-        source_code = Lib.get_source_code(self, blacklist)
+        return ''
 
+    def get_own_source_code(self, blacklist):
         if self.source_code_path:
             with open(self.source_code_path) as file_handle:
-                source_code += '\n\n// ' + self.source_code_path + '\n' + file_handle.read()
+                return '// ' + self.source_code_path + '\n' + file_handle.read()
 
-        return source_code
+        return ''
 
 
 class BlobLib(FileLib):
     """Generates C-code which allows to work with the serialized blob data."""
 
+    ADDRESS_SPACE_QUALIFIERS = ('__private', '__constant', '__global')
+
+    _interfaces = {}  # map of known interfaces, the names are computed once per blob type
+
     @classmethod
     def get_interface(cls, blob_type):
+        try:
+            return cls._interfaces[blob_type]
+
+        except KeyError:
+            pass
+
         assert issubclass(blob_type, Blob), 'blob_type=%s must be a subclass of Blob' % blob_type
 
         if issubclass(blob_type, BlobEnum):
-            return BlobEnumInterface(blob_type)
+            interface = BlobEnumInterface(blob_type)
 
         elif issubclass(blob_type, BlobArray):
-            return BlobArrayInterface(blob_type)
+            interface = BlobArrayInterface(blob_type)
 
         elif blob_type.is_plain():
-            return BlobPlainInterface(blob_type)
+            interface = BlobPlainInterface(blob_type)
 
         else:
-            return BlobComplexInterface(blob_type)
+            interface = BlobComplexInterface(blob_type)
 
-    def get_header_code(self, blacklist):
-        type_definitions_code = ''
-        for type_definition in self.type_definitions:
-            if type_definition in blacklist:
-                continue
+        cls._interfaces[blob_type] = interface
+        return interface
 
-            type_definitions_code += '\n\n' + type_definition.strip()
-            blacklist.append(type_definition)
+    @classmethod
+    def _join_snippets(cls, snippets, blacklist):
+        """Joins all snippets, which are not in the blacklist and adds them to the blacklist."""
 
-        function_definitions_code = ''
-        for function_definition in self.function_definitions:
-            if function_definition in blacklist:
+        code = []
+        for snippet in snippets:
+            if snippet in blacklist:
                 continue
 
-            function_definitions_code += '\n\n' + function_definition.strip()
-            blacklist.append(function_definition)
+            code.append(snippet.strip())
+            blacklist.add(snippet)
+
+        return '\n\n'.join(code)
 
+    def get_own_header_code(self, blacklist):
         return '\n\n'.join([
-            '/* header generated by %s */' % __file__,
+            '/* header generated by %s */' % __name__,
             self.header_header,
-            type_definitions_code,
-            function_definitions_code,
+            self._join_snippets(self.type_definitions, blacklist),
+            self._join_snippets(self.function_definitions, blacklist),
             self.header_footer
         ])
 
-    def get_source_code(self, blacklist):
-        function_declarations_code = ''
-        for function_declaration in self.function_declarations:
-            if function_declaration in blacklist:
-                continue
-
-            function_declarations_code += '\n\n' + function_declaration.strip()
-            blacklist.append(function_declaration)
-
+    def get_own_source_code(self, blacklist):
         return '\n\n'.join([
-            '/* source generated by %s */' % __file__,
-            function_declarations_code
+            '/* source generated by %s */' % __name__,
+            self._join_snippets(self.function_declarations, blacklist)
         ])
 
-    def _init_definitons_and_declarations(
+    def add_blob_types(
             self,
+            required_private_blob_types=None,
+            required_constant_blob_types=None,
+            required_global_blob_types=None
+    ):
+        """Generates the code of the blob types and their dependencies, which are not yet part of the lib.
+
+        Already generated types are skipped, so a lib can be extended incrementally.
+        """
+
+        for address_space_qualifier, required_blob_types in zip(self.ADDRESS_SPACE_QUALIFIERS, [
             required_private_blob_types,
             required_constant_blob_types,
-            required_global_blob_types
-    ):
+            required_global_blob_types,
+        ]):
+            if not required_blob_types:
+                continue
+
+            generated_types = self._generated_types[address_space_qualifier]
 
-        for address_space_qualifier, required_blob_types in [
-            ('__private', required_private_blob_types),
-            ('__constant', required_constant_blob_types),
-            ('__global', required_global_blob_types),
-        ]:
             # check dependencies
             blob_types = []
             for blob_type in required_blob_types:
@@ -739,7 +1221,6 @@ class BlobLib(FileLib):
                 blob_types.append(blob_type)
 
             # generate header
-            generated_types = []
             for blob_type in blob_types:
 
                 # ignore duplicates
@@ -747,35 +1228,18 @@ class BlobLib(FileLib):
                     continue
 
                 else:
-                    generated_types.append(blob_type)
+                    generated_types.add(blob_type)
 
                 # get interface
                 blob_type_interface = BlobLib.get_interface(blob_type)
 
                 # add type definition
-                if implode_float_n:
-                    type_definition = implode_floatn(
-                        blob_type_interface.get_type(address_space_qualifier=address_space_qualifier))
-
-                else:
-                    type_definition = (blob_type_interface.get_type(address_space_qualifier=address_space_qualifier))
+                self.type_definitions.append(blob_type_interface.get_type(address_space_qualifier=address_space_qualifier))
 
-                self.type_definitions.append(type_definition)
-
-                # register type
+                # remember type for the registration at pyopencl
                 if blob_type.is_plain():
-
                     c_name = blob_type_interface.get_name(address_space_qualifier=address_space_qualifier)
-                    dtype = blob_type.dtype
-
-                    # unregister dtype, for the case, that it differ
-                    if dtype in DTYPE_TO_NAME:
-                        DTYPE_TO_NAME.pop(dtype)
-
-                    if c_name in NAME_TO_DTYPE:
-                        NAME_TO_DTYPE.pop(c_name)
-
-                    pyopencl.tools.get_or_register_dtype(c_name, dtype)
+                    self.plain_dtypes.append((c_name, blob_type.dtype))
 
                 # add function definitions and declarations
                 function_definitions, function_declarations = blob_type_interface.get_functions(
@@ -784,6 +1248,68 @@ class BlobLib(FileLib):
                 self.function_definitions.extend(function_definitions)
                 self.function_declarations.extend(function_declarations)
 
+        if self.device is not None:
+            self.register_dtypes()
+
+    def add_fixed_blob_type(self, blob_type, dtype_params, address_space_qualifier='__global'):
+        """Generates a deserializer with constant offsets for concrete dtype_params (opt-in).
+
+        The generic code of the type is generated as well, it is used for blobs with other dtype params.
+        Arrays and plain types are rejected, because their offsets are constant already.
+        """
+
+        if issubclass(blob_type, BlobArray) or blob_type.is_plain():
+            raise ValueError('%s requires no fixed deserializer, the offsets of arrays and plain types are constant' %
+                             blob_type.__name__)
+
+        self.add_blob_types(*[
+            [blob_type] if qualifier == address_space_qualifier else None
+            for qualifier in self.ADDRESS_SPACE_QUALIFIERS
+        ])
+
+        pending = [(blob_type, dtype_params)]
+        while pending:
+            blob_type, dtype_params = pending.pop()
+
+            # ignore duplicates
+            key = (blob_type, address_space_qualifier, tuple(sorted(dtype_params.items())))
+            if key in self._fixed_types:
+                continue
+
+            else:
+                self._fixed_types.add(key)
+
+            constants, functions, nested = BlobLib.get_interface(blob_type).get_fixed_deserialize(
+                address_space_qualifier, dtype_params)
+
+            function_definition, function_declaration = functions
+            self.type_definitions.append(constants)
+            self.function_definitions.append(function_definition)
+            self.function_declarations.append(function_declaration)
+            pending.extend(nested)
+
+    def register_dtypes(self):
+        """Registers the dtypes of the plain types at pyopencl, which is required to use them on a device.
+
+        pyopencl is imported here, the code generation itself does not require it.
+        """
+
+        import pyopencl.tools
+        from pyopencl.compyte.dtypes import NAME_TO_DTYPE, DTYPE_TO_NAME
+
+        for c_name, dtype in self.plain_dtypes[self._registered_dtype_count:]:
+
+            # unregister dtype, for the case, that it differ
+            if dtype in DTYPE_TO_NAME:
+                DTYPE_TO_NAME.pop(dtype)
+
+            if c_name in NAME_TO_DTYPE:
+                NAME_TO_DTYPE.pop(c_name)
+
+            pyopencl.tools.get_or_register_dtype(c_name, dtype)
+
+        self._registered_dtype_count = len(self.plain_dtypes)
+
     def __init__(
             self,
             device=None,
@@ -793,30 +1319,24 @@ class BlobLib(FileLib):
             header_header='',
             header_footer=''
     ):
-        self.dependecies = []
-        self.type_definitions = []
-        self.function_definitions = []
-        self.function_declarations = []
+        FileLib.__init__(self)
 
-        self.header_header = header_header
-        self.header_footer = header_footer
-
-        if device is None:
-            device = pyopencl.create_some_context(False).get_info(pyopencl.context_info.DEVICES)[0]
+        self._fixed_types = set()
+        self._generated_types = dict([
+            (address_space_qualifier, set()) for address_space_qualifier in self.ADDRESS_SPACE_QUALIFIERS
+        ])
 
-        if required_private_blob_types is None:
-            required_private_blob_types = []
+        self.plain_dtypes = []  # c99 name and dtype of the plain types
+        self._registered_dtype_count = 0
 
-        if required_constant_blob_types is None:
-            required_constant_blob_types = []
+        self.header_header = header_header
+        self.header_footer = header_footer
 
-        if required_global_blob_types is None:
-            required_global_blob_types = []
+        # without a device the code is generated only, so no OpenCL context is required
+        self.device = device
 
-        self._init_definitons_and_declarations(
+        self.add_blob_types(
             required_private_blob_types,
             required_constant_blob_types,
             required_global_blob_types
         )
-
-
@@ -0,0 +1,239 @@
+"""
+... is a submodule of [blob_types](__init__.html).
+It contains the layout engine, which computes the OpenCL alignment of plain types.
+
+Consecutive scalar fields of the same dtype, whose names end with the components of a vector (see utils.vector_fields),
+are grouped to an OpenCL vector type like float4 or int2.
+A vector is aligned to its size, a vector of 3 components has the size and alignment of a vector of 4 components.
+Scalars are aligned to their size and a struct is aligned to its largest member.
+Vector fields like float3 (see create_vector_dtype) are numpy subarrays and are aligned like grouped vectors.
+Complex types are packed, but an aligned subtype or array is preceded by padding, so it starts at a multiple of its
+alignment within the (aligned) root blob.
+"""
+
+import numpy
+
+from utils import dtype_to_ctype, vector_fields
+
+VECTOR_SIZES = (2, 3, 4, 8, 16)  # component counts of the OpenCL vector types
+
+_alignments = {}  # map of known alignments of aligned dtypes
+
+
+def round_up(value, alignment):
+    """Returns the smallest multiple of alignment, which is not smaller than value."""
+
+    return (value + alignment - 1) // alignment * alignment
+
+
+def get_c_round_up(expression, alignment):
+    """Returns the c99 expression of round_up, the expression is unchanged for an alignment of 1."""
+
+    if alignment == 1:
+        return expression
+
+    return '(%s + %d) / %d * %d' % (expression, alignment - 1, alignment, alignment)
+
+
+def create_vector_dtype(base, count):
+    """Returns the dtype of a vector field like float3, which is a numpy subarray of count components."""
+
+    assert count in VECTOR_SIZES, 'a vector has %s components, not %d' % (VECTOR_SIZES, count)
+    return numpy.dtype((base, (count,)))
+
+
+def is_vector_dtype(dtype):
+    """Returns True, if the dtype is a vector field type."""
+
+    dtype = numpy.dtype(dtype)
+    return len(dtype.shape) == 1 and dtype.shape[0] in VECTOR_SIZES and dtype.base.names is None
+
+
+def split_vector_component(name):
+    """Returns the prefix and the component index of a field name like pos_x or None."""
+
+    prefix, _, suffix = name.rpartition('_')
+    if not prefix:
+        return None
+
+    for components in vector_fields:
+        if suffix in components:
+            return prefix, components, components.index(suffix)
+
+
+def get_members(components):
+    """Groups the (name, dtype) components into members (name, dtype, component names).
+
+    A member with more than one component name is a vector, its name is the common prefix.
+    """
+
+    members = []
+    index = 0
+    while index < len(components):
+        name, dtype = components[index]
+        dtype = numpy.dtype(dtype)
+        vector = split_vector_component(name)
+
+        group = [name]
+        if vector and vector[2] == 0 and not dtype.shape:
+            prefix, vector_components, vector_index = vector
+
+            while len(group) < len(vector_components) and index + len(group) < len(components):
+                next_name, next_dtype = components[index + len(group)]
+                if next_name != '%s_%s' % (prefix, vector_components[len(group)]) or \
+                        numpy.dtype(next_dtype) != dtype:
+                    break
+
+                group.append(next_name)
+
+        if len(group) > 1:
+            members.append((prefix, dtype, group))
+
+        else:
+            members.append((name, dtype, group))
+
+        index += len(group)
+
+    return members
+
+
+def get_member_alignment(dtype, component_count):
+    """Returns the size and alignment of a scalar or vector member."""
+
+    if component_count == 1 and is_vector_dtype(dtype):
+        dtype, component_count = dtype.base, dtype.shape[0]
+
+    elif component_count == 1:
+        return dtype.itemsize, dtype.base.itemsize
+
+    if component_count == 3:
+        component_count = 4
+
+    size = dtype.itemsize * component_count
+    return size, size
+
+
+def get_layout(components):
+    """Returns the members with their offsets, the itemsize and the alignment of aligned components."""
+
+    layout = []
+    offset = 0
+    struct_alignment = 1
+
+    for name, dtype, component_names in get_members(components):
+        size, alignment = get_member_alignment(dtype, len(component_names))
+        offset = round_up(offset, alignment)
+        layout.append((name, dtype, component_names, offset))
+
+        offset += size
+        struct_alignment = max(struct_alignment, alignment)
+
+    return layout, round_up(offset, struct_alignment), struct_alignment
+
+
+def create_aligned_dtype(components):
+    """Returns a numpy.dtype with explicit offsets, which is equal to the layout of the OpenCL struct."""
+
+    layout, itemsize, alignment = get_layout(components)
+
+    names, formats, offsets = [], [], []
+    for name, dtype, component_names, offset in layout:
+        for index, component_name in enumerate(component_names):
+            names.append(component_name)
+            formats.append(dtype)
+            offsets.append(offset + index * dtype.itemsize)
+
+    dtype = numpy.dtype({'names': names, 'formats': formats, 'offsets': offsets, 'itemsize': itemsize}, align=True)
+    _alignments[dtype] = alignment
+    return dtype
+
+
+def pad_dtype(dtype, alignment):
+    """Returns the dtype with an itemsize, which is rounded up to a multiple of alignment."""
+
+    itemsize = round_up(dtype.itemsize, alignment)
+    if itemsize == dtype.itemsize:
+        return dtype
+
+    return numpy.dtype({
+        'names': dtype.names,
+        'formats': [dtype.fields[name][0] for name in dtype.names],
+        'offsets': [dtype.fields[name][1] for name in dtype.names],
+        'itemsize': itemsize
+    })
+
+
+def get_components(dtype):
+    """Returns the (name, dtype) of all fields of a dtype."""
+
+    return [(name, dtype.fields[name][0]) for name in dtype.names]
+
+
+def get_alignment(dtype):
+    """Returns the alignment of a dtype, which is 1 for packed dtypes."""
+
+    dtype = numpy.dtype(dtype)
+    if not dtype.isalignedstruct:
+        return 1
+
+    if dtype not in _alignments:
+        _alignments[dtype] = get_layout(get_components(dtype))[2]
+
+    return _alignments[dtype]
+
+
+def get_c_members(dtype):
+    """Returns the c99 (type, name) of the members of an aligned dtype."""
+
+    members = []
+    for name, member_dtype, component_names, offset in get_layout(get_components(dtype))[0]:
+        ctype = dtype_to_ctype(member_dtype.base)
+
+        if len(component_names) > 1:
+            members.append(('%s%d' % (ctype, len(component_names)), name))
+
+        elif is_vector_dtype(member_dtype):
+            members.append(('%s%d' % (ctype, member_dtype.shape[0]), name))
+
+        elif member_dtype.shape:
+            members.append((ctype, '%s[%d]' % (name, numpy.prod(member_dtype.shape))))
+
+        else:
+            members.append((ctype, name))
+
+    return members
+
+
+def get_c_member_components(dtype, field):
+    """Returns the c99 expressions of the components of a field of an aligned dtype, e.g. ['pos.s0'] for pos_x."""
+
+    for name, member_dtype, component_names, offset in get_layout(get_components(dtype))[0]:
+        if field in component_names:
+            if len(component_names) > 1:
+                return ['%s.s%d' % (name, component_names.index(field))]
+
+            elif is_vector_dtype(member_dtype):
+                return ['%s.s%d' % (name, index) for index in xrange(member_dtype.shape[0])]
+
+            return [name]
+
+    raise KeyError(field)
+
+
+def get_c_member_address(dtype, field, pointer, address_space_qualifier):
+    """Returns the c99 address of a field of an aligned dtype, e.g. &self->pos for the field pos_x.
+
+    The address of a vector component can not be taken in OpenCL C, so it is computed from the address of the vector,
+    whose pointer keeps the address space of the struct.
+    """
+
+    for name, member_dtype, component_names, offset in get_layout(get_components(dtype))[0]:
+        if field in component_names:
+            index = component_names.index(field)
+            if index > 0:
+                return '((%s %s*)&%s->%s + %d)' % (
+                    address_space_qualifier, dtype_to_ctype(member_dtype.base), pointer, name, index)
+
+            return '&%s->%s' % (pointer, name)
+
+    raise KeyError(field)
@@ -0,0 +1,224 @@
+"""
+... is a submodule of [blob_types](__init__.html).
+It contains a binary patch format, which replicates the changes between two versions of an object.
+
+The patch of a BlobArray of a plain child type contains the changed item ranges per column,
+so a write of one field of some items costs only these values and not the whole items.
+The static fields (e.g. the count) and the blobs of other types are patched by changed byte ranges.
+The size of a patch depends on the changes only, not on the capacity.
+
+    patch = create_patch(previous_state, state)
+    ...
+    apply_patch(replica, patch)  # in place and vectorized
+
+A patch starts with a header of the magic, the schema digest, the size of the blob and the number of records.
+Each record contains its kind (*B* for byte ranges or *C* for item ranges of a column), the column name,
+the [start, end) ranges and the concatenated values of the ranges.
+"""
+
+import hashlib
+import struct
+
+import numpy
+
+from utils import get_blob_bytes
+
+PATCH_MAGIC = 'BLOBDIFF'
+PATCH_HEADER_FORMAT = '<8s20sQI'  # magic, sha1 digest of the schema fingerprint, size of the blob, number of records
+RECORD_FORMAT = '<cHI'  # kind, length of the column name, number of ranges
+RANGE_DTYPE = numpy.dtype('<u4')
+
+BYTES_RECORD = 'B'
+COLUMN_RECORD = 'C'
+
+DEFAULT_GAP = 8  # ranges, which are closer than these bytes, are joined, because a range costs 8 bytes
+
+
+class PatchException(Exception):
+    pass
+
+
+def get_schema_digest(blob_type):
+    return hashlib.sha1(blob_type.get_schema_fingerprint()).digest()
+
+
+def get_runs(mask, gap=0):
+    """Returns the (starts, ends) arrays of the runs of True values, runs which are closer than gap are joined."""
+
+    edges = numpy.diff(numpy.concatenate(([0], mask.view(numpy.int8), [0])))
+    starts = numpy.flatnonzero(edges == 1)
+    ends = numpy.flatnonzero(edges == -1)
+
+    if gap > 0 and len(starts) > 1:
+        separate = (starts[1:] - ends[:-1]) > gap
+        starts = starts[numpy.concatenate(([True], separate))]
+        ends = ends[numpy.concatenate((separate, [True]))]
+
+    return starts, ends
+
+
+def get_range_indices(starts, ends):
+    """Returns the concatenated indices of the [start, end) ranges."""
+
+    lengths = ends - starts
+    return numpy.repeat(starts - numpy.cumsum(lengths) + lengths, lengths) + numpy.arange(lengths.sum())
+
+
+def get_item_bytes(column):
+    """Returns the bytes of the values of a column as (capacity, value size) array."""
+
+    return numpy.ascontiguousarray(column).view(numpy.uint8).reshape(len(column), -1)
+
+
+def pack_record(kind, name, starts, ends, payload):
+    ranges = numpy.empty((len(starts), 2), RANGE_DTYPE)
+    ranges[:, 0] = starts
+    ranges[:, 1] = ends
+
+    return ''.join([struct.pack(RECORD_FORMAT, kind, len(name), len(starts)), name, ranges.tostring(), payload])
+
+
+def is_column_patch(blob_object):
+    return hasattr(blob_object, 'child_type') and blob_object.child_type.is_plain()
+
+
+def create_patch(old_object, new_object, gap=DEFAULT_GAP):
+    """Returns a patch (str), which turns the blob of old_object into the blob of new_object."""
+
+    blob_type = type(new_object)
+    if type(old_object) != blob_type:
+        raise PatchException('a patch requires two objects of the same type instead of %s, %s' % (
+            type(old_object).__name__, blob_type.__name__))
+
+    old_bytes, new_bytes = get_blob_bytes(old_object.blob), get_blob_bytes(new_object.blob)
+    if old_bytes.size != new_bytes.size:
+        raise PatchException('a patch requires blobs of equal size instead of %d, %d' % (old_bytes.size, new_bytes.size))
+
+    records = []
+
+    # the columns of the items are compared per value, the other bytes per byte
+    if is_column_patch(new_object):
+        static_size = blob_type.get_items_offset()
+
+        for name in blob_type.child_type.dtype.names:
+            old_values = get_item_bytes(old_object.get_column(name, track=False))
+            new_values = get_item_bytes(new_object.get_column(name, track=False))
+
+            item_size = new_values.shape[1]
+            starts, ends = get_runs((old_values != new_values).any(1), gap // item_size)
+            if len(starts):
+                payload = new_values[get_range_indices(starts, ends)].tostring()
+                records.append(pack_record(COLUMN_RECORD, name, starts, ends, payload))
+
+    else:
+        static_size = new_bytes.size
+
+    starts, ends = get_runs(old_bytes[:static_size] != new_bytes[:static_size], gap)
+    if len(starts):
+        payload = new_bytes[get_range_indices(starts, ends)].tostring()
+        records.append(pack_record(BYTES_RECORD, '', starts, ends, payload))
+
+    header = struct.pack(PATCH_HEADER_FORMAT, PATCH_MAGIC, get_schema_digest(blob_type), new_bytes.size, len(records))
+    return header + ''.join(records)
+
+
+def get_patch_end(patch, offset, nbytes, what):
+    """Returns the end of nbytes at offset of the patch, which must not exceed the patch."""
+
+    end = offset + nbytes
+    if end > len(patch):
+        raise PatchException('the patch ends before the %s (%d > %d bytes)' % (what, end, len(patch)))
+
+    return end
+
+
+def check_ranges(ranges, size, what):
+    """Checks, that the [start, end) ranges are ordered and within a column or the static bytes of a size."""
+
+    if len(ranges) and ((ranges[:, 0] > ranges[:, 1]).any() or ranges[:, 1].max() > size):
+        raise PatchException('the ranges of %s exceed its %d values' % (what, size))
+
+
+def apply_patch(blob_object, patch):
+    """Writes the changes of a patch into the blob of an object, the changes are marked if tracking is enabled.
+
+    All records are checked before the first write, so an invalid patch does not change the object.
+    Returns the number of written bytes.
+    """
+
+    blob_type = type(blob_object)
+    blob_bytes = get_blob_bytes(blob_object.blob)
+
+    header_size = struct.calcsize(PATCH_HEADER_FORMAT)
+    if len(patch) < header_size:
+        raise PatchException('the data is no patch')
+
+    magic, digest, nbytes, record_count = struct.unpack(PATCH_HEADER_FORMAT, patch[:header_size])
+
+    if magic != PATCH_MAGIC:
+        raise PatchException('the data is no patch')
+
+    if digest != get_schema_digest(blob_type) or nbytes != blob_bytes.size:
+        raise PatchException('the patch belongs to another type or size than %s (%d bytes)' % (
+            blob_type.__name__, blob_bytes.size))
+
+    if is_column_patch(blob_object):
+        column_names = blob_type.child_type.dtype.names
+        static_size = blob_type.get_items_offset()
+
+    else:
+        column_names = ()
+        static_size = blob_bytes.size
+
+    # the records are decoded without copies of the patch
+    data = numpy.frombuffer(patch, numpy.uint8)
+    offset = header_size
+    records = []
+
+    for index in xrange(record_count):
+        end = get_patch_end(patch, offset, struct.calcsize(RECORD_FORMAT), 'record %d' % index)
+        kind, name_size, range_count = struct.unpack_from(RECORD_FORMAT, patch, offset)
+
+        offset, end = end, get_patch_end(patch, end, name_size, 'name of record %d' % index)
+        name = patch[offset:end]
+
+        offset, end = end, get_patch_end(patch, end, range_count * 2 * RANGE_DTYPE.itemsize, 'ranges of %r' % name)
+        ranges = data[offset:end].view(RANGE_DTYPE).reshape(-1, 2).astype(numpy.intp)
+        offset = end
+
+        if kind == COLUMN_RECORD:
+            if name not in column_names:
+                raise PatchException('%s has no column %r' % (blob_type.__name__, name))
+
+            column = blob_object.get_column(name, track=False)
+            check_ranges(ranges, len(column), 'column %r' % name)
+            value_size = column.dtype.itemsize * int(numpy.prod(column.shape[1:]))
+
+        elif kind == BYTES_RECORD:
+            check_ranges(ranges, static_size, 'the static bytes')
+            value_size = 1
+
+        else:
+            raise PatchException('unknown record kind %r' % kind)
+
+        indices = get_range_indices(ranges[:, 0], ranges[:, 1])
+        end = get_patch_end(patch, offset, len(indices) * value_size, 'values of %r' % name)
+        records.append((kind, name, ranges, indices, data[offset:end]))
+        offset = end
+
+    written = 0
+    for kind, name, ranges, indices, payload in records:
+        if kind == COLUMN_RECORD:
+            column = blob_object.get_column(name, track=False)
+            column[indices] = payload.view(column.dtype).reshape((len(indices), ) + column.shape[1:])
+            for start, end in ranges:
+                blob_object.mark_view_dirty(column[start:end])
+
+        else:
+            blob_bytes[indices] = payload
+            for start, end in ranges:
+                blob_object.mark_dirty(int(start), int(end - start))
+
+        written += payload.nbytes
+
+    return written
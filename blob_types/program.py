@@ -0,0 +1,154 @@
+"""
+... is a submodule of [blob_types](__init__.html).
+It contains helpers which build OpenCL programs from generated libs and cache the device binaries on disk.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+
+
+def get_option_list(options):
+    """Returns the build options as list, a string is a single option."""
+
+    if not options:
+        return []
+
+    if isinstance(options, basestring):
+        return [options]
+
+    return list(options)
+
+
+class ProgramBinaryCache(object):
+    """Stores compiled OpenCL program binaries in a directory.
+
+    A binary is identified by the hash of the source code, the build options, the device and the driver version.
+    A changed driver or source therefore leads to a rebuild instead of loading an incompatible binary.
+    """
+
+    BINARY_FILE_SUFFIX = '.bin'
+
+    def __init__(self, cache_dir=None):
+        if cache_dir is None:
+            cache_dir = os.path.join(tempfile.gettempdir(), 'blob_types_program_cache')
+
+        self.cache_dir = cache_dir
+
+    @classmethod
+    def get_device_id(cls, device):
+        """Returns a string which identifies the device and the driver."""
+
+        return '|'.join([
+            device.platform.name,
+            device.platform.version,
+            device.name,
+            device.version,
+            device.driver_version
+        ])
+
+    def get_key(self, source, device, options):
+        """Returns the cache key of a source code for a device."""
+
+        key = hashlib.sha1()
+        key.update(source.encode('utf-8') if isinstance(source, unicode) else source)
+        key.update('\0' + ' '.join(get_option_list(options)))
+        key.update('\0' + self.get_device_id(device))
+        return key.hexdigest()
+
+    def get_path(self, key):
+        return os.path.join(self.cache_dir, key + self.BINARY_FILE_SUFFIX)
+
+    def load(self, key):
+        """Returns the cached binary or None."""
+
+        path = self.get_path(key)
+        if not os.path.exists(path):
+            return None
+
+        with open(path, 'rb') as file_handle:
+            return file_handle.read()
+
+    def save(self, key, binary):
+        """Stores a binary, a concurrent process never sees a partial file."""
+
+        if not os.path.isdir(self.cache_dir):
+            try:
+                os.makedirs(self.cache_dir)
+
+            except OSError:
+                if not os.path.isdir(self.cache_dir):
+                    raise
+
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(file_descriptor, 'wb') as file_handle:
+            file_handle.write(binary)
+
+        os.rename(temp_path, self.get_path(key))
+
+    def remove(self, key):
+        path = self.get_path(key)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def build(self, context, source, options=None, devices=None):
+        """Returns a built pyopencl.Program, which is created from cached binaries if possible."""
+
+        import pyopencl
+
+        options = get_option_list(options)
+
+        if devices is None:
+            devices = context.devices
+
+        keys = [self.get_key(source, device, options) for device in devices]
+        binaries = [self.load(key) for key in keys]
+
+        if None not in binaries:
+            try:
+                return pyopencl.Program(context, devices, binaries).build(options=options, devices=devices)
+
+            except pyopencl.Error as ex:
+                logging.warn('failed to load cached program binaries, rebuild from source: %s', ex)
+                for key in keys:
+                    self.remove(key)
+
+        program = pyopencl.Program(context, source).build(options=options, devices=devices)
+
+        program_devices = program.get_info(pyopencl.program_info.DEVICES)
+        program_binaries = program.get_info(pyopencl.program_info.BINARIES)
+        for device, binary in zip(program_devices, program_binaries):
+            if device in devices and binary:
+                self.save(self.get_key(source, device, options), bytes(binary))
+
+        return program
+
+
+def get_program_source(lib, kernel_sources=None):
+    """Returns the header code and source code of a lib followed by the user kernels."""
+
+    blacklist = set()
+    parts = [lib.get_header_code(blacklist), lib.get_source_code(blacklist)]
+
+    if kernel_sources:
+        parts.extend(kernel_sources)
+
+    return '\n\n'.join(parts)
+
+
+def build_program(context, lib, kernel_sources=None, options=None, cache=None):
+    """Builds a pyopencl.Program of a lib (e.g. a BlobLib) and user kernels.
+
+    The device binaries are cached on disk and reused on the next start.
+    """
+
+    if cache is None:
+        cache = ProgramBinaryCache()
+
+    # the plain types must be known by pyopencl to be used on the device
+    for dependency in lib.get_dependency_order():
+        if hasattr(dependency, 'register_dtypes'):
+            dependency.register_dtypes()
+
+    return cache.build(context, get_program_source(lib, kernel_sources), options=options)
@@ -0,0 +1,257 @@
+"""
+... is a submodule of [blob_types](__init__.html).
+It contains blobs in shared memory, so the processes of a multiprocessing pool work on one blob instead of copies.
+
+The blob is stored in a file in /dev/shm (or the temporary directory, if there is no /dev/shm),
+which every process maps into its memory.
+A SharedBlobHandle is a small picklable reference to this file, so it is sent to the workers instead of the blob.
+The workers attach the handle and get an object of the same type, whose blob and column views use the shared pages.
+
+    handle = SharedBlobHandle.create(SoaParticles, {'capacity': 1000000})
+    try:
+        particles = handle.attach()
+        pool.map(scan, [(handle, start, end) for start, end in chunks])
+    finally:
+        handle.unlink()
+
+    def scan((handle, start, end)):
+        particles = handle.attach()
+        return particles.get_column('mass')[start:end].sum()
+
+The objects of the items are created on their first access, so attaching a large array costs a scan of the indices.
+An array of structs has a dtype field per item and field, so its capacity is limited to Blob.MAX_DTYPE_PARAM.
+Large shared arrays use the structure of arrays layout (BlobArray.SOA_LAYOUT), whose capacity is not limited.
+
+Cleanup:
+
+- The file is owned by the process which created the handle, it must call *unlink* (or use the handle as context).
+  A file, which is not unlinked, stays in /dev/shm until the next reboot.
+- Unlinking removes the name only, the objects which are attached keep working until they are garbage collected.
+  Handles can not be attached after the unlink.
+- There is no explicit detach, the mapping is released with the last numpy.ndarray which uses it.
+- The processes must synchronize writes to the same items, there is no locking.
+
+A handle is frozen, when its blob is not written anymore (e.g. a checkpoint).
+The objects of a frozen handle are attached read-only or copy on write.
+A copy on write object shares the pages of the file and the kernel copies a page, when the object writes it first.
+Only a frozen handle is attached copy on write, because the object would see later writes to the pages it did not write.
+
+    checkpoint = SharedBlobHandle.from_object(world)  # a copy of the current state
+    checkpoint.freeze()
+    trial = checkpoint.attach(copy_on_write=True)
+
+*ingest_structs* fills a shared BlobArray of a plain child type by a process pool.
+The structs are split into chunks, each worker writes its chunk into a disjoint range of items.
+Afterwards the global_index of the items is set to their position and the count is updated.
+
+    handle = SharedBlobHandle.create(Particles, {'capacity': len(structs)})
+    particles = ingest_structs(handle, structs)
+"""
+
+import mmap
+import multiprocessing
+import os
+import tempfile
+import uuid
+
+import numpy
+
+from utils import get_blob_bytes, get_blob_index
+
+SHARED_MEMORY_DIRECTORY = '/dev/shm'
+SHARED_FILE_PREFIX = 'blob_types_'
+
+
+def get_shared_memory_directory():
+    """Returns the directory of the shared memory files, a RAM disk if the system has one."""
+
+    if os.path.isdir(SHARED_MEMORY_DIRECTORY):
+        return SHARED_MEMORY_DIRECTORY
+
+    return tempfile.gettempdir()
+
+
+class SharedBlobHandle(object):
+    """A picklable reference to the blob of an object in a shared memory file."""
+
+    def __init__(self, blob_type, dtype_params, path, nbytes, frozen=False):
+        self.blob_type = blob_type
+        self.dtype_params = dtype_params
+        self.path = path
+        self.nbytes = nbytes
+        self.frozen = frozen
+
+    @classmethod
+    def create(cls, blob_type, dtype_params=None, path=None):
+        """Allocates and initializes a blob of blob_type in a new shared memory file."""
+
+        if dtype_params is None:
+            dtype_params = {}
+
+        if path is None:
+            path = os.path.join(get_shared_memory_directory(), '%s%s' % (SHARED_FILE_PREFIX, uuid.uuid4().hex))
+
+        nbytes = blob_type.create_dtype(dtype_params=dtype_params).itemsize
+
+        # the file is created exclusively, so an existing file of another process is never reused
+        file_descriptor = os.open(path, os.O_RDWR | os.O_CREAT | os.O_EXCL, 0600)
+        try:
+            os.ftruncate(file_descriptor, nbytes)
+
+        finally:
+            os.close(file_descriptor)
+
+        self = cls(blob_type, dtype_params, path, nbytes)
+        blob_type.init_blob(blob=self.map_blob(), dtype_params=dtype_params)
+
+        return self
+
+    @classmethod
+    def from_object(cls, blob_object, path=None):
+        """Copies the blob of an object into a new shared memory file."""
+
+        blob_type = type(blob_object)
+        self = cls.create(blob_type, blob_object.dtype_params, path)
+        get_blob_bytes(self.map_blob())[:] = get_blob_bytes(blob_object.blob)
+
+        return self
+
+    def freeze(self):
+        """Marks the blob as final, so it is attached read-only or copy on write only.
+
+        The file is made read-only too, but the objects which are attached writeable already are not changed.
+        So the owner freezes a handle, when no process writes the blob anymore.
+        """
+
+        if os.path.exists(self.path):
+            os.chmod(self.path, 0400)
+
+        self.frozen = True
+
+    def map_bytes(self, readonly=False, copy_on_write=False):
+        """Maps the file and returns its bytes as numpy.uint8 array, which is a view of the shared pages.
+
+        The pages of a copy on write mapping are private, a page is copied when it is written first.
+        """
+
+        if not os.path.exists(self.path):
+            raise IOError('the shared blob %s was unlinked' % self.path)
+
+        if copy_on_write and not self.frozen:
+            raise ValueError('the shared blob %s is not frozen, a copy on write mapping would see later writes' % self.path)
+
+        if self.frozen and not (readonly or copy_on_write):
+            raise ValueError('the shared blob %s is frozen, it is mapped read-only or copy on write only' % self.path)
+
+        if copy_on_write:
+            access = mmap.ACCESS_COPY
+
+        elif readonly:
+            access = mmap.ACCESS_READ
+
+        else:
+            access = mmap.ACCESS_WRITE
+
+        with open(self.path, 'r+b' if access == mmap.ACCESS_WRITE else 'rb') as file_handle:
+            memory = mmap.mmap(file_handle.fileno(), self.nbytes, access=access)
+
+        # the numpy.ndarray keeps the mapping alive, the file handle is not required anymore
+        return numpy.frombuffer(memory, numpy.uint8, self.nbytes)
+
+    def map_blob(self, readonly=False):
+        """Maps the file and returns the blob, which is a view of the shared pages."""
+
+        dtype = self.blob_type.create_dtype(dtype_params=self.dtype_params)
+        return self.blob_type.unshape(self.map_bytes(readonly).view(dtype))
+
+    def attach(self, readonly=False, copy_on_write=False):
+        """Returns an object of the blob type, which works on the shared blob without a copy.
+
+        A read-only object does not write the blob, e.g. it keeps a count, which differs from the valid items.
+
+        The changes of an object, which is attached copy on write, are private.
+        It requires a frozen handle, see freeze.
+        """
+
+        blob_object = self.blob_type.from_bytes(self.map_bytes(readonly, copy_on_write), self.dtype_params)
+        blob_object._shared_handle = self
+
+        return blob_object
+
+    def unlink(self):
+        """Removes the shared memory file, the attached objects are valid until they are released."""
+
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.unlink()
+
+    def __repr__(self):
+        return '%s(%s, %s, %r, %d, %s)' % (
+            type(self).__name__, self.blob_type.__name__, self.dtype_params, self.path, self.nbytes, self.frozen
+        )
+
+
+def _ingest_chunk(args):
+    """Writes a chunk of structs into the items of the shared array from index start on.
+
+    The chunk is converted to rows of the child dtype, which are written by one assignment per column.
+    The items are numbered by their position.
+    """
+
+    handle, start, structs = args
+    array_type = handle.blob_type
+
+    rows = array_type.get_rows_from_struct(structs)
+    rows[array_type.INDEX_FIELD] = numpy.arange(start, start + len(rows))
+
+    blob = handle.map_blob()
+    array_type.init_items_from_rows(blob, blob.dtype, rows, start)
+
+    return len(rows)
+
+
+def ingest_structs(handle, structs, processes=None, chunk_rows=None, pool=None):
+    """Writes a list of child structs into the items of a shared BlobArray in parallel and returns the attached array.
+
+    The work is split into chunks of chunk_rows items, by default four chunks per process.
+    A pool is created for the call, if none is given.
+    """
+
+    array_type = handle.blob_type
+    capacity = handle.dtype_params[array_type.CAPACITY_FIELD]
+    assert array_type.child_type.is_plain(), 'the ingest requires a plain child type instead of %s' % array_type.child_type
+
+    if len(structs) > capacity:
+        raise ValueError('%d structs exceed the capacity %d of %s' % (len(structs), capacity, handle))
+
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+
+    if chunk_rows is None:
+        chunk_rows = max(1, -(-len(structs) // (processes * 4)))
+
+    chunks = [(handle, start, structs[start:start + chunk_rows]) for start in xrange(0, len(structs), chunk_rows)]
+
+    if pool is None:
+        own_pool = multiprocessing.Pool(processes)
+        try:
+            count = sum(own_pool.map(_ingest_chunk, chunks))
+
+        finally:
+            own_pool.close()
+            own_pool.join()
+
+    else:
+        count = sum(pool.map(_ingest_chunk, chunks))
+
+    # the items behind the structs are invalid, so the count of the attached array is equal
+    blob = handle.map_blob()
+    array_type.get_blob_column(blob, blob.dtype, array_type.INDEX_FIELD)[count:] = -1
+    blob[get_blob_index(blob.dtype, array_type.COUNT_FIELD_NAME)] = count
+
+    return handle.attach()
@@ -0,0 +1,151 @@
+"""
+... is a submodule of [blob_types](__init__.html).
+It contains versioned snapshots of an object, which share the unchanged pages of its blob.
+
+The blob is split into pages of fixed size.
+A snapshot compares the pages with the latest version and copies only the pages, which were written since.
+The other pages are shared with the previous version, so a version costs the memory of its changed pages.
+
+    snapshots = BlobSnapshots(world, max_versions=10)
+    for step in steps:
+        simulate(world)
+        snapshots.snapshot()
+
+    snapshots.restore(snapshots.versions()[0])  # rolls back to the oldest retained version
+    print snapshots.get_memory_report()
+
+The comparison is vectorized and exact, a snapshot reads the whole blob but copies the changed pages only.
+"""
+
+import numpy
+
+from utils import get_blob_bytes
+
+
+class BlobSnapshots(object):
+    """Retains versions of the blob of an object in a pool of shared, reference counted pages."""
+
+    DEFAULT_PAGE_SIZE = 4096
+    COMPARE_PAGES = 256  # the number of pages, which are compared at once
+
+    def __init__(self, blob_object, page_size=DEFAULT_PAGE_SIZE, max_versions=None):
+        self.blob_object = blob_object
+        self.page_size = page_size
+        self.max_versions = max_versions
+
+        nbytes = get_blob_bytes(blob_object.blob).size
+        self.page_count = -(-nbytes // page_size)
+
+        self.pool = numpy.zeros((0, page_size), numpy.uint8)
+        self.references = numpy.zeros(0, numpy.int32)
+        self.free_pages = []
+
+        self.version_pages = {}  # map of the versions to the pool rows of their pages
+        self.next_version = 0
+
+    def get_pages(self):
+        """Returns the bytes of the blob as (page count, page size) array, the last page is padded by a copy."""
+
+        blob_bytes = get_blob_bytes(self.blob_object.blob)
+        if blob_bytes.size == self.page_count * self.page_size:
+            return blob_bytes.reshape(self.page_count, self.page_size)
+
+        pages = numpy.zeros((self.page_count, self.page_size), numpy.uint8)
+        pages.reshape(-1)[:blob_bytes.size] = blob_bytes
+        return pages
+
+    def allocate_pages(self, count):
+        """Returns count free rows of the pool, the pool grows if required."""
+
+        missing = count - len(self.free_pages)
+        if missing > 0:
+            size = len(self.pool)
+            grow = max(missing, size // 2)
+
+            pool = numpy.zeros((size + grow, self.page_size), numpy.uint8)
+            pool[:size] = self.pool
+            self.pool = pool
+            self.references = numpy.concatenate((self.references, numpy.zeros(grow, numpy.int32)))
+            self.free_pages.extend(xrange(size, size + grow))
+
+        rows = numpy.array(self.free_pages[-count:] if count else [], numpy.intp)
+        del self.free_pages[len(self.free_pages) - count:]
+        return rows
+
+    def snapshot(self):
+        """Retains the current state of the blob as new version and returns the version."""
+
+        pages = self.get_pages()
+
+        if self.version_pages:
+            rows = self.version_pages[max(self.version_pages)].copy()
+
+            changed = []
+            for start in xrange(0, self.page_count, self.COMPARE_PAGES):
+                end = min(start + self.COMPARE_PAGES, self.page_count)
+                differs = (self.pool[rows[start:end]] != pages[start:end]).any(1)
+                changed.append(start + numpy.flatnonzero(differs))
+
+            changed = numpy.concatenate(changed)
+
+        else:
+            rows = numpy.zeros(self.page_count, numpy.intp)
+            changed = numpy.arange(self.page_count)
+
+        # the changed pages are copied, the others are shared with the previous version
+        rows[changed] = self.allocate_pages(len(changed))
+        self.pool[rows[changed]] = pages[changed]
+        self.references[rows] += 1
+
+        version = self.next_version
+        self.next_version += 1
+        self.version_pages[version] = rows
+
+        if self.max_versions is not None:
+            while len(self.version_pages) > self.max_versions:
+                self.drop(min(self.version_pages))
+
+        return version
+
+    def versions(self):
+        """Returns the retained versions, the oldest first."""
+
+        return sorted(self.version_pages)
+
+    def drop(self, version):
+        """Releases a version, its pages are reused unless other versions share them."""
+
+        rows = self.version_pages.pop(version)
+        self.references[rows] -= 1
+        self.free_pages.extend(rows[self.references[rows] == 0].tolist())
+
+    def restore(self, version):
+        """Writes a version into the blob of the object, the later versions are retained."""
+
+        if version not in self.version_pages:
+            raise KeyError('the version %s is not retained' % version)
+
+        blob_bytes = get_blob_bytes(self.blob_object.blob)
+        blob_bytes[:] = self.pool[self.version_pages[version]].reshape(-1)[:blob_bytes.size]
+        self.blob_object.mark_dirty()
+
+    def get_version_nbytes(self, version):
+        """Returns the bytes of the pages, which are held by a version only."""
+
+        rows = self.version_pages[version]
+        return int((self.references[rows] == 1).sum()) * self.page_size
+
+    def get_nbytes(self):
+        """Returns the bytes of the pages, which are held by all versions."""
+
+        return int((self.references > 0).sum()) * self.page_size
+
+    def get_memory_report(self):
+        """Returns a list of (version, bytes held by the version only, bytes shared with other versions)."""
+
+        report = []
+        for version in self.versions():
+            unique_nbytes = self.get_version_nbytes(version)
+            report.append((version, unique_nbytes, self.page_count * self.page_size - unique_nbytes))
+
+        return report
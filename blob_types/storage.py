@@ -0,0 +1,376 @@
+"""
+... is a submodule of [blob_types](__init__.html).
+It contains a column-wise compressed file format for BlobArrays of plain child types.
+
+Each child field is stored as column, which is transformed and compressed in chunks of rows:
+
+- *delta* stores the difference to the previous row (bitwise, so it is lossless for floats too),
+  which turns small-range integers like indices into runs of small values.
+- *shuffle* groups the n-th bytes of all values, which makes the similar exponents of smooth floats compressible.
+
+The chunks are compressed by a stdlib codec (zlib, bz2 or lzma if available) in parallel threads.
+A column can be read without the others and without decompressing the whole file.
+
+    save_columns(particles, 'checkpoint.cols')
+    particles = load_columns(Particles, 'checkpoint.cols')
+    masses = read_columns('checkpoint.cols', ['mass'])['mass']
+
+The file starts with a magic, followed by the compressed chunks and a JSON index of the columns and chunks.
+The last 16 bytes are the offset of the index and the magic.
+
+Any Blob can be stored uncompressed by *save_blob*.
+The file starts with a small header, which contains the schema fingerprint and the dtype_params.
+So *load_blob* reads the header and casts the blob once instead of probing the dtype_params nested level by level
+and it fails fast, if the schema of the file differs.
+
+    save_blob(world, 'world.blob')
+    world = load_blob(World, 'world.blob')
+"""
+
+import bz2
+import json
+import multiprocessing.pool
+import struct
+import zlib
+
+import numpy
+
+from utils import get_blob_bytes
+
+try:
+    import lzma
+
+except ImportError:
+    lzma = None  # python 2 requires the backports.lzma package
+
+MAGIC = 'BLOBCOLS'
+FORMAT_VERSION = 1
+TRAILER_FORMAT = '<Q8s'
+
+BLOB_MAGIC = 'BLOBTYPE'
+BLOB_HEADER_LENGTH_FORMAT = '<I'
+BLOB_DATA_ALIGNMENT = 64  # the blob starts aligned, so the file can be mapped into memory
+
+DEFAULT_CHUNK_ROWS = 1 << 16
+DEFAULT_CODEC = 'zlib'
+
+DELTA_TRANSFORM = 'delta'
+SHUFFLE_TRANSFORM = 'shuffle'
+
+
+class StorageException(Exception):
+    pass
+
+
+def get_codec(name):
+    """Returns the compress(data, level) and decompress(data) functions of a codec."""
+
+    if name == 'zlib':
+        return lambda data, level: zlib.compress(data, 6 if level is None else level), zlib.decompress
+
+    elif name == 'bz2':
+        return lambda data, level: bz2.compress(data, 9 if level is None else level), bz2.decompress
+
+    elif name == 'lzma':
+        if lzma is None:
+            raise StorageException('the lzma codec is not available, install backports.lzma')
+
+        return lambda data, level: lzma.compress(data, preset=6 if level is None else level), lzma.decompress
+
+    raise StorageException('unknown codec %s' % name)
+
+
+def get_word_dtype(dtype):
+    """Returns the unsigned integer dtype with the size of dtype, whose arithmetic wraps around."""
+
+    return numpy.dtype('<u%d' % dtype.itemsize)
+
+
+def encode_delta(values):
+    words = values.view(get_word_dtype(values.dtype))
+    deltas = words.copy()
+    deltas[1:] -= words[:-1]
+    return deltas.view(values.dtype)
+
+
+def decode_delta(values):
+    word_dtype = get_word_dtype(values.dtype)
+    return numpy.cumsum(values.view(word_dtype), axis=0, dtype=word_dtype).view(values.dtype)
+
+
+def encode_shuffle(values):
+    shuffled = values.view(numpy.uint8).reshape(-1, values.dtype.itemsize).T.copy()
+    return shuffled.reshape(-1).view(values.dtype).reshape(values.shape)
+
+
+def decode_shuffle(values):
+    unshuffled = values.view(numpy.uint8).reshape(values.dtype.itemsize, -1).T.copy()
+    return unshuffled.reshape(-1).view(values.dtype).reshape(values.shape)
+
+
+TRANSFORMS = {
+    DELTA_TRANSFORM: (encode_delta, decode_delta),
+    SHUFFLE_TRANSFORM: (encode_shuffle, decode_shuffle),
+}
+
+
+def get_default_transforms(dtype):
+    """Returns delta and shuffle for integers and shuffle for other values."""
+
+    if dtype.base.kind in 'iub':
+        return [DELTA_TRANSFORM, SHUFFLE_TRANSFORM]
+
+    return [SHUFFLE_TRANSFORM]
+
+
+def encode_chunk(values, transforms, codec, level):
+    values = numpy.ascontiguousarray(values)
+    for transform in transforms:
+        values = TRANSFORMS[transform][0](values)
+
+    return get_codec(codec)[0](values.tostring(), level)
+
+
+def decode_chunk(data, dtype, shape, transforms, codec):
+    values = numpy.fromstring(get_codec(codec)[1](data), dtype=dtype).reshape(shape)
+    for transform in reversed(transforms):
+        values = TRANSFORMS[transform][1](values)
+
+    return values
+
+
+def get_pool(threads):
+    return multiprocessing.pool.ThreadPool(threads or multiprocessing.cpu_count())
+
+
+def save_columns(array, path, codec=DEFAULT_CODEC, level=None, transforms=None, chunk_rows=DEFAULT_CHUNK_ROWS,
+                 threads=None):
+    """Writes the columns of a BlobArray of a plain child type into a compressed file.
+
+    transforms maps field names to a list of transforms, the other columns use get_default_transforms.
+    """
+
+    child_dtype = array.child_type.dtype
+    get_codec(codec)
+
+    # a task encodes the rows from begin to end of a column
+    columns = [(name, array.get_column(name, track=False)) for name in child_dtype.names]
+    capacity = len(columns[0][1])
+    tasks = []
+    column_transforms = {}
+    for name, column in columns:
+        column_transforms[name] = (transforms or {}).get(name, get_default_transforms(column.dtype))
+        for begin in xrange(0, capacity, chunk_rows):
+            tasks.append((name, column, begin, min(begin + chunk_rows, capacity)))
+
+    def encode(task):
+        name, column, begin, end = task
+        return encode_chunk(column[begin:end], column_transforms[name], codec, level)
+
+    pool = get_pool(threads)
+    try:
+        chunks = pool.map(encode, tasks)
+
+    finally:
+        pool.close()
+
+    index = {
+        'format': FORMAT_VERSION,
+        'type': array.child_type.__name__,
+        'schema': array.child_type.get_schema_fingerprint(),
+        'capacity': capacity,
+        'count': int(array.count),
+        'codec': codec,
+        'columns': []
+    }
+
+    with open(path, 'wb') as file_handle:
+        file_handle.write(MAGIC)
+        offset = len(MAGIC)
+
+        task_index = 0
+        for name, column in columns:
+            column_index = {
+                'name': name,
+                'dtype': column.dtype.base.str,
+                'shape': list(column.shape[1:]),
+                'transforms': column_transforms[name],
+                'chunks': []
+            }
+
+            while task_index < len(tasks) and tasks[task_index][0] == name:
+                task_name, task_column, begin, end = tasks[task_index]
+                data = chunks[task_index]
+                file_handle.write(data)
+                column_index['chunks'].append([offset, len(data), end - begin])
+                offset += len(data)
+                task_index += 1
+
+            index['columns'].append(column_index)
+
+        file_handle.write(json.dumps(index))
+        file_handle.write(struct.pack(TRAILER_FORMAT, offset, MAGIC))
+
+
+def read_index(file_handle):
+    """Returns the JSON index of a column file."""
+
+    if file_handle.read(len(MAGIC)) != MAGIC:
+        raise StorageException('%s is no column file' % getattr(file_handle, 'name', file_handle))
+
+    trailer_size = struct.calcsize(TRAILER_FORMAT)
+    file_handle.seek(-trailer_size, 2)
+    index_end = file_handle.tell()
+    index_offset, magic = struct.unpack(TRAILER_FORMAT, file_handle.read(trailer_size))
+
+    if magic != MAGIC:
+        raise StorageException('%s is incomplete' % getattr(file_handle, 'name', file_handle))
+
+    file_handle.seek(index_offset)
+    index = json.loads(file_handle.read(index_end - index_offset))
+
+    if index['format'] != FORMAT_VERSION:
+        raise StorageException('unsupported format version %s' % index['format'])
+
+    return index
+
+
+def read_columns(path, names=None, threads=None, index=None):
+    """Returns a dict of the columns names (by default all) of a column file, only their chunks are read."""
+
+    with open(path, 'rb') as file_handle:
+        if index is None:
+            index = read_index(file_handle)
+
+        tasks = []
+        for column_index in index['columns']:
+            if names is not None and column_index['name'] not in names:
+                continue
+
+            for offset, nbytes, rows in column_index['chunks']:
+                file_handle.seek(offset)
+                tasks.append((column_index, file_handle.read(nbytes), rows))
+
+    if names is not None:
+        missing = set(names) - set([column_index['name'] for column_index in index['columns']])
+        if missing:
+            raise StorageException('unknown columns %s in %s' % (', '.join(sorted(missing)), path))
+
+    def decode(task):
+        column_index, data, rows = task
+        shape = tuple([rows] + column_index['shape'])
+        return decode_chunk(data, numpy.dtype(str(column_index['dtype'])), shape, column_index['transforms'],
+                            index['codec'])
+
+    pool = get_pool(threads)
+    try:
+        values = pool.map(decode, tasks)
+
+    finally:
+        pool.close()
+
+    columns = {}
+    for (column_index, data, rows), chunk in zip(tasks, values):
+        columns.setdefault(str(column_index['name']), []).append(chunk)
+
+    return dict([(name, numpy.concatenate(chunks)) for name, chunks in columns.items()])
+
+
+def load_columns(array_type, path, threads=None):
+    """Creates a BlobArray of array_type with the columns of a file, which was written by save_columns."""
+
+    with open(path, 'rb') as file_handle:
+        index = read_index(file_handle)
+
+    if index['schema'] != array_type.child_type.get_schema_fingerprint():
+        raise StorageException('%s contains %s items with another schema than %s' % (
+            path, index['type'], array_type.child_type.__name__))
+
+    columns = read_columns(path, threads=threads, index=index)
+
+    capacity = index['capacity']
+    dtype_params = {array_type.CAPACITY_FIELD: capacity}
+    dtype, blob = array_type.allocate_blob(dtype_params=dtype_params)
+
+    for name, column in columns.items():
+        array_type.get_blob_column(blob, dtype, name)[...] = column
+
+    return array_type(blob=blob, dtype=dtype, dtype_params=dtype_params, capacity=capacity)
+
+
+def get_blob_header(blob_type, dtype_params, nbytes):
+    """Returns the header of a blob file, the blob starts at the returned offset."""
+
+    header = {
+        'format': FORMAT_VERSION,
+        'type': blob_type.__name__,
+        'schema': blob_type.get_schema_fingerprint(),
+        'dtype_params': dict([(key, int(value)) for key, value in dtype_params.items()]),
+        'nbytes': nbytes,
+    }
+
+    prefix_size = len(BLOB_MAGIC) + struct.calcsize(BLOB_HEADER_LENGTH_FORMAT)
+    header_size = prefix_size + len(json.dumps(header))
+    offset = (header_size + 32 + BLOB_DATA_ALIGNMENT - 1) // BLOB_DATA_ALIGNMENT * BLOB_DATA_ALIGNMENT
+    header['offset'] = offset
+
+    data = json.dumps(header)
+    assert prefix_size + len(data) <= offset
+    return BLOB_MAGIC + struct.pack(BLOB_HEADER_LENGTH_FORMAT, len(data)) + data, offset
+
+
+def save_blob(blob_object, path, dtype_params=None):
+    """Writes the blob of an object with a header, which describes its schema and dtype_params."""
+
+    blob_type = type(blob_object)
+    if dtype_params is None:
+        dtype_params = blob_type.get_dtype_params_from_blob(blob_object.blob)
+
+    blob_bytes = get_blob_bytes(blob_object.blob)
+    header, offset = get_blob_header(blob_type, dtype_params, blob_bytes.size)
+
+    with open(path, 'wb') as file_handle:
+        file_handle.write(header)
+        file_handle.write('\0' * (offset - len(header)))
+        file_handle.write(blob_bytes.tostring())
+
+
+def read_blob_header(file_handle, blob_type=None):
+    """Returns the header of a blob file, it fails if the schema differs from the blob_type."""
+
+    prefix = file_handle.read(len(BLOB_MAGIC) + struct.calcsize(BLOB_HEADER_LENGTH_FORMAT))
+    if prefix[:len(BLOB_MAGIC)] != BLOB_MAGIC:
+        raise StorageException('%s is no blob file' % getattr(file_handle, 'name', file_handle))
+
+    length, = struct.unpack(BLOB_HEADER_LENGTH_FORMAT, prefix[len(BLOB_MAGIC):])
+    header = json.loads(file_handle.read(length))
+
+    if header['format'] != FORMAT_VERSION:
+        raise StorageException('unsupported format version %s' % header['format'])
+
+    if blob_type is not None and header['schema'] != blob_type.get_schema_fingerprint():
+        raise StorageException('%s contains a %s with another schema than %s' % (
+            getattr(file_handle, 'name', file_handle), header['type'], blob_type.__name__))
+
+    header['dtype_params'] = dict([(str(key), value) for key, value in header['dtype_params'].items()])
+    return header
+
+
+def load_blob(blob_type, path):
+    """Creates an object of blob_type from a file, which was written by save_blob."""
+
+    with open(path, 'rb') as file_handle:
+        header = read_blob_header(file_handle, blob_type)
+        dtype_params = header['dtype_params']
+
+        dtype = blob_type.create_dtype(dtype_params=dtype_params)
+        if dtype.itemsize != header['nbytes']:
+            raise StorageException('%s contains %d bytes instead of %d' % (path, header['nbytes'], dtype.itemsize))
+
+        file_handle.seek(header['offset'])
+        blob = numpy.fromfile(file_handle, dtype=dtype, count=1)
+
+    if len(blob) != 1:
+        raise StorageException('%s is incomplete' % path)
+
+    return blob_type.from_blob(blob_type.unshape(blob), dtype_params=dtype_params)
@@ -0,0 +1,178 @@
+"""
+... is a submodule of [blob_types](__init__.html).
+It contains a helper, which uploads the blobs of Blob and BlobArray objects to an OpenCL device without blocking.
+
+A BlobTransfer owns a ring of device buffers and pinned (host mapped) staging buffers.
+Consecutive frames are uploaded into alternating buffers, so the upload of the next frame overlaps the kernel,
+which works on the previous one.
+
+    transfer = BlobTransfer(context, transfer_queue)
+    for frame in frames:
+        buffer, upload_event = transfer.upload(frame)
+        kernel_event = program.step(compute_queue, shape, None, buffer, wait_for=[upload_event])
+        transfer.release(buffer, kernel_event)
+
+The transfer queue should differ from the compute queue, unless the queue executes out of order.
+It works with any OpenCL runtime, e.g. a CPU runtime like pocl.
+
+A buffer, which is kept on the device, can be updated by the modified ranges of an object only,
+see [changes](./changes.html).
+"""
+
+import numpy
+
+from utils import get_blob_bytes
+
+
+class BlobTransferSlot(object):
+    """A device buffer with its staging buffer and the events, which guard their reuse."""
+
+    def __init__(self, context, queue, nbytes):
+        import pyopencl
+
+        self.nbytes = nbytes
+        self.buffer = pyopencl.Buffer(context, pyopencl.mem_flags.READ_WRITE, nbytes)
+
+        # the staging buffer is allocated by the runtime, so it is pinned memory which can be copied by DMA
+        self.staging_buffer = pyopencl.Buffer(
+            context,
+            pyopencl.mem_flags.READ_ONLY | pyopencl.mem_flags.ALLOC_HOST_PTR,
+            nbytes
+        )
+        self.staging, map_event = pyopencl.enqueue_map_buffer(
+            queue, self.staging_buffer, pyopencl.map_flags.WRITE, 0, (nbytes,), numpy.uint8
+        )
+        map_event.wait()
+
+        self.upload_event = None  # the last copy of the staging memory to the device
+        self.release_events = []  # the commands, which read the device buffer
+
+    def unmap(self, queue):
+        """Releases the mapping of the staging memory, the slot may not be used afterwards."""
+
+        self.staging.base.release(queue)
+        self.staging = None
+
+    def wait(self):
+        """Blocks until the staging memory may be overwritten."""
+
+        if self.upload_event is not None:
+            self.upload_event.wait()
+            self.upload_event = None
+
+
+class BlobTransfer(object):
+    """Uploads blobs with non-blocking copies into a ring of device buffers (double buffering by default)."""
+
+    def __init__(self, context, queue, nbytes=None, buffer_count=2):
+        assert buffer_count > 0, 'a transfer requires at least one buffer'
+
+        self.context = context
+        self.queue = queue
+        self.buffer_count = buffer_count
+        self.slots = []
+        self.index = 0
+
+        if nbytes is not None:
+            self.allocate(nbytes)
+
+    def allocate(self, nbytes):
+        """Allocates all buffers with nbytes, the previous buffers are released after their pending commands."""
+
+        self.finish()
+        for slot in self.slots:
+            slot.unmap(self.queue)
+
+        self.slots = [BlobTransferSlot(self.context, self.queue, nbytes) for index in xrange(self.buffer_count)]
+        self.index = 0
+
+    def get_slot(self, buffer):
+        for slot in self.slots:
+            if slot.buffer == buffer:
+                return slot
+
+        raise ValueError('the buffer is not owned by this transfer')
+
+    def upload(self, blob_object, wait_for=None):
+        """Starts the upload of a Blob, BlobArray or blob (numpy.ndarray) into the next device buffer.
+
+        Returns the device buffer and the event of the copy, the host is blocked only if the staging memory
+        of the buffer is still copied from a frame, which was uploaded buffer_count frames ago.
+        """
+
+        import pyopencl
+
+        blob = getattr(blob_object, 'blob', blob_object)
+        blob_bytes = get_blob_bytes(blob)
+        nbytes = blob_bytes.size
+
+        if not self.slots or nbytes > self.slots[0].nbytes:
+            self.allocate(nbytes)
+
+        slot = self.slots[self.index]
+        self.index = (self.index + 1) % len(self.slots)
+
+        # the copy into pinned memory is the only synchronous part
+        slot.wait()
+        slot.staging[:nbytes] = blob_bytes
+
+        # the device buffer is overwritten after the commands, which read the previous frame
+        events = list(slot.release_events)
+        if wait_for:
+            events.extend(wait_for)
+
+        slot.upload_event = pyopencl.enqueue_copy(
+            self.queue, slot.buffer, slot.staging[:nbytes], is_blocking=False, wait_for=events or None
+        )
+        slot.release_events = []
+
+        return slot.buffer, slot.upload_event
+
+    def release(self, buffer, *events):
+        """Marks the events of the commands, which read a device buffer, the next upload into it waits for them."""
+
+        self.get_slot(buffer).release_events.extend(events)
+
+    def update(self, buffer, blob_object, wait_for=None, clear=True):
+        """Starts the copy of the modified ranges of a tracked object into a buffer, which holds an older version.
+
+        The ranges are copied from the blob directly, so the blob must not be modified before the events are complete.
+        Returns the events of the copies.
+        """
+
+        import pyopencl
+
+        blob_bytes = get_blob_bytes(blob_object.blob)
+        events = []
+        for start, end in blob_object.dirty_ranges():
+            events.append(pyopencl.enqueue_copy(
+                self.queue, buffer, blob_bytes[start:end], device_offset=start, is_blocking=False, wait_for=wait_for
+            ))
+
+        if clear:
+            blob_object.clear_dirty()
+
+        return events
+
+    def download(self, buffer, blob_object, wait_for=None):
+        """Starts the copy of a device buffer back into the blob of an object and returns the event.
+
+        The blob must not be read before the event is complete.
+        """
+
+        import pyopencl
+
+        blob = getattr(blob_object, 'blob', blob_object)
+        return pyopencl.enqueue_copy(
+            self.queue, get_blob_bytes(blob), buffer, is_blocking=False, wait_for=wait_for
+        )
+
+    def finish(self):
+        """Blocks until all uploads and released commands are complete."""
+
+        for slot in self.slots:
+            slot.wait()
+            for event in slot.release_events:
+                event.wait()
+
+            slot.release_events = []
@@ -4,10 +4,25 @@ It contains abstract classes which help to build serializable data structures.
 """
 
 import logging
+import hashlib
 import numpy
 import json
 
-from utils import flat_struct, camel_case_to_underscore, underscore_to_camel_case, get_blob_index, diff_dtype, vector_fields, implode_float_n
+import utils
+import layout
+from changes import BlobBatch, DirtyRanges, get_view_range
+from hashing import get_byte_mask, hash_blob, hash_rows
+from utils import flat_struct, camel_case_to_underscore, underscore_to_camel_case, get_blob_index, diff_dtype, \
+    get_strided_view, get_blob_bytes, get_struct_column, get_struct_paths
+
+# vector field types, which are accessed as numpy.ndarray of their components
+float2 = layout.create_vector_dtype(numpy.float32, 2)
+float3 = layout.create_vector_dtype(numpy.float32, 3)
+float4 = layout.create_vector_dtype(numpy.float32, 4)
+int2 = layout.create_vector_dtype(numpy.int32, 2)
+int4 = layout.create_vector_dtype(numpy.int32, 4)
+
+CAPACITY_DTYPE = numpy.dtype(numpy.int32)  # the type of the capacity field of BlobArray
 
 def validate_dtype_params(function):
 
@@ -73,6 +88,13 @@ def process_dtype_params(function):
     return wrapper
 
 
+def restore_blob(blob_type, dtype_params, data):
+    """Creates an object of the raw bytes of a pickled blob, the dtype_params are known so there is no probing."""
+
+    # the bytes of the pickle are immutable, so they are copied once into a writable blob
+    return blob_type.from_bytes(numpy.frombuffer(data, numpy.uint8).copy(), dtype_params)
+
+
 class BlobValidationException(Exception):
     pass
 
@@ -102,6 +124,13 @@ class Blob(object):
     PADDING_FIELD_SUFFIX = '__padding'
 
     _dtypes = {} # map of known types for reuse and save memory
+
+    _dirty = None  # the DirtyRanges of the root object, if the tracking of changes is enabled
+    _dirty_offset = 0  # the offset of the blob in the blob of the root object
+    _shared_handle = None  # the SharedBlobHandle, if the object is attached from shared memory
+
+    trusted = False  # skips the checks of each object, if the blobs are validated in bulk, see [validation](./validation.html)
+
     @classmethod
     def is_complex(cls):
 
@@ -109,7 +138,7 @@ class Blob(object):
             return True
 
         for field, subtype in cls.subtypes:
-            if issubclass(subtype, Blob) and not issubclass(subtype, BlobEnum):
+            if type(subtype) == type and issubclass(subtype, Blob) and not issubclass(subtype, BlobEnum):
                 return True
 
         return False
@@ -126,6 +155,54 @@ class Blob(object):
 
         return True
 
+    @classmethod
+    def get_alignment(cls):
+        """Returns the alignment of the type, a complex type is aligned like its most aligned subtype."""
+
+        if cls.is_plain():
+            return layout.get_alignment(cls.create_dtype(dtype_params={}))
+
+        return max([1] + [Blob.get_subtype_alignment(subtype) for field, subtype in cls.subtypes])
+
+    @staticmethod
+    def get_subtype_alignment(subtype):
+        """Returns the alignment of a subtype, the offset of a subtype within a complex type is a multiple of it.
+
+        The root blob is aligned by the allocation, so the padding keeps the offsets within the buffer aligned too.
+        """
+
+        if type(subtype) == type and issubclass(subtype, Blob):
+            return subtype.get_alignment()
+
+        return 1
+
+    @classmethod
+    def get_schema(cls):
+        """Returns a description of the type structure, which is equal in all processes."""
+
+        fields = []
+        for field, subtype in cls.subtypes:
+            if type(subtype) == type and issubclass(subtype, Blob):
+                fields.append((field, subtype.get_schema()))
+
+            elif numpy.dtype(subtype).shape:
+                fields.append((field, numpy.dtype(subtype).base.str, numpy.dtype(subtype).shape))
+
+            else:
+                fields.append((field, numpy.dtype(subtype).str))
+
+        if hasattr(cls, 'dtype'):
+            return cls.__name__, fields, numpy.dtype(cls.dtype).descr
+
+        else:
+            return cls.__name__, fields
+
+    @classmethod
+    def get_schema_fingerprint(cls):
+        """Returns a hash of the type structure, which changes if the binary layout changes."""
+
+        return hashlib.sha1(repr(cls.get_schema())).hexdigest()
+
     @classmethod
     def get_dependencies(cls, recursive):
         dependencies = []
@@ -167,7 +244,7 @@ class Blob(object):
 
         elif hasattr(cls, 'subtypes'):
             for field, subtype in cls.subtypes:
-                if issubclass(subtype, Blob):
+                if type(subtype) == type and issubclass(subtype, Blob):
                     for item in subtype.get_dtype_param_keys():
                         keys.append('%s_%s' % (field, item))
 
@@ -209,15 +286,25 @@ class Blob(object):
         if hashable_dtype_params in cls._dtypes:
             return cls._dtypes[hashable_dtype_params]
 
+        offset = 0
         for field, subtype in cls.subtypes:
+            padding = layout.round_up(offset, Blob.get_subtype_alignment(subtype)) - offset
+            if padding:
+                subtypes.append(('%s%s' % (field, cls.PADDING_FIELD_SUFFIX), numpy.dtype((numpy.uint8, (padding,)))))
+
             subtype_params = cls.explode_dtype_params(field=field, dtype_params=dtype_params)
-            if issubclass(subtype, Blob):
-                subtypes.append((field, subtype.create_dtype(dtype_params=subtype_params)))
+            if type(subtype) == type and issubclass(subtype, Blob):
+                subtype_dtype = subtype.create_dtype(dtype_params=subtype_params)
 
             else:
-                subtypes.append((field, subtype))
+                subtype_dtype = subtype
+
+            subtypes.append((field, subtype_dtype))
+            offset += padding + numpy.dtype(subtype_dtype).itemsize
 
-        dtype, subtypes_ = Blob.create_plain_dtype(*subtypes)
+        # the members of complex types are packed, except the padding in front of aligned subtypes
+        dtype, subtypes_ = Blob._create_unaligned_dtype(*subtypes)
+        dtype = layout.pad_dtype(dtype, cls.get_alignment())
 
         cls._dtypes[hashable_dtype_params] = dtype
         return dtype
@@ -239,7 +326,7 @@ class Blob(object):
 
         elif hasattr(cls, 'subtypes'):
             for field, subtype in cls.subtypes:
-                if issubclass(subtype, Blob):
+                if type(subtype) == type and issubclass(subtype, Blob):
                     subtype_params[field] = subtype.get_subtypes_params()
 
         return flat_struct(subtype_params)
@@ -252,7 +339,7 @@ class Blob(object):
         subtypes_params = cls.get_subtypes_params()
         subtype_params = {}
         for key, params in subtypes_params.items():
-            if key.startswith(field):
+            if key.startswith(field_prefix):
                 subtype_param_key = key[len(field_prefix):]
 
                 assert key in dtype_params, 'assert %s in %s for subtype of %s' % (key, dtype_params, cls)
@@ -266,22 +353,27 @@ class Blob(object):
     @classmethod
     @validate_dtype_params
     def sizeof_dtype(cls, dtype_params):
+        if hasattr(cls, 'dtype'):
+            return numpy.dtype(cls.dtype).itemsize
+
         size = 0
 
         for field, subtype in cls.subtypes:
+            size = layout.round_up(size, Blob.get_subtype_alignment(subtype))
+
             subtype_params = cls.explode_dtype_params(field=field, dtype_params=dtype_params)
-            if issubclass(subtype, Blob):
+            if type(subtype) == type and issubclass(subtype, Blob):
                 subtype_size = subtype.sizeof_dtype(dtype_params=subtype_params)
 
             elif numpy.issctype(subtype):
-                subtype_size = subtype().nbytes
+                subtype_size = numpy.dtype(subtype).itemsize
 
             else:
                 raise NotImplementedError
 
             size += subtype_size
 
-        return size
+        return layout.round_up(size, cls.get_alignment())
 
     @classmethod
     @validate_dtype_params
@@ -292,17 +384,24 @@ class Blob(object):
 
         if hasattr(cls, 'subtypes'):
             for subtype_field, subtype in cls.subtypes:
+                offset = layout.round_up(offset, Blob.get_subtype_alignment(subtype))
                 subtype_params = cls.explode_dtype_params(field=subtype_field, dtype_params=dtype_params)
 
                 if filter(lambda item: item is None, subtype_params.values()):
                     subtype_params = subtype.get_dtype_params_from_blob(blob, offset=offset)
 
-                if issubclass(subtype, Blob):
-                    subtype_dtype, subtype_blob = subtype.cast_blob(blob=blob, offset=offset, dtype_params=subtype_params)
+                if type(subtype) == type and issubclass(subtype, Blob):
+                    # only the requested blob is casted, the others are skipped by their size
+                    if field is None or field == subtype_field:
+                        subtype_dtype, subtype_blob = subtype.cast_blob(blob=blob, offset=offset, dtype_params=subtype_params)
+
+                    else:
+                        subtype_blob = None
+
                     subtype_byte_count = subtype.sizeof_dtype(dtype_params=subtype_params)
                 else:
                     subtype_blob = None
-                    subtype_byte_count = subtype().itemsize
+                    subtype_byte_count = numpy.dtype(subtype).itemsize
 
                 if field == subtype_field:
                     return subtype_blob
@@ -329,7 +428,7 @@ class Blob(object):
             assert len(blobs) == len(cls.subtypes), '%s has an invalid explode_blob implementation ' % cls
 
             for field, subtype in cls.subtypes:
-                if issubclass(subtype, Blob):
+                if type(subtype) == type and issubclass(subtype, Blob):
                     subtype_params = cls.explode_dtype_params(field=field, dtype_params=dtype_params)
                     subtype.init_blob(blob=blobs[field], dtype_params=subtype_params)
 
@@ -355,7 +454,7 @@ class Blob(object):
 
     @classmethod
     def create_plain_dtype(cls, *subtypes):
-        if implode_float_n:
+        if utils.implode_float_n:
             return cls._create_aligned_dtype(*subtypes)
 
         else:
@@ -363,22 +462,44 @@ class Blob(object):
 
     @classmethod
     def _create_unaligned_dtype(cls, *subtypes):
+        """Concatenates the components, the offsets within nested dtypes are kept."""
+
+        names, formats, offsets = [], [], []
+        offset = 0
+
+        def append_fields(field, sub_dtype):
+            for name in sub_dtype.names:
+                field_dtype, field_offset = sub_dtype.fields[name][:2]
+                names.append('%s_%s' % (field, name))
+                formats.append(field_dtype)
+                offsets.append(offset + field_offset)
+
+            return sub_dtype.itemsize
 
-        dtype_components = []
         for index, component in enumerate(subtypes):
             field, subtype = component
 
-            if numpy.issctype(subtype):
+            if isinstance(subtype, numpy.dtype) and subtype.shape:
+                names.append(field)
+                formats.append(subtype)
+                offsets.append(offset)
+                offset += subtype.itemsize
+
+            elif numpy.issctype(subtype):
                 if hasattr(subtype, 'descr'):
-                    for name, sub_dtype in subtype.descr:
-                        subfield = '%s_%s' % (field, name)
-                        dtype_components.append((subfield, sub_dtype))
+                    offset += append_fields(field, subtype)
 
                 else:
-                    dtype_components.append(component)
+                    names.append(field)
+                    formats.append(subtype)
+                    offsets.append(offset)
+                    offset += numpy.dtype(subtype).itemsize
 
             elif issubclass(subtype, BlobEnum):
-                dtype_components.append((field, BlobEnum.dtype))
+                names.append(field)
+                formats.append(BlobEnum.dtype)
+                offsets.append(offset)
+                offset += numpy.dtype(BlobEnum.dtype).itemsize
 
             elif issubclass(subtype, Blob) and subtype.is_plain():
                 if hasattr(subtype, 'dtype'):
@@ -387,45 +508,19 @@ class Blob(object):
                 else:
                     sub_dtype, subtype_requirements = subtype.create_plain_dtype(*subtype.subtypes)
 
-                for name, sub_dtype in sub_dtype.descr:
-                    subfield = '%s_%s' % (field, name)
-                    dtype_components.append((subfield, sub_dtype))
+                offset += append_fields(field, sub_dtype)
 
             else:
                 raise NotImplementedError()
 
-        return numpy.dtype(dtype_components), subtypes
+        return numpy.dtype({'names': names, 'formats': formats, 'offsets': offsets, 'itemsize': offset}), subtypes
 
     @classmethod
     def _create_aligned_dtype(cls, *subtypes):
+        """Creates a dtype with the layout of a (not packed) OpenCL struct, see [layout](./layout.html)."""
 
-        dtype_components = []
-        for index, component in enumerate(subtypes):
-            dtype_components.append(component)  #todo: add components of subfields of type blob
-            field, subtype = component
-
-            # determine padding attributes
-            is_last_of_vector = False
-            prefix, suffix = '_'.join(field.split('_')[:-1]), field.split('_')[-1]
-            vector_index = None
-            for vector_field in vector_fields:
-                if suffix in vector_field:
-                    vector_index = vector_field.index(suffix)
-
-                    if vector_index == len(vector_field) - 1:
-                        is_last_of_vector = True
-
-                    elif index < len(subtypes) - 1 and subtypes[index + 1][0].endswith(vector_field[vector_index + 1]):
-                        is_last_of_vector = False
-
-                    else:
-                        is_last_of_vector = True
-
-            # add padding
-            if is_last_of_vector and vector_index == 2:
-                dtype_components.append(('_%s%s' % (field, cls.PADDING_FIELD_SUFFIX), subtype))
-
-        return numpy.dtype(dtype_components), subtypes
+        dtype, subtypes = cls._create_unaligned_dtype(*subtypes)
+        return layout.create_aligned_dtype(layout.get_components(dtype)), subtypes
 
     @classmethod
     def from_struct(cls, struct, blob=None, dtype=None, dtype_params=None, **kwargs):
@@ -457,7 +552,7 @@ class Blob(object):
         for field, subtype in cls.subtypes:
             parent_field_ = '%s_%s' % (parent_field, field)
 
-            if key.startswith(parent_field_):
+            if key == parent_field_ or key.startswith(parent_field_ + '_'):
                 subkey = subtype.get_field_by_param_key(key, parent_field_)
 
                 if key == subkey:
@@ -470,6 +565,19 @@ class Blob(object):
 
         raise NotImplementedError()
 
+    @classmethod
+    def get_dtype_param_fields(cls):
+        """Returns a map of the dtype param keys to the flat dtype fields, which contain their values."""
+
+        dtype_param_fields = {}
+
+        for field, subtype in cls.subtypes:
+            for key in cls.get_dtype_param_keys():
+                if key not in dtype_param_fields and (key == field or key.startswith(field + '_')):
+                    dtype_param_fields[key] = subtype.get_field_by_param_key(key, field)
+
+        return dtype_param_fields
+
     @classmethod
     def get_dtype_params_from_struct(cls, struct):
 
@@ -482,41 +590,48 @@ class Blob(object):
         return dtype_params
 
     @classmethod
-    def get_dtype_params_from_blob(cls, blob):
+    def read_dtype_params(cls, blob_bytes, offset, dtype_params, prefix=''):
+        """Reads the dtype_params of an object at offset of the blob bytes into dtype_params.
 
-        dtype_param_keys = cls.get_dtype_param_keys()
-        dtype_params = cls.get_dummy_dtype_params()
-        done_keys = []
+        Returns the size of the object, which is the offset of the next field.
+        """
+
+        if cls.is_plain():
+            return numpy.dtype(cls.create_dtype(dtype_params={})).itemsize
 
+        size = 0
         for field, subtype in cls.subtypes:
-            for key in dtype_param_keys:
-                if key not in done_keys and key.startswith(field):
-                    done_keys.append(key)
+            size = layout.round_up(size, Blob.get_subtype_alignment(subtype))
+            if type(subtype) == type and issubclass(subtype, Blob):
+                size += subtype.read_dtype_params(blob_bytes, offset + size, dtype_params, '%s%s_' % (prefix, field))
 
-                    dummy_dtype, dummy_blob = cls.cast_blob(blob=blob, offset=0, dtype_params=dtype_params)
-                    key_field = subtype.get_field_by_param_key(key, field)
-                    index = get_blob_index(dummy_dtype, key_field)
-                    assert index is not None, 'dtype has no field %s' % key_field
-                    value = dummy_blob[index]
+            else:
+                size += numpy.dtype(subtype).itemsize
 
-                    if value > cls.MAX_DTYPE_PARAM:
-                        raise BlobValidationException(
-                            'dtype param %s must be smaller than %d (%d)' % (key, cls.MAX_DTYPE_PARAM, value))
+        return layout.round_up(size, cls.get_alignment())
 
-                    if value < 1:
-                        raise BlobValidationException(
-                            'dtype param %s must be positive (%d)' % (key, value))
+    @classmethod
+    def get_dtype_params_from_blob(cls, blob, offset=0):
+        """Reads the dtype_params in a single pass over the bytes of the blob.
 
-                    dtype_params[key] = value
+        The values are read at their offsets, which are calculated of the values in front of them,
+        so no dummy dtypes are created.
+        """
 
-        assert dtype_param_keys == done_keys, '%s = %s' % (dtype_param_keys, done_keys)
+        dtype_params = {}
+        cls.read_dtype_params(get_blob_bytes(blob), offset, dtype_params)
+
+        assert sorted(dtype_params.keys()) == sorted(cls.get_dtype_param_keys()), \
+            '%s = %s' % (dtype_params.keys(), cls.get_dtype_param_keys())
 
         return dtype_params
 
     @classmethod
-    def from_blob(cls, blob):
+    def from_blob(cls, blob, dtype_params=None):
+        """Creates an object of a blob, the dtype_params are read from the blob if they are unknown."""
 
-        dtype_params = cls.get_dtype_params_from_blob(blob)
+        if dtype_params is None:
+            dtype_params = cls.get_dtype_params_from_blob(blob)
 
         if blob.dtype.kind in ['V', 'S']: # is void
             dtype, blob = cls.cast_blob(blob=blob, offset=0, dtype_params=dtype_params)
@@ -524,7 +639,7 @@ class Blob(object):
         else:
             dtype = cls.create_dtype(dtype_params=dtype_params)
 
-        assert blob.dtype == dtype, diff_dtype(blob.dtype, dtype)
+        assert Blob.trusted or blob.dtype == dtype, diff_dtype(blob.dtype, dtype)
 
         try:
             return cls(blob=blob, dtype=dtype, dtype_params=dtype_params)
@@ -533,6 +648,34 @@ class Blob(object):
             logging.warn('%s.%s', cls, ex)
             raise
 
+    @classmethod
+    def from_bytes(cls, blob_bytes, dtype_params=None):
+        """Creates an object, whose blob is a view of a numpy.uint8 array, without probing the dtype_params."""
+
+        if dtype_params is None:
+            dtype_params = cls.get_dtype_params_from_blob(blob_bytes)
+
+        dtype = cls.create_dtype(dtype_params=dtype_params)
+        return cls.from_blob(cls.unshape(blob_bytes.view(dtype)), dtype_params=dtype_params)
+
+    def clone(self, copy_on_write=False):
+        """Returns a copy of the object, the blob is copied at once and the dtype_params are not probed again.
+
+        A copy on write clone maps the file of a frozen SharedBlobHandle privately, see [shared](./shared.html).
+        So the pages are shared, until the clone writes them.
+        It requires an object, which is attached read-only from a frozen handle, so the source is not written later.
+        """
+
+        if copy_on_write:
+            handle = self._shared_handle
+            if handle is None or not handle.frozen or self._blob.flags.writeable:
+                raise ValueError('a copy on write clone requires an object, which is attached read-only '
+                                 'from a frozen SharedBlobHandle')
+
+            return handle.attach(copy_on_write=True)
+
+        return type(self).from_bytes(get_blob_bytes(self._blob).copy(), self.dtype_params)
+
     @property
     def blob(self):
         """Space of binary memory (numpy.ndarray)."""
@@ -541,11 +684,12 @@ class Blob(object):
 
     @property
     def dtype_params(self):
-        result = {}
-        for key in self.get_dtype_param_keys():
-            result[key] = self.__getattribute__(key)
+        """The dtype_params of the blob, they are read from the blob only if the object was created without them."""
+
+        if self._dtype_params is not None and sorted(self._dtype_params) == sorted(self.get_dtype_param_keys()):
+            return dict(self._dtype_params)
 
-        return result
+        return self.get_dtype_params_from_blob(self._blob)
 
     def __init__(self, blob=None, dtype_params=None, dtype=None, **fields):
         """Initializes the object."""
@@ -561,46 +705,29 @@ class Blob(object):
         assert dtype is not None
 
         # determine blob properties
-        blob_properties = zip(*dtype.descr)
-        assert len(blob_properties) == 2
-        assert len(blob_properties[0]) > 0, 'a Blob must encapsulate more than one variable: %s' % blob_properties
+        assert dtype.names, 'a Blob must encapsulate more than one variable: %s' % dtype
 
         # init object
-        self._blob_fields_, self._blob_field_offsets = blob_properties
+        self._blob_fields_ = dtype.names
+        self._blob_field_offsets = tuple([dtype.fields[name][0].base.str for name in dtype.names])
         self._blob = blob
         self.dtype = dtype
 
-        # init subtypes
-        if hasattr(self, 'subtypes') and len(self.subtypes) > 0:
-            blobs = self.explode_blob(blob=blob, dtype_params=dtype_params)
-            for subtype_field, subtype_blob in blobs.items():
-                if subtype_field in fields:
-                    value = fields.pop(subtype_field)
-                    setattr(self, subtype_field, value)
-                    continue
-
-                subtype_cls = None
-                for name_, type_ in self.subtypes:
-                    if subtype_field == name_:
-                        subtype_cls = type_
-                        break
-
-                if issubclass(subtype_cls, Blob) and not issubclass(subtype_cls, BlobEnum):
-                    value = subtype_cls.from_blob(subtype_blob)
-                    setattr(self, subtype_field, value)
+        # the nested objects are created on their first access, see __getattr__
+        self._dtype_params = dtype_params
 
-        # init plain fields
+        # init fields
         for field, value in fields.items():
             setattr(self, field, value)
 
-        assert self.dtype == blob.dtype, diff_dtype(self.dtype, blob.dtype)
+        assert Blob.trusted or self.dtype == blob.dtype, diff_dtype(self.dtype, blob.dtype)
 
     def _init_from_struct(self, struct, blob):
         """Copy all elements of a struct into the blob."""
         assert blob.dtype == self.dtype
         cls = type(self)
 
-        struct = flat_struct(struct)
+        struct = cls.group_vector_components(flat_struct(struct), self.dtype)
 
         # copy elements 
         for name, value in struct.items():
@@ -618,6 +745,17 @@ class Blob(object):
         for name, _name in map(lambda name_: (name_, underscore_to_camel_case(name_)), self._blob_fields_):
             assert name in struct or _name in struct or name.endswith(cls.PADDING_FIELD_SUFFIX),  'uninitialized key %s/%s in %s' % (name, _name, type(self))
 
+    @classmethod
+    def group_vector_components(cls, struct, dtype):
+        """Joins the components of vector fields in a flat struct, which are flattened like lists."""
+
+        for name in dtype.names:
+            shape = dtype.fields[name][0].shape
+            if shape and '%s_0' % name in struct:
+                struct[name] = [struct.pop('%s_%d' % (name, index)) for index in xrange(shape[0])]
+
+        return struct
+
     def _data_property_type(self, name):
         """Get a function that casts the blob element to the correct python type."""
         property_index = self._blob_fields_.index(name)
@@ -643,9 +781,113 @@ class Blob(object):
                 self._blob[name] = value
             except:
                 raise
+
+            if self._dirty is not None:
+                field_dtype, field_offset = self.dtype.fields[name][:2]
+                self.mark_dirty(field_offset, field_dtype.itemsize)
         else:
             object.__setattr__(self, name, value)
 
+    def get_nested_objects(self):
+        """Returns the nested Blob objects, which are created already and share the blob of this object."""
+
+        objects = []
+        for field, subtype in self.subtypes:
+            if type(subtype) == type and issubclass(subtype, Blob) and not issubclass(subtype, BlobEnum) \
+                    and field in self.__dict__:
+                objects.append(self.__dict__[field])
+
+        return objects
+
+    def track_changes(self, gap=DirtyRanges.DEFAULT_GAP, dirty=None, offset=0):
+        """Enables the tracking of modified byte ranges of the blob, see [changes](./changes.html).
+
+        The nested objects share the DirtyRanges, whose ranges are relative to the blob of this object.
+        """
+
+        if dirty is None:
+            dirty = DirtyRanges(gap)
+
+        object.__setattr__(self, '_dirty', dirty)
+        object.__setattr__(self, '_dirty_offset', offset)
+
+        blob_bytes = get_blob_bytes(self.blob)
+        for nested_object in self.get_nested_objects():
+            nested_offset = get_view_range(blob_bytes, get_blob_bytes(nested_object.blob))[0]
+            nested_object.track_changes(dirty=dirty, offset=offset + nested_offset)
+
+    def mark_dirty(self, offset=0, nbytes=None):
+        """Marks nbytes at offset of the blob as modified, by default the whole blob."""
+
+        if self._dirty is None:
+            return
+
+        if nbytes is None:
+            nbytes = self.dtype.itemsize - offset
+
+        start = self._dirty_offset + offset
+        self._dirty.add(start, start + nbytes)
+
+    def mark_view_dirty(self, view):
+        """Marks the bytes of a numpy.ndarray view into the blob as modified."""
+
+        if self._dirty is None:
+            return
+
+        start, end = get_view_range(get_blob_bytes(self.blob), view)
+        self.mark_dirty(start, end - start)
+
+    def dirty_ranges(self):
+        """Returns the coalesced (start, end) byte ranges, which were modified since the last clear_dirty."""
+
+        if self._dirty is None:
+            return []
+
+        return self._dirty.ranges()
+
+    def clear_dirty(self):
+        if self._dirty is not None:
+            self._dirty.clear()
+
+    def batch(self):
+        """Returns a BlobBatch, which collects field writes and applies them at once, see [changes](./changes.html)."""
+
+        return BlobBatch(self, self._blob_fields_)
+
+    def apply_batch(self, writes):
+        """Writes the last value of each field of a BlobBatch, the written bytes are marked once."""
+
+        start, end = None, None
+        for name, (indices, values) in writes.items():
+            self._blob[name] = values[-1]
+
+            field_dtype, field_offset = self.dtype.fields[name][:2]
+            if start is None:
+                start, end = field_offset, field_offset + field_dtype.itemsize
+
+            else:
+                start, end = min(start, field_offset), max(end, field_offset + field_dtype.itemsize)
+
+        if start is not None:
+            self.mark_dirty(start, end - start)
+
+    def content_hash(self, ignore_padding=False):
+        """Returns a sha1 hex digest of the schema and the bytes of the blob, see [hashing](./hashing.html)."""
+
+        return hash_blob(
+            self.blob,
+            padding_suffix=self.PADDING_FIELD_SUFFIX if ignore_padding else None,
+            salt=self.get_schema_fingerprint()
+        )
+
+    def __reduce__(self):
+        """Pickles the type, the dtype_params and the raw bytes of the blob instead of the object graph.
+
+        The state of the python object (e.g. the tracking of changes) is not pickled.
+        """
+
+        return restore_blob, (type(self), self.dtype_params, get_blob_bytes(self._blob).tostring())
+
     def __eq__(self, other):
         """Compares the representation of each field and return false, if one differs.
 
@@ -673,6 +915,11 @@ class Blob(object):
         if not name in ['_blob_fields_', '_blob_field_offsets', 'dtype'] and \
                 hasattr(self, '_blob_fields_') and name in self._blob_fields_:
             value = self._blob[name]
+
+            # fields with a shape are accessed as numpy.ndarray
+            if self.dtype.fields[name][0].shape:
+                return value
+
             cast = self._data_property_type(name)
 
             if value.shape != ():
@@ -687,6 +934,35 @@ class Blob(object):
         else:
             return object.__getattribute__(self, name)
 
+    def __getattr__(self, name):
+        """Creates the object of a nested Blob field on its first access and keeps it as attribute.
+
+        So the creation of an object does not depend on the depth of its nested types.
+        """
+
+        cls = type(self)
+        if name.startswith('_') or not hasattr(cls, 'subtypes'):
+            raise AttributeError(name)
+
+        for field, subtype in cls.subtypes:
+            if field == name and type(subtype) == type and issubclass(subtype, Blob) and not issubclass(subtype, BlobEnum):
+                break
+
+        else:
+            raise AttributeError('%s has no attribute %s' % (cls.__name__, name))
+
+        # the dtype_params are known already, so the nested blobs are not probed again
+        subtype_params = cls.explode_dtype_params(field=name, dtype_params=self._dtype_params)
+        subtype_blob = cls.explode_blob(blob=self._blob, dtype_params=self._dtype_params, field=name)
+        nested_object = subtype.from_blob(subtype_blob, dtype_params=subtype_params)
+
+        if self._dirty is not None:
+            nested_offset = get_view_range(get_blob_bytes(self._blob), get_blob_bytes(nested_object.blob))[0]
+            nested_object.track_changes(dirty=self._dirty, offset=self._dirty_offset + nested_offset)
+
+        object.__setattr__(self, name, nested_object)
+        return nested_object
+
     def _repr_json_(self):
 
         fields = []
@@ -699,6 +975,9 @@ class Blob(object):
                 else:
                     value = '%s' % getattr(self, field)._repr_json_()
 
+            elif numpy.dtype(subtype).shape:
+                value = json.dumps(getattr(self, field).tolist())
+
             else:
                 value = '%s' % getattr(self, field)
 
@@ -713,7 +992,13 @@ class Blob(object):
         """
         struct = {}
         for name in self._blob_fields_:
-            struct[underscore_to_camel_case(name)] = self.__getattribute__(name)
+            value = self.__getattribute__(name)
+
+            # vector fields are copied, a struct does not share memory with the blob
+            if isinstance(value, numpy.ndarray):
+                value = value.tolist()
+
+            struct[underscore_to_camel_case(name)] = value
         return struct
 
 
@@ -740,6 +1025,57 @@ class BlobArrayIterator(object):
                 raise StopIteration
 
 
+class BlobArrayItem(object):
+    """Accesses an item of a BlobArray with structure of arrays layout through the columns."""
+
+    def __init__(self, array, index):
+        object.__setattr__(self, '_array', array)
+        object.__setattr__(self, '_index', index)
+
+    @property
+    def dtype(self):
+        return self._array.child_type.dtype
+
+    def __getattr__(self, name):
+        if name.startswith('_') or name not in self.dtype.names:
+            raise AttributeError(name)
+
+        value = self._array.get_column(name, track=False)[self._index]
+
+        if isinstance(value, numpy.ndarray):
+            return value
+
+        return value.item()
+
+    def __setattr__(self, name, value):
+        if name not in self.dtype.names:
+            raise AttributeError('%s has no field %s' % (self._array.child_type, name))
+
+        column = self._array.get_column(name, track=False)
+        column[self._index] = value
+        self._array.mark_view_dirty(column[self._index:self._index + 1])
+
+    def __eq__(self, other):
+        for field in self.dtype.names:
+            if repr(getattr(self, field)) != repr(getattr(other, field)):
+                return False
+        return True
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def to_struct(self):
+        """Generates a struct from the column values of the item."""
+        struct = {}
+        for name in self.dtype.names:
+            value = getattr(self, name)
+            if isinstance(value, numpy.ndarray):
+                value = value.tolist()
+
+            struct[underscore_to_camel_case(name)] = value
+        return struct
+
+
 class BlobArray(Blob):
     """Encapsulates an array of Blob.
     
@@ -754,11 +1090,19 @@ class BlobArray(Blob):
     It must implement the following:
         
         child_type     # the Blob-type of the array elements
+
+    The items are stored as array of structs by default.
+    Arrays of plain child types can set layout = BlobArray.SOA_LAYOUT to store a column per child field instead,
+    which allows coalesced access of a field by adjacent work-items.
         
     """
 
     child_type = None  # must be overridden by specialized class
 
+    AOS_LAYOUT = 'aos'
+    SOA_LAYOUT = 'soa'
+    layout = AOS_LAYOUT
+
     STATIC_FIELDS_BYTES = 8
     CAPACITY_FIELD = 'capacity'
     COUNT_FIELD_NAME = 'count'
@@ -774,6 +1118,43 @@ class BlobArray(Blob):
     def get_item_field(cls, index, name):
         return 'item_%d_%s' % (index, name)
 
+    @classmethod
+    def get_items_offset(cls):
+        """Returns the offset of the first item, which is aligned for aligned child types."""
+
+        return layout.round_up(cls.STATIC_FIELDS_BYTES, cls.child_type.get_alignment())
+
+    @classmethod
+    def get_alignment(cls):
+        """Returns the alignment of the items, so the items are aligned within the blob of a complex parent."""
+
+        return cls.child_type.get_alignment()
+
+    @classmethod
+    def is_soa(cls):
+        """Returns True, if the items are stored as structure of arrays."""
+
+        return cls.layout == cls.SOA_LAYOUT
+
+    @classmethod
+    def get_blob_column(cls, blob, dtype, name):
+        """Returns a numpy.ndarray view of the child field name over all items of a blob."""
+
+        if cls.is_soa():
+            return blob[name]
+
+        first_field, second_field = cls.get_item_field(0, cls.INDEX_FIELD), cls.get_item_field(1, cls.INDEX_FIELD)
+        items_space = dtype.itemsize - dtype.fields[first_field][1]
+        if second_field in dtype.fields:
+            stride = dtype.fields[second_field][1] - dtype.fields[first_field][1]
+
+        else:
+            stride = items_space
+
+        field_dtype, offset = dtype.fields[cls.get_item_field(0, name)][:2]
+
+        return get_strided_view(blob, field_dtype, offset, items_space // stride, stride)
+
     @classmethod
     @process_dtype_params
     def create_dtype(cls, dtype_params):
@@ -799,20 +1180,64 @@ class BlobArray(Blob):
         type(capacity), capacity)
         capacity = int(capacity)
 
-        dtype_components = cls.dtype_static_components[:]
-
-        assert capacity < 1000000
+        assert capacity < 1000000 or cls.is_soa()
 
-        for index in xrange(capacity):
-            for name, dtype in child_dtype.descr:
-                dtype_components.append((cls.get_item_field(index, name), dtype))
+        names, formats, offsets = [], [], []
+        offset = 0
+        for name, static_dtype in cls.dtype_static_components:
+            names.append(name)
+            formats.append(static_dtype)
+            offsets.append(offset)
+            offset += numpy.dtype(static_dtype).itemsize
+
+        items_offset = cls.get_items_offset()
+
+        if cls.is_soa():
+            assert cls.child_type.is_plain(), 'the child_type of %s must be plain for the soa layout' % cls
+            static_names = set(name for name, static_dtype in cls.dtype_static_components)
+            clashing_names = static_names.intersection(child_dtype.names)
+            assert not clashing_names, 'the fields %s of %s clash with the columns of the soa layout' % (
+                ', '.join(sorted(clashing_names)), cls.child_type)
+
+            for name in child_dtype.names:
+                field_dtype, field_offset = child_dtype.fields[name][:2]
+                names.append(name)
+                formats.append((field_dtype, (capacity,)))
+                offsets.append(items_offset + capacity * field_offset)
 
-        dtype = numpy.dtype(dtype_components)
+        else:
+            for index in xrange(capacity):
+                item_offset = items_offset + index * child_dtype.itemsize
+                for name in child_dtype.names:
+                    field_dtype, field_offset = child_dtype.fields[name][:2]
+                    names.append(cls.get_item_field(index, name))
+                    formats.append(field_dtype)
+                    offsets.append(item_offset + field_offset)
+
+        dtype = numpy.dtype({
+            'names': names,
+            'formats': formats,
+            'offsets': offsets,
+            'itemsize': items_offset + capacity * child_dtype.itemsize
+        })
 
         cls._dtypes[hashable_dtype_params] = dtype
 
         return dtype
 
+    @classmethod
+    def get_schema(cls):
+        """Returns a description of the type structure including the layout, the offset and alignment of the items."""
+
+        if cls.child_type.is_plain():
+            items_alignment = layout.get_alignment(cls.child_type.dtype)
+
+        else:
+            items_alignment = None
+
+        return cls.__name__, [(cls.CAPACITY_FIELD, cls.COUNT_FIELD_NAME), cls.child_type.get_schema()], \
+            cls.layout, cls.get_items_offset(), items_alignment
+
     @classmethod
     def get_dependencies(cls, recursive):
         """Returns all recursive required Blob-types."""
@@ -860,7 +1285,7 @@ class BlobArray(Blob):
 
         child_dtype, capacity = cls.create_child_dtype(dtype_params=dtype_params)
 
-        metadata_size = numpy.dtype(cls.dtype_static_components).itemsize
+        metadata_size = cls.get_items_offset()
         content_size = child_dtype.itemsize * capacity
 
         return metadata_size + content_size
@@ -877,6 +1302,10 @@ class BlobArray(Blob):
         blob[get_blob_index(dtype, cls.CAPACITY_FIELD)] = capacity
         blob[get_blob_index(dtype, cls.COUNT_FIELD_NAME)] = 0
 
+        if cls.is_soa():
+            blob[cls.INDEX_FIELD] = -1
+            return
+
         for index in range(capacity):
             item_blob = cls.get_item_blob(blob=blob, index=index, child_dtype=child_dtype)
             cls.child_type.init_blob(blob=item_blob, dtype_params=dtype_params)
@@ -893,15 +1322,16 @@ class BlobArray(Blob):
             child_dtype = cls.child_type.dtype
 
         # get offset
-        offset = cls.STATIC_FIELDS_BYTES
+        items_offset = cls.get_items_offset()
+        offset = items_offset
         offset += child_dtype.itemsize * index
 
-        assert cls.STATIC_FIELDS_BYTES + child_dtype.itemsize * index + child_dtype.itemsize <= blob.size * blob.itemsize, \
+        assert Blob.trusted or items_offset + child_dtype.itemsize * index + child_dtype.itemsize <= blob.size * blob.itemsize, \
             '%s: dtype:%d + %d * %d + %d = %d <= blob:%d * %d = %d' % (
                 repr(cls),
-                cls.STATIC_FIELDS_BYTES, child_dtype.itemsize,
+                items_offset, child_dtype.itemsize,
                 index, child_dtype.itemsize,
-                (cls.STATIC_FIELDS_BYTES + child_dtype.itemsize * index + child_dtype.itemsize),
+                (items_offset + child_dtype.itemsize * index + child_dtype.itemsize),
                 blob.size, blob.itemsize,
                 blob.nbytes
             )
@@ -916,9 +1346,11 @@ class BlobArray(Blob):
         return item_blob
 
     @classmethod
-    def from_blob(cls, blob):
+    def from_blob(cls, blob, dtype_params=None):
+
+        if dtype_params is None:
+            dtype_params = cls.get_dtype_params_from_blob(blob=blob)
 
-        dtype_params = cls.get_dtype_params_from_blob(blob=blob)
         dtype, casted_blob = cls.cast_blob(blob=blob, offset=0, dtype_params=dtype_params)
 
         try:
@@ -943,10 +1375,47 @@ class BlobArray(Blob):
         if hasattr(cls, '_preprocess_struct'):
             struct = cls._preprocess_struct(struct)
 
+        if cls.is_soa():
+            if dtype is None:
+                dtype = blob.dtype
+
+            # the items are created by the scan in __init__
+            cls.init_items_from_struct(blob, dtype, struct)
+
+            return cls(blob, dtype=dtype, dtype_params=dtype_params, capacity=dtype.fields[cls.INDEX_FIELD][0].shape[0])
+
         # init and add items
+        items = cls.init_items_from_struct(blob, dtype, struct)
+
+        # the struct may fill a part of the items only
+        capacity = dtype_params[cls.CAPACITY_FIELD] if dtype_params else None
+
+        # init object
+        self = cls(blob, dtype=dtype, dtype_params=dtype_params, items=items, capacity=capacity)
+
+        return self
+
+    @classmethod
+    def init_items_from_struct(cls, blob, dtype, struct, start=0):
+        """Writes a list of child structs into the items from index start on.
+
+        Returns the child objects of arrays of structs, the items of structures of arrays are written into the columns.
+        """
+
+        if cls.is_soa():
+            if dtype is None:
+                dtype = blob.dtype
+
+            for index, child_struct in enumerate(struct, start):
+                child_struct = cls.group_vector_components(flat_struct(child_struct), cls.child_type.dtype)
+                for name, value in child_struct.items():
+                    cls.get_blob_column(blob, dtype, camel_case_to_underscore(name))[index] = value
+
+            return []
+
         child_dtype = None
         items = []
-        for index, child_struct in enumerate(struct):
+        for index, child_struct in enumerate(struct, start):
             if child_dtype is None:
                 child_dtype = cls.child_type.dtype
 
@@ -954,10 +1423,41 @@ class BlobArray(Blob):
             child = cls.child_type.from_struct(struct=child_struct, blob=child_blob, dtype=child_dtype)
             items.append(child)
 
-        # init object
-        self = cls(blob, dtype=dtype, dtype_params=dtype_params, items=items)
+        return items
 
-        return self
+    @classmethod
+    def get_rows_from_struct(cls, struct):
+        """Returns a structured numpy.ndarray of the fields of a plain child type with a row per child struct.
+
+        The child structs must have the keys of the first one, so the values are gathered per field and not per item.
+        """
+
+        child_dtype = cls.child_type.dtype
+        rows = numpy.zeros(len(struct), [(name, child_dtype.fields[name][0]) for name in child_dtype.names])
+        if not struct:
+            return rows
+
+        paths = get_struct_paths(struct[0])
+        for name in child_dtype.names:
+            shape = child_dtype.fields[name][0].shape
+            if name in paths:
+                rows[name] = get_struct_column(struct, paths[name])
+
+            elif shape and '%s_0' % name in paths:
+                for index in xrange(shape[0]):
+                    rows[name][:, index] = get_struct_column(struct, paths['%s_%d' % (name, index)])
+
+            elif not name.endswith(cls.PADDING_FIELD_SUFFIX):
+                raise KeyError('the structs of %s have no key %s' % (cls, name))
+
+        return rows
+
+    @classmethod
+    def init_items_from_rows(cls, blob, dtype, rows, start=0):
+        """Writes the rows of a structured numpy.ndarray into the items from index start on, a column at once."""
+
+        for name in rows.dtype.names:
+            cls.get_blob_column(blob, dtype, name)[start:start + len(rows)] = rows[name]
 
     @classmethod
     def get_field_by_param_key(cls, key, parent_field):
@@ -970,6 +1470,15 @@ class BlobArray(Blob):
         key_ = '%s_%s' % (parent_field, cls.get_item_field(index=0, name=key_))
         return key_
 
+    @classmethod
+    def get_dtype_param_fields(cls):
+        dtype_param_fields = {cls.CAPACITY_FIELD: cls.CAPACITY_FIELD}
+
+        for key, field in cls.child_type.get_dtype_param_fields().items():
+            dtype_param_fields[key] = cls.get_item_field(index=0, name=field)
+
+        return dtype_param_fields
+
     @classmethod
     def validate_capacity(cls, capacity):
 
@@ -978,31 +1487,30 @@ class BlobArray(Blob):
         if capacity <= 0:
             raise BlobValidationException('array capacity must be positive instead of %d' % capacity)
 
-        if capacity > Blob.MAX_DTYPE_PARAM:
-            raise BlobValidationException('array capacity must smaller than 1000 instead of %d' % capacity)
+        # the dtype of the soa layout has a field per column instead of a field per item and column
+        if capacity > Blob.MAX_DTYPE_PARAM and not cls.is_soa():
+            raise BlobValidationException(
+                'array capacity must be smaller than %d instead of %d' % (Blob.MAX_DTYPE_PARAM, capacity))
 
     @classmethod
-    def get_dtype_params_from_blob(cls, blob):
+    def read_dtype_params(cls, blob_bytes, offset, dtype_params, prefix=''):
+        """Reads the capacity and the dtype_params of the first item, all items share the same params."""
 
-        offset = 0
+        if offset + CAPACITY_DTYPE.itemsize > blob_bytes.size:
+            raise BlobValidationException('blob of %s ends before the capacity at %d' % (cls, offset))
 
-        # create dummy
-        dtype_params = cls.get_dummy_dtype_params()
-        dummy_dtype, dummy_blob = cls.cast_blob(blob=blob, offset=offset, dtype_params=dtype_params)
-
-        # determine capacity
-        field_index = get_blob_index(dummy_dtype, cls.CAPACITY_FIELD)
-        capacity = dummy_blob[field_index]
+        capacity = int(blob_bytes[offset:offset + CAPACITY_DTYPE.itemsize].view(CAPACITY_DTYPE)[0])
         cls.validate_capacity(capacity)
-        dtype_params[cls.CAPACITY_FIELD] = capacity
+        dtype_params[prefix + cls.CAPACITY_FIELD] = capacity
 
-        child_dtype, capacity = cls.create_child_dtype(dtype_params)
-        item_blob = cls.get_item_blob(blob=dummy_blob, index=0, child_dtype=child_dtype)
-        child_dtype_params = cls.child_type.get_dtype_params_from_blob(blob=item_blob)
+        items_offset = cls.get_items_offset()
+        if cls.child_type.is_plain():
+            child_size = numpy.dtype(cls.child_type.create_dtype(dtype_params={})).itemsize
 
-        dtype_params.update(child_dtype_params)
+        else:
+            child_size = cls.child_type.read_dtype_params(blob_bytes, offset + items_offset, dtype_params, prefix)
 
-        return dtype_params
+        return items_offset + child_size * capacity
 
     def __init__(self, blob=None, dtype=None, dtype_params=None, items=None, capacity=None):
         cls = type(self)
@@ -1010,8 +1518,9 @@ class BlobArray(Blob):
         if items is None:
             items = []
 
-        while len(items) < capacity: #todo: remove this later
-            items.append(None)
+        # the item objects are created on their first access, see __getitem__
+        if capacity is not None and len(items) < capacity:
+            items.extend([None] * (capacity - len(items)))
 
         if capacity is None:
             capacity = len(items)
@@ -1035,17 +1544,21 @@ class BlobArray(Blob):
             dtype_params = {cls.CAPACITY_FIELD: capacity}  #todo: maybe this is not enough
 
         assert cls.CAPACITY_FIELD in dtype_params
-        cls.validate_capacity(dtype_params[cls.CAPACITY_FIELD])
+        if not Blob.trusted:
+            cls.validate_capacity(dtype_params[cls.CAPACITY_FIELD])
 
         Blob.__init__(self, blob=blob, dtype_params=dtype_params)
 
         self._items = items
 
-        if self.capacity != capacity:
+        # a read-only blob (e.g. a read-only shared blob) is used as it is
+        writeable = blob.flags.writeable
+
+        if writeable and self.capacity != capacity:
             self.capacity = capacity
 
         valid_item_count = len(filter(lambda item: item is not None, items))
-        if self.count == 0 and valid_item_count != 0:
+        if writeable and self.count == 0 and valid_item_count != 0:
             self.count = valid_item_count
             # set next index
             #
@@ -1055,38 +1568,171 @@ class BlobArray(Blob):
             #         break
 
         else:
-            child_dtype, capacity_ = self.create_child_dtype(dtype_params)
+            # the objects of the valid items are created on their first access, see __getitem__
+            count = int(numpy.count_nonzero(self.get_column(cls.INDEX_FIELD, track=False) > -1))
 
-            count = 0
-            for index in range(self.capacity):
-                item_blob = self.get_item_blob(blob=blob, index=index, child_dtype=child_dtype)
-                index_ = item_blob[get_blob_index(item_blob.dtype, 'global_index')]
-                if index_ > -1:
-                    self._items[index] = self.child_type.from_blob(item_blob)
-                    count += 1
+            if writeable and self.count != count:
+                self.count = count
 
-            try:
-                if self.count != count:
-                    self.count = count
+    def __getitem__(self, index):
+        """Returns the element at the given index, the object of a valid item is created on the first access."""
 
-            except RuntimeError:
-                raise
+        item = self._items[index]
+        if item is None and self.get_column(type(self).INDEX_FIELD, track=False)[index] > -1:
+            if index < 0:
+                index += len(self._items)
 
-    def __getitem__(self, index):
-        """Returns the element at the given index."""
-        return self._items[index]
+            item = self.create_item(int(index))
+            self._items[index] = item
+
+        return item
+
+    def create_item(self, index):
+        """Returns a new object of the item at index, which shares the blob and the tracking of changes."""
+
+        cls = type(self)
+        if cls.is_soa():
+            return BlobArrayItem(self, index)
+
+        child_dtype, capacity = self.create_child_dtype(self._dtype_params)
+        child_dtype_params = self._dtype_params.copy()
+        child_dtype_params.pop(cls.CAPACITY_FIELD)
+
+        item_blob = self.get_item_blob(blob=self._blob, index=index, child_dtype=child_dtype)
+        item = self.child_type.from_blob(item_blob, dtype_params=child_dtype_params)
+
+        if self._dirty is not None:
+            item_offset = get_view_range(get_blob_bytes(self._blob), get_blob_bytes(item.blob))[0]
+            item.track_changes(dirty=self._dirty, offset=self._dirty_offset + item_offset)
+
+        return item
 
     def __iter__(self):
         """Returns an iterator over the stored elements."""
         return BlobArrayIterator(self)
 
+    def get_nested_objects(self):
+        return [item for item in self._items if isinstance(item, Blob)]
+
+    def get_item_rows(self, ignore_padding=False):
+        """Returns a numpy.uint8 array with the bytes of one item per row (including the invalid items).
+
+        The rows are a view of the blob, unless the padding is ignored or the array has the soa layout.
+        Without padding the rows of both layouts are equal.
+        """
+
+        cls = type(self)
+        child_dtype = self.child_type.dtype if self.child_type.is_plain() else self.create_child_dtype(self.dtype_params)[0]
+        capacity = len(self.get_column(cls.INDEX_FIELD, track=False))
+
+        if cls.is_soa():
+            columns = []
+            for name in child_dtype.names:
+                if ignore_padding and name.endswith(cls.PADDING_FIELD_SUFFIX):
+                    continue
+
+                column = self.get_column(name, track=False)
+                columns.append(column.view(numpy.uint8).reshape(capacity, -1))
+
+            return numpy.hstack(columns)
+
+        rows = numpy.ndarray(
+            shape=(capacity, child_dtype.itemsize),
+            dtype=numpy.uint8,
+            buffer=get_blob_bytes(self.blob),
+            offset=cls.get_items_offset()
+        )
+
+        if ignore_padding:
+            mask = get_byte_mask(child_dtype, cls.PADDING_FIELD_SUFFIX)
+            if not mask.all():
+                rows = rows[:, mask]
+
+        return rows
+
+    def item_hashes(self, ignore_padding=False):
+        """Returns a numpy.uint64 hash of each item (including the invalid items), which is computed vectorized."""
+
+        return hash_rows(self.get_item_rows(ignore_padding=ignore_padding))
+
+    def batch(self):
+        """Returns a BlobBatch, which collects the field writes of items and applies them as column assignments."""
+
+        assert self.child_type.is_plain(), 'a batch requires a plain child type instead of %s' % self.child_type
+        return BlobBatch(self, self.child_type.dtype.names)
+
+    def apply_batch(self, writes):
+        """Writes the values of a BlobBatch by one assignment per column, the runs of written items are marked.
+
+        The count and the validity of the items are not changed.
+        """
+
+        for name, (index_list, value_list) in writes.items():
+            column = self.get_column(name, track=False)
+
+            indices, values = [], []
+            for index, value in zip(index_list, value_list):
+                index = numpy.atleast_1d(numpy.asarray(index, numpy.intp))
+                indices.append(index)
+                values.append(numpy.broadcast_to(numpy.asarray(value, column.dtype), index.shape + column.shape[1:]))
+
+            indices = numpy.concatenate(indices)
+            indices[indices < 0] += len(column)
+            values = numpy.concatenate(values)
+
+            # the last write of an item wins
+            unique_indices, positions = numpy.unique(indices[::-1], return_index=True)
+            column[unique_indices] = values[::-1][positions]
+
+            if self._dirty is not None:
+                # the runs of adjacent items are marked, runs closer than the gap of the DirtyRanges are joined
+                breaks = numpy.flatnonzero(numpy.diff(unique_indices) * column.strides[0] > self._dirty.gap)
+                starts = unique_indices[numpy.concatenate(([0], breaks + 1))]
+                ends = unique_indices[numpy.concatenate((breaks, [len(unique_indices) - 1]))] + 1
+
+                for start, end in zip(starts, ends):
+                    self.mark_view_dirty(column[start:end])
+
+    def get_column(self, name, track=True):
+        """Returns a numpy.ndarray view of the child field name over all items (including the invalid ones).
+
+        Writes into the view can not be detected, so the column is marked as modified if the tracking of changes
+        is enabled, unless track is False.
+        """
+
+        column = self.get_blob_column(self.blob, self.dtype, name)
+
+        if track:
+            self.mark_view_dirty(column)
+
+        return column
+
+    @classmethod
+    def from_array(cls, array):
+        """Creates an array with the items of an array with the same plain child type, e.g. to change the layout.
+
+        The fields are copied column-wise.
+        """
+
+        assert cls.child_type is array.child_type, '%s and %s require the same child_type' % (cls, type(array))
+        assert cls.child_type.is_plain(), 'the child_type of %s must be plain' % cls
+
+        capacity = len(array.get_column(cls.INDEX_FIELD, track=False))
+        dtype_params = {cls.CAPACITY_FIELD: capacity}
+        dtype, blob = cls.allocate_blob(dtype_params=dtype_params)
+
+        for name in cls.child_type.dtype.names:
+            cls.get_blob_column(blob, dtype, name)[...] = array.get_column(name, track=False)
+
+        return cls(blob=blob, dtype=dtype, dtype_params=dtype_params, capacity=capacity)
+
     def __len__(self):
         """Returns the number of stored elements."""
         return self.count
 
     def to_struct(self):
         """Returns a struct representation of all stored elements."""
-        return [item.to_struct() for item in self._items]
+        return [item.to_struct() for item in self]
 
 
 class BlobLinkedListHost(BlobArray):
@@ -1096,9 +1742,10 @@ class BlobLinkedListHost(BlobArray):
         index = self.count - 1
         assert index < self.capacity, 'not enough capacity %d < %d' % (index, self.capacity)
 
-        item_blob = BlobArray.get_item_blob(blob=self.blob, index=index, child_dtype=self.child_type.dtype)
+        item_blob = self.get_item_blob(blob=self.blob, index=index, child_dtype=self.child_type.dtype)
         global_index_field_index = get_blob_index(self.child_type.dtype, 'global_index')
         item_blob[global_index_field_index] = index
+        self.mark_view_dirty(get_blob_bytes(item_blob))
         return item_blob, index
 
     def append(self, item):
@@ -1137,6 +1784,24 @@ class BlobLinkedList(Blob):
     def __getitem__(self, i):
         return self._items[i]
 
+    def __reduce__(self):
+        """Pickles the blob and the host, the items are restored by following the links in the host."""
+
+        function, args = Blob.__reduce__(self)
+        return function, args, {'host': getattr(self, 'host', None)}
+
+    def __setstate__(self, state):
+        host = state['host']
+        if host is None:
+            return
+
+        self.host = host
+        index = self.first_index
+        while index > -1 and len(self._items) < self.count:
+            item = host[index]
+            self._items.append(item)
+            index = item.next_index
+
     def __len__(self):
         current = self.first
         count = 0
@@ -1173,6 +1838,10 @@ class BlobEnum(Blob):
 
     UNDEFINED = 'undefined'
 
+    @classmethod
+    def get_schema(cls):
+        return cls.__name__, sorted(getattr(cls, 'to_int_map', {}).items())
+
     @classmethod
     def create_fields(cls, *args, **to_int_map):
         assert (len(args) == 0) != (len(to_int_map) == 0), 'do not mix args and kwargs'
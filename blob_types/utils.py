@@ -2,9 +2,39 @@
 ... is a submodule of [blob_types](__init__.html).
 It contains helper functions.
 """
+import operator
 import os
 
-implode_float_n = False
+import numpy
+
+implode_float_n = False  # if True, plain types are created with the aligned layout of OpenCL structs
+
+# c99 names of the scalar types, equal to the names of pyopencl, which must not be imported for code generation
+DTYPE_TO_CTYPE = dict([(numpy.dtype(dtype), ctype) for dtype, ctype in [
+    (numpy.int8, 'char'),
+    (numpy.uint8, 'uchar'),
+    (numpy.int16, 'short'),
+    (numpy.uint16, 'ushort'),
+    (numpy.int32, 'int'),
+    (numpy.uint32, 'uint'),
+    (numpy.int64, 'long'),
+    (numpy.uint64, 'ulong'),
+    (numpy.float16, 'half'),
+    (numpy.float32, 'float'),
+    (numpy.float64, 'double'),
+]])
+
+def dtype_to_ctype(dtype):
+    """Returns the c99 name of a scalar dtype or of the components of a vector dtype."""
+
+    if dtype is None:
+        raise ValueError('dtype may not be None')
+
+    try:
+        return DTYPE_TO_CTYPE[numpy.dtype(dtype).base]
+
+    except KeyError:
+        raise ValueError('unable to map dtype \'%s\'' % dtype)
 
 def camel_case_to_underscore(name):
     """Convert a CamelCaseString into an underscore_string."""
@@ -19,6 +49,25 @@ def camel_case_to_underscore(name):
 
     return ''.join(new_name)
 
+def memoize_method(method):
+    """Cache the results of a method in the _memo dict of the object, keyed by the arguments."""
+
+    name = method.__name__
+
+    def wrapper(self, *args, **kwargs):
+        key = (method, args, tuple(sorted(kwargs.items())))
+
+        try:
+            return self._memo[key]
+
+        except KeyError:
+            result = self._memo[key] = method(self, *args, **kwargs)
+            return result
+
+    wrapper.__name__ = name
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
 def underscore_to_camel_case(name):
     """Convert a underscore_string into a CamelCaseString."""
 
@@ -78,51 +127,39 @@ def flat_struct(struct):
     return result
 
 
+def get_struct_paths(struct, path=()):
+    """Returns the flat names (like flat_struct) and the key paths of the values of a nested struct.
+
+    Lists are values, e.g. {'pos': {'x': 4}, 'v': [1, 2]} has the paths {'pos_x': ('pos', 'x'), 'v': ('v',)}.
+    """
+
+    paths = {}
+    for key, value in struct.items():
+        if isinstance(value, dict):
+            paths.update(get_struct_paths(value, path + (key,)))
+
+        else:
+            paths['_'.join(camel_case_to_underscore(part.rstrip('_')) for part in path + (key,))] = path + (key,)
+
+    return paths
+
+
+def get_struct_column(structs, path):
+    """Returns the values at a key path of each struct, the values are gathered by one map per key."""
+
+    values = structs
+    for key in path:
+        values = map(operator.itemgetter(key), values)
+
+    return values
+
+
+# component names of vector fields, see [layout](./layout.html)
 vector_fields = [
-    ('x', 'y', 'z'),
-    ('0', '1', '2')
+    ('x', 'y', 'z', 'w'),
+    ('0', '1', '2', '3')
 ]
 
-def implode_floatn(struct_source):
-    """Convert vector types."""
-    lines = []
-    for line in struct_source.split('\n'):
-        parts = line.split()
-        replaced = False
-        if len(parts) == 2 and parts[0].startswith('float'):
-            type_, field = parts
-            previous_parts = lines[-1].split()
-            if len(previous_parts) == 2:
-                previous_type, previous_field = previous_parts
-
-                for vector_field in vector_fields:
-                    if not replaced:
-                        for previous_index, char in enumerate(vector_field):
-                            if not replaced:
-                                index = str(previous_index + 1)
-                                if previous_index < 2:
-                                    previous_index = ''
-
-                                else:
-                                    previous_index = str(previous_index)
-
-                                suffix = '_%s;' % char
-                                new_type = 'float%s' % index
-
-                                previous_prefix = previous_field[:-len(suffix)]
-                                prefix = field[:-len(suffix)]
-
-                                if field.endswith(suffix) and previous_prefix == prefix or (
-                                    previous_index and previous_field[:-1] == prefix):
-                                    new_line = line.replace('float', new_type)[:-len(suffix)] + ';'
-                                    lines[-1] = new_line
-                                    replaced = True
-
-        if not replaced:
-            lines.append(line)
-
-    return '\n'.join(map(lambda line_: line_.replace('float3 ', 'float4 '), lines))
-
 def get_blob_index(dtype, name):
     assert dtype
     assert dtype.names
@@ -131,6 +168,19 @@ def get_blob_index(dtype, name):
         if field_name == name:
             return index
 
+def get_blob_bytes(blob):
+    """Returns a writable numpy.uint8 view of the memory of a blob (numpy.void or numpy.ndarray)."""
+
+    if isinstance(blob, numpy.ndarray) and blob.shape != ():
+        return blob.reshape(-1).view(numpy.uint8)
+
+    return blob.getfield(numpy.dtype((numpy.uint8, (blob.dtype.itemsize,))), 0)
+
+def get_strided_view(blob, dtype, offset, count, stride):
+    """Returns a writable numpy.ndarray view of count values of a dtype, which start at offset in the blob."""
+
+    return numpy.ndarray(shape=(count,), dtype=dtype, buffer=get_blob_bytes(blob), offset=offset, strides=(stride,))
+
 def dtype_to_lines(dtype):
     return str(dtype).replace('), (', ')\n(').split('\n')
 
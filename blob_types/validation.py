@@ -0,0 +1,248 @@
+"""
+... is a submodule of [blob_types](__init__.html).
+It contains a bulk validation of blobs, which checks all objects of a blob (or a store of blobs) at once.
+
+The values of a field are gathered from all rows and items into one numpy.ndarray and checked vectorized:
+
+- the capacities of the arrays must match the dtype_params,
+- the count of an array must equal the number of valid items (global_index > -1),
+- a global_index must be in the range of the array,
+- a next_index (see BlobLinkedList) must be -1 or refer to a valid item of the same array,
+- an enum value must be an option of its BlobEnum type.
+
+The result is a report of the invalid values and their byte offsets.
+Blobs, which are validated already, are loaded in trusted mode, which skips the checks of each object.
+
+    report = validate_blobs(World, blob_bytes)
+    if not report.is_valid():
+        print report
+    world = from_validated_blob(World, blob_bytes)
+"""
+
+import contextlib
+
+import numpy
+
+from types import Blob, BlobArray, BlobEnum, BlobLinkedList, BlobValidationException
+from layout import round_up
+from utils import get_blob_bytes
+
+INT32_BYTES = numpy.arange(numpy.dtype(numpy.int32).itemsize)
+
+
+class BlobValidationReport(object):
+    """The invalid values of a validation, which are grouped by their error message."""
+
+    MAX_MESSAGES = 10
+
+    def __init__(self, dtype_params=None):
+        self.dtype_params = dtype_params
+        self.errors = []  # list of (message, byte offsets)
+
+    def add(self, message, offsets):
+        """Adds the invalid values at the byte offsets, an empty array is ignored."""
+
+        if len(offsets):
+            self.errors.append((message, numpy.asarray(offsets, numpy.int64)))
+
+    def is_valid(self):
+        return not self.errors
+
+    def get_offsets(self):
+        """Returns the sorted byte offsets of all invalid values."""
+
+        if not self.errors:
+            return numpy.zeros(0, numpy.int64)
+
+        return numpy.unique(numpy.concatenate([offsets for message, offsets in self.errors]))
+
+    def raise_errors(self):
+        """Raises a BlobValidationException, if there are invalid values."""
+
+        if self.errors:
+            raise BlobValidationException(str(self))
+
+    def __str__(self):
+        lines = ['%d invalid values' % len(self.get_offsets())]
+        for message, offsets in self.errors[:self.MAX_MESSAGES]:
+            lines.append('%s at %d offsets (first %d)' % (message, len(offsets), offsets[0]))
+
+        return '\n'.join(lines)
+
+
+def read_int32(data, offsets):
+    """Gathers the int32 values at the byte offsets of a numpy.uint8 array."""
+
+    offsets = numpy.asarray(offsets, numpy.int64)
+    return data[offsets.reshape(-1, 1) + INT32_BYTES].view(numpy.int32).reshape(offsets.shape)
+
+
+def get_item_field_offsets(array_type, dtype, child_dtype, bases, name, capacity):
+    """Returns the byte offsets of a child field of all items as (rows, capacity) array."""
+
+    if array_type.is_soa():
+        field_dtype, field_offset = dtype.fields[name][:2]
+        item_offsets = field_offset + numpy.arange(capacity) * field_dtype.base.itemsize
+
+    else:
+        item_offsets = array_type.get_items_offset() + numpy.arange(capacity) * child_dtype.itemsize
+        item_offsets += child_dtype.fields[name][1]
+
+    return bases.reshape(-1, 1) + item_offsets
+
+
+def validate_enum(enum_type, data, offsets, report):
+    if not hasattr(enum_type, 'to_int_map') or not len(offsets):
+        return
+
+    values = read_int32(data, offsets)
+    invalid = ~numpy.in1d(values, enum_type.to_int_map.values())
+    report.add('%s value is no option' % enum_type.__name__, offsets[invalid])
+
+
+def validate_plain(blob_type, data, get_offsets, report, prefix=''):
+    """Validates the enum fields of a plain type, get_offsets returns the byte offsets of a field."""
+
+    for field, subtype in blob_type.subtypes:
+        if type(subtype) == type and issubclass(subtype, BlobEnum):
+            validate_enum(subtype, data, get_offsets(prefix + field), report)
+
+        elif type(subtype) == type and issubclass(subtype, Blob):
+            validate_plain(subtype, data, get_offsets, report, '%s%s_' % (prefix, field))
+
+
+def validate_array(array_type, data, bases, dtype_params, report):
+    capacity = dtype_params[array_type.CAPACITY_FIELD]
+    dtype = array_type.create_dtype(dtype_params=dtype_params)
+    child_dtype = array_type.create_child_dtype(dtype_params)[0]
+
+    capacities = read_int32(data, bases + dtype.fields[array_type.CAPACITY_FIELD][1])
+    report.add('%s capacity differs from %d' % (array_type.__name__, capacity), bases[capacities != capacity])
+
+    # the valid items
+    index_offsets = get_item_field_offsets(array_type, dtype, child_dtype, bases, array_type.INDEX_FIELD, capacity)
+    indices = read_int32(data, index_offsets)
+    valid = indices > -1
+    report.add('%s global_index out of range' % array_type.__name__, index_offsets[(indices < -1) | (indices >= capacity)])
+
+    count_offsets = bases + dtype.fields[array_type.COUNT_FIELD_NAME][1]
+    counts = read_int32(data, count_offsets)
+    report.add('%s count differs from the valid items' % array_type.__name__, count_offsets[counts != valid.sum(1)])
+
+    # the links must refer to valid items of the same array
+    if BlobLinkedList.NEXT_INDEX_FIELD in child_dtype.names:
+        next_offsets = get_item_field_offsets(
+            array_type, dtype, child_dtype, bases, BlobLinkedList.NEXT_INDEX_FIELD, capacity
+        )
+        next_indices = read_int32(data, next_offsets)
+
+        linked = valid & (next_indices > -1)
+        invalid = valid & ((next_indices < -1) | (next_indices >= capacity))
+
+        rows, items = numpy.nonzero(linked & ~invalid)
+        invalid[rows, items] = ~valid[rows, next_indices[rows, items]]
+        report.add('%s next_index out of range' % array_type.__name__, next_offsets[invalid])
+
+    # the items
+    if array_type.child_type.is_plain():
+        def get_offsets(name):
+            return get_item_field_offsets(array_type, dtype, child_dtype, bases, name, capacity)[valid]
+
+        validate_plain(array_type.child_type, data, get_offsets, report)
+
+    else:
+        child_params = dtype_params.copy()
+        child_params.pop(array_type.CAPACITY_FIELD)
+
+        item_bases = bases.reshape(-1, 1) + array_type.get_items_offset() + numpy.arange(capacity) * child_dtype.itemsize
+        validate_type(array_type.child_type, data, item_bases[valid], child_params, report)
+
+
+def validate_type(blob_type, data, bases, dtype_params, report):
+    """Validates the objects of blob_type, whose blobs start at the byte offsets bases of data."""
+
+    if issubclass(blob_type, BlobArray):
+        validate_array(blob_type, data, bases, dtype_params, report)
+
+    elif issubclass(blob_type, BlobEnum):
+        validate_enum(blob_type, data, bases, report)
+
+    elif blob_type.is_plain():
+        dtype = blob_type.create_dtype(dtype_params={})
+        validate_plain(blob_type, data, lambda name: bases + dtype.fields[name][1], report)
+
+    else:
+        offset = 0
+        for field, subtype in blob_type.subtypes:
+            offset = round_up(offset, Blob.get_subtype_alignment(subtype))
+            if type(subtype) == type and issubclass(subtype, Blob):
+                subtype_params = blob_type.explode_dtype_params(field=field, dtype_params=dtype_params)
+                validate_type(subtype, data, bases + offset, subtype_params, report)
+
+                if subtype.is_plain():
+                    offset += numpy.dtype(subtype.create_dtype(dtype_params={})).itemsize
+
+                else:
+                    offset += subtype.sizeof_dtype(dtype_params=subtype_params)
+
+            else:
+                offset += numpy.dtype(subtype).itemsize
+
+
+def validate_blobs(blob_type, blobs, dtype_params=None):
+    """Validates a blob or a store of blobs (e.g. a file) with equal dtype_params and returns a BlobValidationReport.
+
+    The dtype_params are read from the first blob, if they are unknown.
+    """
+
+    data = get_blob_bytes(blobs)
+
+    if dtype_params is None:
+        try:
+            dtype_params = blob_type.get_dtype_params_from_blob(data)
+
+        except BlobValidationException as ex:
+            report = BlobValidationReport()
+            report.add(str(ex), [0])
+            return report
+
+    report = BlobValidationReport(dtype_params)
+
+    nbytes = numpy.dtype(blob_type.create_dtype(dtype_params=dtype_params)).itemsize
+    if data.size % nbytes:
+        report.add('the size is no multiple of %d bytes' % nbytes, [data.size - data.size % nbytes])
+
+    bases = numpy.arange(data.size // nbytes, dtype=numpy.int64) * nbytes
+    validate_type(blob_type, data, bases, dtype_params, report)
+
+    return report
+
+
+@contextlib.contextmanager
+def trusted():
+    """Skips the checks of each object within the context, e.g. while objects of validated blobs are created.
+
+    The nested objects, which are created on access after the context, are checked again.
+    """
+
+    previous = Blob.trusted
+    Blob.trusted = True
+    try:
+        yield
+
+    finally:
+        Blob.trusted = previous
+
+
+def from_validated_blob(blob_type, blob, dtype_params=None):
+    """Validates a blob in bulk and creates its object in trusted mode.
+
+    Raises a BlobValidationException, if the blob is invalid.
+    """
+
+    blob_bytes = get_blob_bytes(blob)
+    report = validate_blobs(blob_type, blob_bytes, dtype_params)
+    report.raise_errors()
+
+    with trusted():
+        return blob_type.from_bytes(blob_bytes, report.dtype_params)
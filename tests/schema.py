@@ -0,0 +1,54 @@
+"""
+The blob types, which are shared by the tests.
+"""
+
+import numpy
+
+from blob_types import Blob, BlobArray
+
+
+class Vector3(Blob):
+    dtype, subtypes = Blob.create_plain_dtype(('x', numpy.float32), ('y', numpy.float32), ('z', numpy.float32))
+
+
+class Particle(Blob):
+    dtype, subtypes = Blob.create_plain_dtype(('global_index', numpy.int32), ('pos', Vector3), ('mass', numpy.float32))
+
+
+class Particles(BlobArray):
+    child_type = Particle
+
+
+class SoaParticles(BlobArray):
+    child_type = Particle
+    layout = BlobArray.SOA_LAYOUT
+
+
+class World(Blob):
+    subtypes = [('gravity', Vector3), ('particles', Particles), ('steps', numpy.int32)]
+
+
+class Planet(Blob):
+    subtypes = [('global_index', numpy.int32), ('particles', Particles), ('mass', numpy.float32)]
+
+
+class Planets(BlobArray):
+    child_type = Planet
+
+
+class Universe(Blob):
+    subtypes = [('age', numpy.int32), ('planets', Planets), ('home', World)]
+
+
+def create_particles(array_type=Particles, capacity=8, count=None):
+    """Returns an array, whose first count items are valid and have the mass of their index."""
+
+    if count is None:
+        count = capacity
+
+    particles = array_type(capacity=capacity)
+    particles.get_column('global_index')[:count] = numpy.arange(count)
+    particles.get_column('mass')[:count] = numpy.arange(count)
+    particles.count = count
+
+    return particles
@@ -0,0 +1,50 @@
+import unittest
+
+import numpy
+
+from blob_types import Blob, BlobArray
+
+from schema import Particles, SoaParticles, create_particles
+
+
+class SoaLayoutTest(unittest.TestCase):
+
+    def setUp(self):
+        self.particles = SoaParticles.from_blob(create_particles(SoaParticles, capacity=4, count=3).blob)
+
+    def test_columns_are_fields_of_the_blob(self):
+        self.assertEqual(('capacity', 'count', 'global_index', 'pos_x', 'pos_y', 'pos_z', 'mass'),
+                         self.particles.dtype.names)
+        self.assertEqual(4, self.particles.get_column('mass').strides[0])
+
+    def test_items_are_views_of_the_columns(self):
+        self.assertEqual(3, self.particles.count)
+        self.assertEqual([0, 1, 2], [item.mass for item in self.particles])
+        self.assertIsNone(self.particles[3])
+
+        self.particles[2].mass = 9
+        self.assertEqual([0, 1, 9, 0], self.particles.get_column('mass').tolist())
+
+    def test_rows_of_both_layouts_are_equal(self):
+        numpy.testing.assert_array_equal(
+            create_particles(Particles, capacity=4, count=3).get_item_rows(ignore_padding=True),
+            self.particles.get_item_rows(ignore_padding=True)
+        )
+
+    def test_layout_is_part_of_the_schema(self):
+        self.assertNotEqual(Particles.get_schema()[2:], SoaParticles.get_schema()[2:])
+
+    def test_fields_clashing_with_columns_are_rejected(self):
+        class Stock(Blob):
+            dtype, subtypes = Blob.create_plain_dtype(('global_index', numpy.int32), ('count', numpy.int32))
+
+        class SoaStocks(BlobArray):
+            child_type = Stock
+            layout = BlobArray.SOA_LAYOUT
+
+        with self.assertRaisesRegexp(AssertionError, 'the fields count of .* clash with the columns'):
+            SoaStocks.create_dtype(dtype_params={'capacity': 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
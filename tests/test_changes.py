@@ -0,0 +1,85 @@
+import unittest
+
+from blob_types import DirtyRanges
+
+from schema import Particles, SoaParticles, Vector3, create_particles
+
+
+class DirtyRangesTest(unittest.TestCase):
+
+    def test_close_ranges_are_coalesced(self):
+        dirty = DirtyRanges(gap=4)
+        dirty.add(0, 8)
+        dirty.add(10, 12)
+        dirty.add(100, 104)
+
+        self.assertEqual([(0, 12), (100, 104)], dirty.ranges())
+        self.assertEqual(16, dirty.get_nbytes())
+
+    def test_overlapping_ranges_are_joined(self):
+        dirty = DirtyRanges(gap=0)
+        dirty.add(20, 30)
+        dirty.add(0, 10)
+        dirty.add(5, 25)
+
+        self.assertEqual([(0, 30)], dirty.ranges())
+
+
+class TrackChangesTest(unittest.TestCase):
+
+    def test_column_write_is_marked(self):
+        particles = create_particles(capacity=8)
+        particles.track_changes(gap=0)
+        mass = particles.get_column('mass')
+
+        self.assertEqual(1, len(particles.dirty_ranges()))
+        start, end = particles.dirty_ranges()[0]
+        self.assertEqual(mass.strides[0] * 7 + mass.dtype.itemsize, end - start)
+
+        particles.clear_dirty()
+        self.assertEqual([], particles.dirty_ranges())
+
+
+class BatchTest(unittest.TestCase):
+
+    def test_batch_of_a_blob(self):
+        vector = Vector3.from_struct({'x': 1, 'y': 2, 'z': 3})
+        vector.track_changes(gap=0)
+
+        with vector.batch() as batch:
+            batch.y = 5
+            batch.z = 6
+            batch.z = 7
+
+        self.assertEqual((1, 5, 7), (vector.x, vector.y, vector.z))
+        self.assertEqual([(4, 12)], vector.dirty_ranges())
+
+    def test_batch_of_an_array(self):
+        for array_type in [Particles, SoaParticles]:
+            particles = create_particles(array_type, capacity=8)
+
+            with particles.batch() as batch:
+                batch[1].mass = 10
+                batch[-1].mass = 20
+                batch[1].mass = 30
+
+            self.assertEqual([0, 30, 2, 3, 4, 5, 6, 20], particles.get_column('mass').tolist())
+
+    def test_sparse_batch_marks_the_written_items(self):
+        for array_type in [Particles, SoaParticles]:
+            particles = create_particles(array_type, capacity=1000)
+            particles.track_changes(gap=64)
+
+            with particles.batch() as batch:
+                for index in [0, 1, 2, 500, 999]:
+                    batch[index].mass = -1
+
+            mass = particles.get_column('mass', track=False)
+            nbytes = sum([end - start for start, end in particles.dirty_ranges()])
+
+            self.assertEqual(3, len(particles.dirty_ranges()))
+            self.assertEqual(2 * mass.strides[0] + 3 * mass.dtype.itemsize, nbytes)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from blob_types import BlobArray, generate
+
+import schema
+from schema import Particle, World
+
+
+class Particles(BlobArray):
+    """Has the name of schema.Particles, but the soa layout."""
+
+    child_type = Particle
+    layout = BlobArray.SOA_LAYOUT
+
+
+class GenerateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def generate(self, blob_types, check=False):
+        return [state for path, state in generate.generate(blob_types, self.root, ['blobs', 'world'], check=check)]
+
+    def test_generated_files_are_unchanged(self):
+        self.assertEqual(['outdated', 'outdated'], self.generate([World], check=True))
+        self.assertEqual(['generated', 'generated'], self.generate([World]))
+        self.assertEqual(['unchanged', 'unchanged'], self.generate([World], check=True))
+
+        self.assertTrue(os.path.exists(os.path.join(self.root, 'include', 'blobs', 'world.h')))
+        self.assertTrue(os.path.exists(os.path.join(self.root, 'src', 'blobs', 'world.cl')))
+
+    def test_changed_generator_outdates_files(self):
+        self.generate([World])
+
+        get_generator_fingerprint = generate.get_generator_fingerprint
+        generate.get_generator_fingerprint = lambda: 'changed generator'
+        try:
+            self.assertEqual(['outdated', 'outdated'], self.generate([World], check=True))
+
+        finally:
+            generate.get_generator_fingerprint = get_generator_fingerprint
+
+    def test_generator_sources(self):
+        self.assertIn('types.py', generate.GENERATOR_SOURCES)
+        self.assertIn('interface.py', generate.GENERATOR_SOURCES)
+
+    def test_changed_layout_outdates_files(self):
+        self.assertNotEqual(
+            generate.get_fingerprint([schema.Particles], ['__global']),
+            generate.get_fingerprint([Particles], ['__global'])
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+
+import numpy
+
+from schema import Particles, SoaParticles, create_particles
+
+
+class ContentHashTest(unittest.TestCase):
+
+    def test_equal_content_has_equal_hash(self):
+        particles, other = create_particles(capacity=8), create_particles(capacity=8)
+        self.assertEqual(particles.content_hash(), other.content_hash())
+
+        other.get_column('mass')[3] = -1
+        self.assertNotEqual(particles.content_hash(), other.content_hash())
+
+    def test_schema_is_part_of_the_hash(self):
+        self.assertNotEqual(
+            create_particles(Particles, capacity=8).content_hash(),
+            create_particles(SoaParticles, capacity=8).content_hash()
+        )
+
+
+class ItemHashesTest(unittest.TestCase):
+
+    def test_item_hashes_of_both_layouts_are_equal(self):
+        particles = create_particles(Particles, capacity=8, count=5)
+        hashes = particles.item_hashes(ignore_padding=True)
+
+        self.assertEqual(numpy.uint64, hashes.dtype)
+        self.assertEqual(6, len(numpy.unique(hashes)))  # the invalid items are equal
+        numpy.testing.assert_array_equal(hashes, create_particles(SoaParticles, capacity=8, count=5).item_hashes(True))
+
+    def test_changed_item_is_detected(self):
+        particles = create_particles(capacity=8)
+        hashes = particles.item_hashes()
+        particles.get_column('mass')[6] = -1
+
+        self.assertEqual([6], numpy.flatnonzero(hashes != particles.item_hashes()).tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
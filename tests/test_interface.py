@@ -0,0 +1,19 @@
+import unittest
+
+from blob_types import BlobLib
+
+from schema import World
+
+
+class InterfaceCacheTest(unittest.TestCase):
+
+    def test_interfaces_are_cached(self):
+        interface = BlobLib.get_interface(World)
+
+        self.assertIs(interface, BlobLib.get_interface(World))
+        self.assertIs(interface.get_name('__global'), interface.get_name('__global'))
+        self.assertEqual('world_gt', interface.get_name('__global'))
+
+
+if __name__ == '__main__':
+    unittest.main()
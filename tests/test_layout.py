@@ -0,0 +1,133 @@
+import unittest
+
+import numpy
+
+from blob_types import Blob, BlobArray, BlobLib, float3
+from blob_types import layout
+
+
+class AlignedDtypeTest(unittest.TestCase):
+
+    def test_vector_components_are_grouped(self):
+        dtype, subtypes = Blob._create_aligned_dtype(
+            ('a', numpy.int8), ('pos_x', numpy.float32), ('pos_y', numpy.float32), ('b', numpy.float64))
+
+        self.assertEqual([0, 8, 12, 16], [dtype.fields[name][1] for name in dtype.names])
+        self.assertEqual(24, dtype.itemsize)
+        self.assertEqual(8, layout.get_alignment(dtype))
+        self.assertEqual([('char', 'a'), ('float2', 'pos'), ('double', 'b')], layout.get_c_members(dtype))
+
+    def test_address_of_a_vector_component(self):
+        dtype, subtypes = Blob._create_aligned_dtype(('pos_x', numpy.float32), ('pos_y', numpy.float32))
+
+        self.assertEqual('&self->pos', layout.get_c_member_address(dtype, 'pos_x', 'self', '__global'))
+        self.assertEqual('((__global float*)&self->pos + 1)',
+                         layout.get_c_member_address(dtype, 'pos_y', 'self', '__global'))
+
+    def test_round_up(self):
+        self.assertEqual(0, layout.round_up(0, 8))
+        self.assertEqual(16, layout.round_up(9, 8))
+        self.assertEqual(16, layout.round_up(16, 16))
+
+
+class AlignedArrayTest(unittest.TestCase):
+
+    def test_items_offset_is_aligned(self):
+        class Aligned(Blob):
+            dtype, subtypes = Blob._create_aligned_dtype(
+                ('global_index', numpy.int32), ('velocity_x', numpy.float32), ('velocity_y', numpy.float32),
+                ('velocity_z', numpy.float32))
+
+        class AlignedArray(BlobArray):
+            child_type = Aligned
+
+        self.assertEqual(16, layout.get_alignment(Aligned.dtype))
+        self.assertEqual(16, AlignedArray.get_items_offset())
+
+        dtype = AlignedArray.create_dtype(dtype_params={'capacity': 2})
+        self.assertEqual([16, 48], [dtype.fields[AlignedArray.get_item_field(index, 'global_index')][1]
+                                    for index in range(2)])
+
+
+class Spark(Blob):
+    dtype, subtypes = Blob._create_aligned_dtype(('global_index', numpy.int32), ('velocity', float3))
+
+
+class Sparks(BlobArray):
+    child_type = Spark
+
+
+class Sky(Blob):
+    subtypes = [('steps', numpy.int32), ('sparks', Sparks)]
+
+
+class Skies(Blob):
+    subtypes = [('age', numpy.int8), ('sky', Sky), ('stars', numpy.int32)]
+
+
+class NestedAlignmentTest(unittest.TestCase):
+
+    def test_aligned_array_is_padded(self):
+        dtype = Skies.create_dtype(dtype_params={'sky_sparks_capacity': 2})
+
+        for index in range(2):
+            offset = dtype.fields['sky_sparks_%s' % Sparks.get_item_field(index, 'velocity')][1]
+            self.assertEqual(0, offset % layout.get_alignment(Spark.dtype))
+
+        self.assertEqual(32, dtype.fields['sky_sparks_capacity'][1])
+        self.assertEqual(16, Skies.get_alignment())
+        self.assertEqual(dtype.itemsize, Skies.sizeof_dtype(dtype_params={'sky_sparks_capacity': 2}))
+        self.assertEqual(0, dtype.itemsize % 16)
+
+    def test_nested_objects_are_read_at_the_padded_offsets(self):
+        dtype, blob = Skies.allocate_blob(dtype_params={'sky_sparks_capacity': 2})
+        skies = Skies.from_blob(blob)
+        skies.sky.sparks.get_column('velocity')[1] = [1, 2, 3]
+        skies.stars = 7
+
+        self.assertEqual({'sky_sparks_capacity': 2}, Skies.get_dtype_params_from_blob(blob))
+        self.assertEqual([1, 2, 3], Skies.from_blob(blob).sky.sparks.get_column('velocity')[1].tolist())
+        self.assertEqual(7, Skies.from_blob(blob).stars)
+
+    def test_deserializers_pad_the_offsets(self):
+        interface = BlobLib.get_interface(Sky)
+        constants, functions, nested = interface.get_fixed_deserialize('__global', {'sparks_capacity': 2})
+
+        self.assertIn('#define SKY_GT_FIXED_2_SPARKS_OFFSET 16', constants)
+        self.assertIn('sparks_offset = (steps_offset + steps_space + 15) / 16 * 16;',
+                      interface.get_deserialize('__global')[1])
+        self.assertIn('size = (size + 15) / 16 * 16;', interface.get_sizeof('__global')[1])
+
+
+class Body(Blob):
+    dtype, subtypes = Blob.create_plain_dtype(
+        ('global_index', numpy.int32), ('velocity', float3), ('mass', numpy.float32))
+
+
+class Bodies(BlobArray):
+    child_type = Body
+
+
+class VectorFieldTest(unittest.TestCase):
+
+    def test_vector_dtype(self):
+        self.assertTrue(layout.is_vector_dtype(float3))
+        self.assertFalse(layout.is_vector_dtype(numpy.float32))
+
+    def test_vector_field_of_a_struct(self):
+        body = Body.from_struct({'global_index': 0, 'velocity': [1, 2, 3], 'mass': 4})
+        self.assertEqual([1, 2, 3], body.velocity.tolist())
+
+        body.velocity = [4, 5, 6]
+        self.assertEqual({'globalIndex': 0, 'velocity': [4, 5, 6], 'mass': 4}, body.to_struct())
+
+    def test_vector_column(self):
+        bodies = Bodies(capacity=3)
+        bodies.get_column('velocity')[1] = [1, 2, 3]
+
+        self.assertEqual((3, 3), bodies.get_column('velocity').shape)
+        self.assertEqual([[0, 0, 0], [1, 2, 3], [0, 0, 0]], bodies.get_column('velocity').tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+
+from blob_types import Blob, BlobLib
+
+from schema import Particles, Vector3, World
+
+
+class LibAssemblyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.lib = BlobLib(required_global_blob_types=[World])
+
+    def test_list_blacklist_is_shared(self):
+        blacklist = []
+        first_code = self.lib.get_header_code(blacklist)
+
+        self.assertTrue(blacklist)
+        self.assertIn('world_gt', first_code)
+        self.assertNotIn('world_gt', self.lib.get_header_code(blacklist))
+
+    def test_set_blacklist_is_shared(self):
+        blacklist = set()
+        self.lib.get_header_code(blacklist)
+        source_code = self.lib.get_source_code(blacklist)
+
+        self.assertTrue(source_code)
+        self.assertEqual('', self.lib.get_source_code(blacklist).split('*/', 1)[1].strip())
+
+    def test_snippets_are_emitted_once(self):
+        blacklist = []
+        header_code = self.lib.get_header_code(blacklist)
+
+        self.assertEqual(len(blacklist), len(set(blacklist)))
+        for snippet in blacklist:
+            self.assertEqual(1, header_code.count(snippet.strip()))
+
+
+class FixedDeserializerTest(unittest.TestCase):
+
+    def test_fixed_deserializer_of_complex_type(self):
+        lib = BlobLib()
+        lib.add_fixed_blob_type(World, {'particles_capacity': 4})
+
+        self.assertIn('deserialize_world_gt_fixed_4', lib.get_header_code())
+        self.assertIn('#define WORLD_GT_FIXED_4_PARTICLES_OFFSET', lib.get_header_code())
+
+    def test_fields_with_common_prefix(self):
+        class Pair(Blob):
+            subtypes = [('p', Particles), ('ps', Particles)]
+
+        self.assertEqual({'p_capacity': 'p_capacity', 'ps_capacity': 'ps_capacity'}, Pair.get_dtype_param_fields())
+        self.assertEqual({'capacity': 2},
+                         Pair.explode_dtype_params(field='p', dtype_params={'p_capacity': 2, 'ps_capacity': 3}))
+
+        lib = BlobLib()
+        lib.add_fixed_blob_type(Pair, {'p_capacity': 2, 'ps_capacity': 3})
+
+        self.assertIn('#define PAIR_GT_FIXED_2_3_PS_OFFSET', lib.get_header_code())
+
+    def test_array_and_plain_types_are_rejected(self):
+        lib = BlobLib()
+
+        self.assertRaises(ValueError, lib.add_fixed_blob_type, Particles, {'capacity': 4})
+        self.assertRaises(ValueError, lib.add_fixed_blob_type, Vector3, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
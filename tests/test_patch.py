@@ -0,0 +1,94 @@
+import struct
+import unittest
+
+import numpy
+
+from blob_types import BlobArray, create_patch, apply_patch
+from blob_types.patch import COLUMN_RECORD, PATCH_HEADER_FORMAT, PATCH_MAGIC, PatchException, get_schema_digest, \
+    pack_record
+
+import schema
+from schema import Particle, SoaParticles, World, create_particles
+
+
+class Particles(BlobArray):
+    """Has the name of schema.Particles, but the soa layout."""
+
+    child_type = Particle
+    layout = BlobArray.SOA_LAYOUT
+
+
+class PatchTest(unittest.TestCase):
+
+    def assertPatched(self, old_object, new_object):
+        replica = old_object.clone()
+        apply_patch(replica, create_patch(old_object, new_object))
+
+        self.assertEqual(new_object.blob.tostring(), replica.blob.tostring())
+
+    def test_array_patch(self):
+        for array_type in [schema.Particles, SoaParticles]:
+            old_particles = create_particles(array_type, capacity=1000, count=10)
+            new_particles = old_particles.clone()
+            new_particles.get_column('mass')[[3, 4, 900]] = -1
+            new_particles.get_column('global_index')[10] = 10
+            new_particles.count = 11
+
+            self.assertPatched(old_particles, new_particles)
+            self.assertLess(len(create_patch(old_particles, new_particles)), 200)
+
+    def test_complex_patch(self):
+        old_world = World(dtype_params={'particles_capacity': 4})
+        new_world = old_world.clone()
+        new_world.steps = 3
+        new_world.particles.get_column('mass')[1] = 2
+
+        self.assertPatched(old_world, new_world)
+
+    def test_empty_patch(self):
+        particles = create_particles(capacity=8)
+        self.assertEqual(0, apply_patch(particles, create_patch(particles, particles.clone())))
+
+    def test_patch_is_marked(self):
+        old_particles = create_particles(capacity=100)
+        new_particles = old_particles.clone()
+        new_particles.get_column('mass')[[0, 50]] = -1
+
+        old_particles.track_changes(gap=0)
+        apply_patch(old_particles, create_patch(old_particles.clone(), new_particles))
+        self.assertEqual(2, len(old_particles.dirty_ranges()))
+
+    def test_other_schema_is_rejected(self):
+        patch = create_patch(create_particles(capacity=8), create_particles(capacity=8))
+
+        self.assertRaises(PatchException, apply_patch, create_particles(Particles, capacity=8), patch)
+        self.assertRaises(PatchException, apply_patch, create_particles(capacity=16), patch)
+        self.assertRaises(PatchException, create_patch, create_particles(capacity=8), create_particles(capacity=16))
+
+    def test_truncated_patch_is_rejected(self):
+        old_particles = create_particles(capacity=8)
+        new_particles = old_particles.clone()
+        new_particles.get_column('mass')[[2, 6]] = -1
+        new_particles.count = 3
+        patch = create_patch(old_particles, new_particles)
+
+        for size in [10, len(patch) - 9, len(patch) - 1]:
+            self.assertRaises(PatchException, apply_patch, old_particles, patch[:size])
+            self.assertEqual(range(8), old_particles.get_column('mass').tolist())
+            self.assertEqual(8, old_particles.count)
+
+    def test_ranges_out_of_bounds_are_rejected(self):
+        particles = create_particles(capacity=8)
+        header = struct.pack(PATCH_HEADER_FORMAT, PATCH_MAGIC, get_schema_digest(schema.Particles),
+                             particles.blob.nbytes, 1)
+
+        for name, start, end in [('mass', 4, 9), ('mass', 5, 4), ('unknown', 0, 1)]:
+            payload = numpy.zeros(max(end - start, 0), numpy.float32).tostring()
+            patch = header + pack_record(COLUMN_RECORD, name, [start], [end], payload)
+
+            self.assertRaises(PatchException, apply_patch, particles, patch)
+            self.assertEqual(range(8), particles.get_column('mass').tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import shutil
+import tempfile
+import unittest
+
+from blob_types import BlobLib, ProgramBinaryCache
+from blob_types.program import get_option_list, get_program_source
+
+from schema import World
+
+
+class Platform(object):
+    name = 'platform'
+    version = 'OpenCL 1.2'
+
+
+class Device(object):
+    """A device like pyopencl.Device, which is enough for the cache keys."""
+
+    platform = Platform()
+    name = 'device'
+    version = 'OpenCL 1.2'
+
+    def __init__(self, driver_version):
+        self.driver_version = driver_version
+
+
+class ProgramBinaryCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = ProgramBinaryCache(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.cache.cache_dir)
+
+    def test_save_and_load(self):
+        key = self.cache.get_key('kernel void f() {}', Device('1'), [])
+        self.assertIsNone(self.cache.load(key))
+
+        self.cache.save(key, 'binary')
+        self.assertEqual('binary', self.cache.load(key))
+
+        self.cache.remove(key)
+        self.assertIsNone(self.cache.load(key))
+
+    def test_key_depends_on_source_options_and_driver(self):
+        key = self.cache.get_key('source', Device('1'), [])
+
+        self.assertEqual(key, self.cache.get_key(u'source', Device('1'), []))
+        self.assertNotEqual(key, self.cache.get_key('other source', Device('1'), []))
+        self.assertNotEqual(key, self.cache.get_key('source', Device('1'), ['-cl-fast-relaxed-math']))
+        self.assertNotEqual(key, self.cache.get_key('source', Device('2'), []))
+
+    def test_string_option_is_one_option(self):
+        self.assertEqual(['-cl-fast-relaxed-math'], get_option_list('-cl-fast-relaxed-math'))
+        self.assertEqual(['-a', '-b'], get_option_list(('-a', '-b')))
+        self.assertEqual([], get_option_list(None))
+
+        self.assertEqual(
+            self.cache.get_key('source', Device('1'), ['-cl-fast-relaxed-math']),
+            self.cache.get_key('source', Device('1'), '-cl-fast-relaxed-math')
+        )
+
+
+class ProgramSourceTest(unittest.TestCase):
+
+    def test_kernels_follow_the_lib(self):
+        source = get_program_source(BlobLib(required_global_blob_types=[World]), ['kernel void f() {}'])
+
+        self.assertTrue(source.endswith('kernel void f() {}'))
+        self.assertLess(source.index('world_gt'), source.index('kernel void f()'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import os
+import pickle
+import unittest
+
+import numpy
+
+from blob_types import SharedBlobHandle, ingest_structs
+
+from schema import Particles, SoaParticles, create_particles
+
+
+class SharedBlobHandleTest(unittest.TestCase):
+
+    def setUp(self):
+        self.handle = SharedBlobHandle.create(Particles, {'capacity': 8})
+
+    def tearDown(self):
+        self.handle.unlink()
+
+    def test_attached_objects_share_the_blob(self):
+        first, second = self.handle.attach(), pickle.loads(pickle.dumps(self.handle)).attach()
+        first.get_column('mass')[3] = 7
+
+        self.assertEqual(7, second.get_column('mass')[3])
+
+    def test_readonly_attach_with_stale_count(self):
+        particles = self.handle.attach()
+        particles.get_column('global_index')[:3] = numpy.arange(3)
+        self.assertEqual(0, particles.count)
+
+        readonly = self.handle.attach(readonly=True)
+
+        self.assertEqual(0, readonly.count)
+        self.assertFalse(readonly.blob.flags.writeable)
+        self.assertEqual([0, 1, 2], [item.global_index for item in readonly])
+
+    def test_items_are_created_on_access(self):
+        self.handle.attach().get_column('global_index')[:3] = numpy.arange(3)
+        particles = self.handle.attach()
+
+        self.assertEqual(3, particles.count)
+        self.assertEqual([], particles.get_nested_objects())
+
+        self.assertIs(particles[1], particles[1])
+        self.assertIsNone(particles[5])
+        self.assertEqual(1, len(particles.get_nested_objects()))
+
+    def test_soa_capacity_is_not_limited(self):
+        capacity = SoaParticles.MAX_DTYPE_PARAM * 4
+        with SharedBlobHandle.create(SoaParticles, {'capacity': capacity}) as handle:
+            particles = handle.attach()
+            particles.get_column('global_index')[-1] = capacity - 1
+
+            self.assertEqual(capacity - 1, handle.attach()[-1].global_index)
+
+    def test_from_object(self):
+        particles = create_particles(capacity=8, count=5)
+        with SharedBlobHandle.from_object(particles) as handle:
+            attached = handle.attach()
+
+            self.assertEqual(5, attached.count)
+            self.assertEqual(particles.get_column('mass').tolist(), attached.get_column('mass').tolist())
+
+    def test_unlink(self):
+        self.handle.unlink()
+
+        self.assertFalse(os.path.exists(self.handle.path))
+        self.assertRaises(IOError, self.handle.attach)
+
+
+class CopyOnWriteTest(unittest.TestCase):
+
+    def setUp(self):
+        self.world = create_particles(capacity=8)
+        self.checkpoint = SharedBlobHandle.from_object(self.world)
+
+    def tearDown(self):
+        self.checkpoint.unlink()
+
+    def test_clone_requires_a_frozen_handle(self):
+        self.assertRaises(ValueError, self.world.clone, copy_on_write=True)
+        self.assertRaises(ValueError, self.checkpoint.attach().clone, copy_on_write=True)
+        self.assertRaises(ValueError, self.checkpoint.attach, copy_on_write=True)
+
+        self.checkpoint.freeze()
+        self.assertRaises(ValueError, self.checkpoint.attach)
+
+    def test_clones_are_isolated(self):
+        self.checkpoint.freeze()
+        snapshot = self.checkpoint.attach(readonly=True)
+        first, second = snapshot.clone(copy_on_write=True), snapshot.clone(copy_on_write=True)
+
+        self.world.get_column('mass')[:] = 42
+        first.get_column('mass')[0] = 17
+
+        self.assertEqual(17, first.get_column('mass')[0])
+        self.assertEqual(range(8), second.get_column('mass').tolist())
+        self.assertEqual(range(8), snapshot.get_column('mass').tolist())
+        self.assertEqual(range(8), self.checkpoint.attach(readonly=True).get_column('mass').tolist())
+
+
+class IngestTest(unittest.TestCase):
+
+    def test_ingest_structs(self):
+        structs = [{'global_index': -1, 'pos': {'x': index, 'y': 0, 'z': 0}, 'mass': index} for index in range(10)]
+
+        for array_type in [Particles, SoaParticles]:
+            with SharedBlobHandle.create(array_type, {'capacity': 12}) as handle:
+                particles = ingest_structs(handle, structs, processes=2)
+
+                self.assertEqual(10, particles.count)
+                self.assertEqual(range(10) + [-1, -1], particles.get_column('global_index').tolist())
+                self.assertEqual(range(10), particles.get_column('mass')[:10].tolist())
+
+    def test_rows_of_flat_structs(self):
+        structs = [{'globalIndex': -1, 'pos_x': index, 'pos_y': 0, 'pos_z': 0, 'mass': index} for index in range(3)]
+        rows = Particles.get_rows_from_struct(structs)
+
+        self.assertEqual(('global_index', 'pos_x', 'pos_y', 'pos_z', 'mass'), rows.dtype.names)
+        self.assertEqual([0, 1, 2], rows['pos_x'].tolist())
+
+        with SharedBlobHandle.create(SoaParticles, {'capacity': 4}) as handle:
+            ingest_structs(handle, structs, processes=1, chunk_rows=2)
+
+            self.assertEqual(3, handle.attach(readonly=True).count)
+            self.assertEqual([0, 1, 2], [item.global_index for item in handle.attach()])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+
+from blob_types import BlobSnapshots
+
+from schema import create_particles
+
+
+class SnapshotsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.particles = create_particles(capacity=1000)
+        self.snapshots = BlobSnapshots(self.particles, page_size=256)
+
+    def test_restore(self):
+        first = self.snapshots.snapshot()
+        self.particles.get_column('mass')[:] = 42
+        second = self.snapshots.snapshot()
+        self.particles.get_column('mass')[:] = 7
+
+        self.snapshots.restore(first)
+        self.assertEqual(range(1000), self.particles.get_column('mass').tolist())
+
+        self.snapshots.restore(second)
+        self.assertEqual([42] * 1000, self.particles.get_column('mass').tolist())
+
+    def test_unchanged_pages_are_shared(self):
+        self.snapshots.snapshot()
+        self.particles.get_column('mass')[500] = -1
+        self.snapshots.snapshot()
+
+        page_count = self.snapshots.page_count
+        self.assertEqual((page_count + 1) * 256, self.snapshots.get_nbytes())
+        self.assertEqual([(0, 256, (page_count - 1) * 256), (1, 256, (page_count - 1) * 256)],
+                         self.snapshots.get_memory_report())
+
+    def test_max_versions(self):
+        snapshots = BlobSnapshots(self.particles, page_size=256, max_versions=2)
+        for step in range(4):
+            self.particles.get_column('mass')[:] = step
+            snapshots.snapshot()
+
+        self.assertEqual([2, 3], snapshots.versions())
+        self.assertEqual(2 * snapshots.page_count * 256, snapshots.get_nbytes())
+        self.assertRaises(KeyError, snapshots.restore, 0)
+
+    def test_dropped_pages_are_reused(self):
+        first = self.snapshots.snapshot()
+        self.particles.get_column('mass')[:] = 42
+        self.snapshots.snapshot()
+        pool_size = len(self.snapshots.pool)
+
+        self.snapshots.drop(first)
+        self.particles.get_column('mass')[:] = 7
+        self.snapshots.snapshot()
+
+        self.assertEqual(pool_size, len(self.snapshots.pool))
+
+    def test_restore_is_marked(self):
+        version = self.snapshots.snapshot()
+        self.particles.track_changes()
+        self.snapshots.restore(version)
+
+        self.assertEqual([(0, self.particles.dtype.itemsize)], self.particles.dirty_ranges())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+from blob_types import BlobArray, save_blob, load_blob, save_columns, load_columns
+from blob_types.storage import StorageException
+
+import schema
+from schema import Particle, World, create_particles
+
+
+class Particles(BlobArray):
+    """Has the name of schema.Particles, but the soa layout."""
+
+    child_type = Particle
+    layout = BlobArray.SOA_LAYOUT
+
+
+class StorageTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'particles')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_blob_round_trip(self):
+        world = World(dtype_params={'particles_capacity': 4})
+        world.steps = 7
+        world.particles.get_column('mass')[:] = [1, 2, 3, 4]
+
+        save_blob(world, self.path)
+        loaded = load_blob(World, self.path)
+
+        self.assertEqual(7, loaded.steps)
+        self.assertEqual([1, 2, 3, 4], loaded.particles.get_column('mass').tolist())
+
+    def test_layout_is_part_of_the_schema(self):
+        self.assertNotEqual(schema.Particles.get_schema_fingerprint(), Particles.get_schema_fingerprint())
+
+        save_blob(create_particles(schema.Particles, capacity=16), self.path)
+        self.assertRaises(StorageException, load_blob, Particles, self.path)
+
+    def test_columns_round_trip(self):
+        particles = create_particles(capacity=100, count=60)
+        save_columns(particles, self.path)
+        loaded = load_columns(schema.Particles, self.path)
+
+        self.assertEqual(60, loaded.count)
+        numpy.testing.assert_array_equal(particles.get_column('mass'), loaded.get_column('mass'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import unittest
+
+import numpy
+
+from blob_types import BlobTransfer
+from blob_types import transfer
+
+from schema import create_particles
+
+
+def get_context():
+    """Returns a context of the first OpenCL platform or None, if there is no OpenCL runtime."""
+
+    try:
+        import pyopencl
+        platforms = pyopencl.get_platforms()
+
+    except Exception:
+        return None
+
+    if not platforms:
+        return None
+
+    return pyopencl.Context(platforms[0].get_devices()[:1])
+
+
+class Slot(object):
+    """A slot like transfer.BlobTransferSlot, which records its usage instead of allocating device memory."""
+
+    def __init__(self, context, queue, nbytes):
+        self.nbytes = nbytes
+        self.buffer = object()
+        self.upload_event = None
+        self.release_events = []
+        self.waits = 0
+        self.unmapped = False
+
+    def unmap(self, queue):
+        self.unmapped = True
+
+    def wait(self):
+        self.waits += 1
+
+
+class Event(object):
+
+    def __init__(self):
+        self.complete = False
+
+    def wait(self):
+        self.complete = True
+
+
+class TransferBookkeepingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.slot_type = transfer.BlobTransferSlot
+        transfer.BlobTransferSlot = Slot
+
+        self.transfer = BlobTransfer(context=None, queue='queue', nbytes=64)
+
+    def tearDown(self):
+        transfer.BlobTransferSlot = self.slot_type
+
+    def test_ring_of_slots(self):
+        self.assertEqual([64, 64], [slot.nbytes for slot in self.transfer.slots])
+
+        slot = self.transfer.slots[1]
+        self.assertIs(slot, self.transfer.get_slot(slot.buffer))
+        self.assertRaises(ValueError, self.transfer.get_slot, object())
+
+    def test_release_events_are_awaited(self):
+        slot = self.transfer.slots[0]
+        event = Event()
+        self.transfer.release(slot.buffer, event)
+        self.assertEqual([event], slot.release_events)
+
+        self.transfer.finish()
+        self.assertTrue(event.complete)
+        self.assertEqual([], slot.release_events)
+
+    def test_growth_replaces_the_slots(self):
+        previous_slots = self.transfer.slots
+        event = Event()
+        self.transfer.release(previous_slots[0].buffer, event)
+        self.transfer.index = 1
+
+        self.transfer.allocate(128)
+
+        self.assertTrue(event.complete)
+        self.assertTrue(all(slot.unmapped for slot in previous_slots))
+        self.assertEqual([128, 128], [slot.nbytes for slot in self.transfer.slots])
+        self.assertEqual(0, self.transfer.index)
+
+
+@unittest.skipIf(get_context() is None, 'requires an OpenCL platform')
+class TransferTest(unittest.TestCase):
+
+    def setUp(self):
+        import pyopencl
+
+        self.context = get_context()
+        self.queue = pyopencl.CommandQueue(self.context)
+        self.transfer = BlobTransfer(self.context, self.queue)
+
+    def tearDown(self):
+        self.transfer.finish()
+        for slot in self.transfer.slots:
+            slot.unmap(self.queue)
+
+    def download(self, buffer, particles):
+        result = numpy.zeros_like(particles.blob)
+        self.transfer.download(buffer, result).wait()
+        return result
+
+    def test_upload_and_download(self):
+        particles = create_particles(capacity=4)
+        buffer, event = self.transfer.upload(particles)
+        event.wait()
+
+        self.assertEqual(particles.blob.tobytes(), self.download(buffer, particles).tobytes())
+
+    def test_buffers_alternate(self):
+        particles = create_particles(capacity=4)
+        first_buffer, first_event = self.transfer.upload(particles)
+        second_buffer, second_event = self.transfer.upload(particles)
+        self.transfer.release(first_buffer, first_event)
+        self.transfer.release(second_buffer, second_event)
+
+        third_buffer, third_event = self.transfer.upload(particles)
+        third_event.wait()
+
+        self.assertNotEqual(first_buffer, second_buffer)
+        self.assertEqual(first_buffer, third_buffer)
+        self.assertEqual([], self.transfer.get_slot(third_buffer).release_events)
+
+    def test_update_of_dirty_ranges(self):
+        particles = create_particles(capacity=4)
+        buffer, event = self.transfer.upload(particles)
+        event.wait()
+
+        particles.track_changes()
+        particles[2].mass = 9
+        for update_event in self.transfer.update(buffer, particles):
+            update_event.wait()
+
+        self.assertEqual([], particles.dirty_ranges())
+        self.assertEqual(particles.blob.tobytes(), self.download(buffer, particles).tobytes())
+
+
+if __name__ == '__main__':
+    unittest.main()
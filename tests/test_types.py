@@ -0,0 +1,96 @@
+import pickle
+import unittest
+
+from blob_types import Blob
+
+from schema import Particles, Universe, World, create_particles
+
+
+class ProbeCounter(object):
+    """Counts the calls of Blob.get_dtype_params_from_blob within the context."""
+
+    def __enter__(self):
+        self.calls = 0
+        self.get_dtype_params_from_blob = Blob.__dict__['get_dtype_params_from_blob']
+        get_dtype_params_from_blob = self.get_dtype_params_from_blob.__func__
+
+        def count(cls, blob, offset=0):
+            self.calls += 1
+            return get_dtype_params_from_blob(cls, blob, offset)
+
+        Blob.get_dtype_params_from_blob = classmethod(count)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        Blob.get_dtype_params_from_blob = self.get_dtype_params_from_blob
+
+
+class DtypeParamsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dtype_params = {'planets_capacity': 3, 'planets_particles_capacity': 2, 'home_particles_capacity': 4}
+        self.universe = Universe(dtype_params=self.dtype_params)
+
+    def test_dtype_params_are_not_probed(self):
+        with ProbeCounter() as counter:
+            self.assertEqual(self.dtype_params, self.universe.dtype_params)
+            self.assertEqual({'capacity': 4}, self.universe.home.particles.dtype_params)
+            self.universe.clone()
+            pickle.dumps(self.universe, pickle.HIGHEST_PROTOCOL)
+
+        self.assertEqual(0, counter.calls)
+
+    def test_incomplete_dtype_params_are_probed(self):
+        blob = self.universe.blob
+        universe = Universe(blob=blob, dtype=blob.dtype)
+        self.assertEqual(self.dtype_params, universe.dtype_params)
+
+    def test_dtype_params_are_a_copy(self):
+        self.universe.dtype_params['planets_capacity'] = 5
+        self.assertEqual(3, self.universe.dtype_params['planets_capacity'])
+
+
+class NestedObjectTest(unittest.TestCase):
+
+    def test_nested_objects_are_created_once(self):
+        world = World(dtype_params={'particles_capacity': 4})
+        self.assertNotIn('particles', vars(world))
+
+        particles = world.particles
+        self.assertIs(particles, world.particles)
+        self.assertEqual(4, particles.capacity)
+
+    def test_nested_objects_are_views(self):
+        world = World(dtype_params={'particles_capacity': 4})
+        world.particles.get_column('mass')[2] = 5
+
+        self.assertEqual(5, World.from_blob(world.blob).particles.get_column('mass')[2])
+
+
+class CopyTest(unittest.TestCase):
+
+    def test_pickle_round_trip(self):
+        particles = create_particles(capacity=8, count=5)
+        loaded = pickle.loads(pickle.dumps(particles, pickle.HIGHEST_PROTOCOL))
+
+        self.assertEqual(Particles, type(loaded))
+        self.assertEqual(5, loaded.count)
+        self.assertEqual(particles.get_column('mass').tolist(), loaded.get_column('mass').tolist())
+
+    def test_restored_items_are_created_on_access(self):
+        loaded = pickle.loads(pickle.dumps(create_particles(capacity=8, count=5), pickle.HIGHEST_PROTOCOL))
+        self.assertEqual([], loaded.get_nested_objects())
+
+        self.assertEqual(4, loaded[4].mass)
+        self.assertEqual([loaded[4]], loaded.get_nested_objects())
+
+    def test_clone_is_independent(self):
+        particles = create_particles(capacity=8)
+        clone = particles.clone()
+        particles.get_column('mass')[:] = 42
+
+        self.assertEqual(range(8), clone.get_column('mass').tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+
+import numpy
+
+from blob_types import Blob, BlobArray, BlobEnum, validate_blobs, from_validated_blob, trusted
+from blob_types.types import BlobValidationException
+from blob_types.utils import get_blob_bytes
+
+from schema import Particles, Universe, create_particles
+
+
+class Color(BlobEnum):
+    to_int_map, to_string_map = BlobEnum.create_fields('red', 'green')
+
+
+class Pixel(Blob):
+    dtype, subtypes = Blob.create_plain_dtype(('global_index', numpy.int32), ('color', Color))
+
+
+class Pixels(BlobArray):
+    child_type = Pixel
+
+
+class ValidationTest(unittest.TestCase):
+
+    def test_valid_store_of_blobs(self):
+        universe = Universe(dtype_params={'planets_capacity': 2, 'planets_particles_capacity': 2,
+                                          'home_particles_capacity': 3})
+        store = numpy.tile(get_blob_bytes(universe.blob), 3)
+
+        report = validate_blobs(Universe, store)
+        self.assertTrue(report.is_valid(), str(report))
+
+    def test_invalid_values_are_reported_by_offset(self):
+        particles = create_particles(capacity=4, count=3)
+        blob_bytes = get_blob_bytes(particles.blob)
+        index_column = particles.get_column('global_index')
+
+        index_column[1] = 4
+        particles.count = 2
+
+        report = validate_blobs(Particles, blob_bytes)
+        self.assertFalse(report.is_valid())
+
+        count_offset = Particles.create_dtype(dtype_params={'capacity': 4}).fields['count'][1]
+        index_offset = Particles.get_items_offset() + index_column.strides[0]
+        self.assertEqual([count_offset, index_offset], report.get_offsets().tolist())
+        self.assertRaises(BlobValidationException, report.raise_errors)
+        self.assertRaises(BlobValidationException, from_validated_blob, Particles, blob_bytes)
+
+    def test_invalid_enum_value(self):
+        pixels = Pixels(capacity=4)
+        pixels.get_column('global_index')[:2] = [0, 1]
+        pixels.count = 2
+        pixels.get_column('color')[1] = 5
+        pixels.get_column('color')[3] = 5  # an invalid item is not checked
+
+        report = validate_blobs(Pixels, pixels.blob)
+        self.assertEqual(1, len(report.get_offsets()))
+
+    def test_from_validated_blob(self):
+        particles = create_particles(capacity=4, count=3)
+        loaded = from_validated_blob(Particles, get_blob_bytes(particles.blob).copy())
+
+        self.assertEqual(3, loaded.count)
+        self.assertFalse(Blob.trusted)
+
+    def test_trusted_is_restored(self):
+        try:
+            with trusted():
+                self.assertTrue(Blob.trusted)
+                raise KeyError()
+
+        except KeyError:
+            pass
+
+        self.assertFalse(Blob.trusted)
+
+
+if __name__ == '__main__':
+    unittest.main()